@@ -57,12 +57,16 @@ class _Association(collections.MutableMapping, dict):
     """_Association class key->value.
 
     Inherit from dict to be dumped as a dict by json.
+    Key and value are stored in the concrete class slots.
     """
     __metaclass__ = abc.ABCMeta
+    __slots__ = ()
     KEYFMT = '{}name'
     KEY = None
     VALUE = None
     VALUE_SORT_KEY = None
+    # Concrete classes by (cls, key, value, sortkey)
+    _CLASSES = {}
 
     def __init__(self, key, value):  # pylint:disable=super-init-not-called
         # Don't call 'dict' init, only used for json dumping
@@ -135,11 +139,25 @@ class _Association(collections.MutableMapping, dict):
 
     @classmethod
     def for_key_value(cls, key, value, sortkey=None):
+        """Return association class for assoctype.
+
+        Classes are created once for each key, value and sortkey.
+        """
+        try:
+            return cls._CLASSES[(cls, key, value, sortkey)]
+        except KeyError:
+            return cls._CLASSES.setdefault(
+                (cls, key, value, sortkey),
+                cls._new_class(key, value, sortkey))
+
+    @classmethod
+    def _new_class(cls, key, value, sortkey):
         """Create association class for assoctype."""
         name = '{}{}Association'.format(key.title(), value.title())
 
         class KeyValuesAssociation(cls):  # pylint:disable=too-many-ancestors
             """KeyValuesAssociation class->Nodes."""
+            __slots__ = (cls.KEYFMT.format(key), value)
             KEY = key
             VALUE = value
             VALUE_SORT_KEY = cls.staticclassattribute(sortkey)
@@ -161,21 +179,30 @@ class _Association(collections.MutableMapping, dict):
 
     def dict(self):
         """Dump as a dict."""
-        return self.__dict__.copy()
+        return {self._keyattr(): self.key, self._valueattr(): self.value}
+
+    to_json_obj = dict
+
+    @property
+    def __dict__(self):
+        """Attributes dict, values are in slots."""
+        return self.dict()
 
     # MutableMapping required methods
 
     def __iter__(self):
-        """Return __dict__."""
+        """Iterate over key and value attributes names."""
         # If list has been modified directly, json dumps will still be sorted
         self._sort()
-        return self.__dict__.__iter__()
+        return iter((self._keyattr(), self._valueattr()))
 
     def __len__(self):
-        return self.__dict__.__len__()
+        return 2
 
     def __getitem__(self, key):
-        return self.__dict__.__getitem__(key)
+        if key not in (self._keyattr(), self._valueattr()):
+            raise KeyError(key)
+        return getattr(self, key)
 
     # Delete unwanted 'dict' methods
     clear = property(_disabled_method)
@@ -259,6 +286,8 @@ class AssociationsMap(  # pylint:disable=too-many-public-methods
         """Dump to a list of dicts."""
         return [assoc.dict() for assoc in self]
 
+    to_json_obj = list
+
     def __len__(self):
         return list.__len__(self)
 
@@ -30,6 +30,9 @@ from iotlabcli.rest import Api
 RC_FILE = (os.getenv('IOTLAB_PASSWORD_FILE') or
            os.path.expanduser('~/.iotlabrc'))
 
+# Password file content by (path, mtime, size), for long running processes
+_PASSWORD_FILE_CACHE = {}
+
 
 def get_user_credentials(username=None, password=None):
     """ Return user credentials.
@@ -77,6 +80,16 @@ def _read_password_file():
     """
     if not os.path.exists(RC_FILE):
         return None, None
+    stat = os.stat(RC_FILE)
+    key = (RC_FILE, stat.st_mtime, stat.st_size)
+    try:
+        return _PASSWORD_FILE_CACHE[key]
+    except KeyError:
+        return _PASSWORD_FILE_CACHE.setdefault(key, _decode_password_file())
+
+
+def _decode_password_file():
+    """ Read and decode password file """
     try:
         with open(RC_FILE, 'r') as password_file:
             username, enc_password = password_file.readline().split(':')
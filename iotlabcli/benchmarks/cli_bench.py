@@ -0,0 +1,152 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Benchmark iotlab-* commands against a local REST mock
+
+Each scenario runs an 'iotlab-<command>' entry point `repeat` times against
+a `mock_server.MockRestServer` and prints one json line with its run times
+in seconds, failed runs and requests count:
+
+    $ python -m iotlabcli.benchmarks.cli_bench --nodes 1000 --latency 0.05
+
+Commands use a temporary cache directory, started empty.
+
+Commands are run in process, like 'iotlab-daemon' runs them, so the python
+startup and modules import times of the installed scripts are not measured.
+"""
+
+from __future__ import print_function
+import json
+import shutil
+import argparse
+import tempfile
+import contextlib
+import timeit
+
+try:  # pragma: no cover
+    # pylint: disable=import-error
+    from StringIO import StringIO
+except ImportError:  # pragma: no cover
+    from io import StringIO
+
+from iotlabcli import rest
+from iotlabcli import cache
+from iotlabcli.benchmarks import mock_server
+from iotlabcli.parser import daemon
+
+# (name, command, arguments), formatted with 'site', 'nodes' and 'exp_id'
+SCENARIOS = (
+    ('info', 'experiment', 'info -l'),
+    ('info-site', 'experiment', 'info -l --site {site}'),
+    ('info-id', 'experiment', 'info -li'),
+    ('get-list', 'experiment', 'get -l'),
+    ('get-resources', 'experiment', 'get -i {exp_id} -r'),
+    ('wait', 'experiment', 'wait -i {exp_id}'),
+    ('submit-physical', 'experiment',
+     'submit -d 20 -l {site},m3,1-{nodes}'),
+    ('submit-alias', 'experiment',
+     'submit -d 20 -l {nodes},archi=m3:at86rf231+site={site}'),
+    ('node-reset', 'node', '-i {exp_id} --reset'),
+    ('node-reset-exclude', 'node', '-i {exp_id} --reset -e {site},m3,1'),
+    ('script-status', 'experiment', 'script -i {exp_id} --status'),
+    ('robot-status', 'robot', 'status -i {exp_id}'),
+    ('profile-list', 'profile', 'get -l'),
+)
+
+
+def run_benchmarks(testbed, scenarios=SCENARIOS, repeat=5):
+    """ Run `scenarios` against a server for `testbed`, yield results
+
+    An experiment on all the testbed nodes is added for commands on
+    '{exp_id}'.
+    """
+    exp_id = testbed.add_experiment(
+        [res['network_address'] for res in testbed.resources])
+    params = {'site': testbed.sites[0], 'exp_id': exp_id,
+              'nodes': len(testbed.resources) // (2 * len(testbed.sites))}
+
+    with _mock_environment(testbed):
+        for name, command, args in scenarios:
+            argv = [command, '-u', mock_server.USER, '-p', mock_server.USER]
+            argv += args.format(**params).split()
+            yield _run_scenario(testbed, name, argv, repeat)
+
+
+def _run_scenario(testbed, name, argv, repeat):
+    """ Run `argv` command `repeat` times and return its results dict """
+    requests = testbed.requests
+    times, errors = [], 0
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        ret = daemon.run_command(argv, stdout=StringIO(), stderr=StringIO())
+        times.append(timeit.default_timer() - start)
+        errors += int(ret != 0)
+
+    times.sort()
+    command = ' '.join(['iotlab-%s' % argv[0]] + argv[5:])
+    return {'name': name, 'command': command, 'runs': repeat,
+            'errors': errors, 'requests': testbed.requests - requests,
+            'min': times[0], 'median': times[len(times) // 2],
+            'max': times[-1]}
+
+
+@contextlib.contextmanager
+def _mock_environment(testbed):
+    """ Use a server for `testbed` as REST API and a temporary cache """
+    server = mock_server.MockRestServer(testbed).start()
+    saved = (rest.Api.url, cache.CACHE_DIR)
+    rest.Api.url, cache.CACHE_DIR = server.url, tempfile.mkdtemp()
+    rest.Api.clear_cache()
+    try:
+        yield
+    finally:
+        shutil.rmtree(cache.CACHE_DIR)
+        rest.Api.url, cache.CACHE_DIR = saved
+        rest.Api.clear_cache()
+        server.stop()
+
+
+def parse_options():
+    """ Parse command line option """
+    parser = argparse.ArgumentParser(
+        description='Benchmark iotlab-* commands against a local REST mock')
+    mock_server.testbed_options(parser)
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='runs of each scenario')
+    parser.add_argument('-s', '--scenario', dest='scenarios',
+                        action='append', default=[],
+                        choices=[scn[0] for scn in SCENARIOS],
+                        help='scenario to run, may be repeated, default all')
+    return parser
+
+
+def main(args=None):
+    """ Print benchmarks results as json lines """
+    opts = parse_options().parse_args(args)
+    scenarios = [scn for scn in SCENARIOS
+                 if scn[0] in opts.scenarios or not opts.scenarios]
+    testbed = mock_server.testbed_from_opts(opts)
+    for result in run_benchmarks(testbed, scenarios, opts.repeat):
+        print(json.dumps(result, sort_keys=True))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -0,0 +1,296 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Microbenchmarks of experiment construction building blocks
+
+Benchmarks are functions taking a pytest-benchmark like `benchmark`
+fixture, the number of nodes and the number of associations, they call
+`benchmark(function, *args)` on the measured function.
+
+Each benchmark is run for every nodes and associations count, the json
+line result gives its run time in seconds and its peak memory in bytes
+(python3 only). Results saved with '--save' are compared to the next runs
+with '--compare', which fail if a median time or a peak memory is more than
+'--threshold' above the saved one:
+
+    $ python -m iotlabcli.benchmarks.micro_bench --save bench.json
+    $ python -m iotlabcli.benchmarks.micro_bench --compare bench.json
+"""
+
+from __future__ import print_function
+import sys
+import json
+import argparse
+import timeit
+
+try:  # pragma: no cover
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None  # pylint:disable=invalid-name
+
+from iotlabcli import helpers
+from iotlabcli import experiment
+from iotlabcli.associations import AssociationsMap
+from iotlabcli.parser import common
+from iotlabcli.parser import formatters
+
+NODES = (10, 1000, 10000)
+ASSOCIATIONS = (1, 10, 1000)
+
+BENCHMARKS = {}
+
+
+def register(function):
+    """ Decorator adding benchmark `function` to BENCHMARKS """
+    BENCHMARKS[function.__name__.replace('bench_', '', 1)] = function
+    return function
+
+
+class Benchmark(object):  # pylint:disable=too-few-public-methods
+    """ Callable measuring a function, like pytest-benchmark fixture
+
+    :param rounds: number of timed calls
+    """
+    def __init__(self, rounds=5):
+        self.rounds = rounds
+        self.stats = None
+
+    def __call__(self, function, *args):
+        """ Measure `function(*args)` run time and peak memory """
+        times = []
+        for _ in range(self.rounds):
+            start = timeit.default_timer()
+            result = function(*args)
+            times.append(timeit.default_timer() - start)
+        times.sort()
+        self.stats = {'rounds': self.rounds, 'min': times[0],
+                      'median': times[len(times) // 2],
+                      'peak_memory': peak_memory(function, *args)}
+        return result
+
+
+def peak_memory(function, *args):
+    """ Return `function(*args)` peak allocated memory, None on python2
+
+    >>> peak_memory(lambda: bytearray(10 ** 6)) >= 10 ** 6 or tracemalloc
+    True
+    """
+    if tracemalloc is None:  # pragma: no cover
+        return None
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# Inputs
+
+def nodes_list(nodes):
+    """ Physical nodes urls
+
+    >>> nodes_list(2)
+    ['m3-1.grenoble.iot-lab.info', 'm3-2.grenoble.iot-lab.info']
+    """
+    return ['m3-%u.grenoble.iot-lab.info' % num for num in range(1, nodes + 1)]
+
+
+def nodes_groups(nodes, assocs):
+    """ `nodes` split in `assocs` groups
+
+    >>> nodes_groups(['a', 'b', 'c'], 2)
+    [['a', 'c'], ['b']]
+    """
+    return [nodes[i::assocs] for i in range(min(assocs, len(nodes)))]
+
+
+def resources_list(nodes, assocs):
+    """ 'exp_resources' with one firmware and profile for each group """
+    return [_group_resources(group, i)
+            for i, group in enumerate(nodes_groups(nodes_list(nodes),
+                                                   assocs))]
+
+
+def _group_resources(group, index):
+    """ 'exp_resources' for `group` with `index` associations """
+    return experiment.exp_resources(group, 'fw_%u.elf' % index,
+                                    'profile_%u' % index,
+                                    mobility='mobility_%u' % index)
+
+
+def build_experiment(resources):
+    """ Experiment with `resources` """
+    exp = experiment._Experiment('bench', 20)  # pylint:disable=W0212
+    for res in resources:
+        exp.add_exp_resources(res)
+    return exp
+
+
+# Benchmarks
+
+@register
+def bench_exp_resources(benchmark, nodes, assocs):
+    """ Create 'exp_resources' dicts """
+    benchmark(resources_list, nodes, assocs)
+
+
+@register
+def bench_add_exp_resources(benchmark, nodes, assocs):
+    """ Add 'exp_resources' to an experiment """
+    benchmark(build_experiment, resources_list(nodes, assocs))
+
+
+@register
+def bench_associations_map(benchmark, nodes, assocs):
+    """ Fill an AssociationsMap """
+    groups = nodes_groups(nodes_list(nodes), assocs)
+
+    def _associations_map():
+        assocs_map = AssociationsMap('firmware', 'nodes',
+                                     sortkey=helpers.node_url_sort_key)
+        for index, group in enumerate(groups):
+            assocs_map.extendvalues('fw_%u.elf' % index, group)
+        return assocs_map.list()
+
+    benchmark(_associations_map)
+
+
+@register
+def bench_json_dumps(benchmark, nodes, assocs):
+    """ Dump an experiment description """
+    benchmark(helpers.json_dumps,
+              build_experiment(resources_list(nodes, assocs)))
+
+
+@register
+def bench_expand_short_nodes_list(benchmark, nodes, assocs):
+    """ Expand a '1-5+7' nodes list with `assocs` ranges """
+    ranges = nodes_groups(range(1, nodes + 1), assocs)
+    nums = [num + 2 * index * nodes for index, group in enumerate(ranges)
+            for num in range(1, len(group) + 1)]
+    benchmark(common.expand_short_nodes_list, formatters.short_nodes_str(nums))
+
+
+def run_benchmarks(names=None, nodes=NODES, assocs=ASSOCIATIONS, rounds=5):
+    """ Run benchmarks `names` for each nodes and associations counts
+
+    Associations counts higher than the nodes count are skipped.
+    """
+    for name in sorted(names or BENCHMARKS):
+        for nodes_nb, assocs_nb in _sizes(nodes, assocs):
+            benchmark = Benchmark(rounds)
+            BENCHMARKS[name](benchmark, nodes_nb, assocs_nb)
+            yield dict(benchmark.stats, name=name, nodes=nodes_nb,
+                       associations=assocs_nb)
+
+
+def _sizes(nodes, assocs):
+    """ (nodes, associations) couples
+
+    >>> _sizes((10, 100), (1, 100))
+    [(10, 1), (100, 1), (100, 100)]
+    """
+    return [(nodes_nb, assocs_nb) for nodes_nb in nodes
+            for assocs_nb in assocs if assocs_nb <= nodes_nb]
+
+
+def regressions(results, baseline, threshold):
+    """ Return messages for results more than `threshold` above baseline
+
+    >>> base = [{'name': 'a', 'nodes': 1, 'associations': 1,
+    ...          'median': 1.0, 'peak_memory': 100}]
+    >>> res = [dict(base[0], median=1.5, peak_memory=100)]
+    >>> regressions(res, base, 0.2)
+    ['a nodes=1 associations=1: median 1.5 > 1.0 (+50%)']
+    >>> regressions(res, base, 0.6)
+    []
+    """
+    base = dict((_result_key(res), res) for res in baseline)
+    messages = []
+    for result in results:
+        ref = base.get(_result_key(result), {})
+        for stat in ('median', 'peak_memory'):
+            messages.extend(_regression(result, ref, stat, threshold))
+    return messages
+
+
+def _result_key(result):
+    """ Benchmark result identifier """
+    return (result['name'], result['nodes'], result['associations'])
+
+
+def _regression(result, ref, stat, threshold):
+    """ Return a message in a list if `result` `stat` regressed from `ref` """
+    value, ref_value = result.get(stat), ref.get(stat)
+    if not value or not ref_value or value <= ref_value * (1 + threshold):
+        return []
+    return ['%s nodes=%u associations=%u: %s %r > %r (+%u%%)' % (
+        result['name'], result['nodes'], result['associations'], stat,
+        value, ref_value, round(100 * (value - ref_value) / ref_value))]
+
+
+def parse_options():
+    """ Parse command line option """
+    parser = argparse.ArgumentParser(
+        description='Microbenchmarks of experiment construction')
+    parser.add_argument('-b', '--benchmark', dest='names', action='append',
+                        choices=sorted(BENCHMARKS),
+                        help='benchmark to run, may be repeated, default all')
+    parser.add_argument('--nodes', type=int, nargs='+', default=NODES)
+    parser.add_argument('--associations', type=int, nargs='+',
+                        default=ASSOCIATIONS)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--save', help='save results to json file')
+    parser.add_argument('--compare', help='compare results to saved ones')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed relative increase, default 0.2')
+    return parser
+
+
+def main(args=None):
+    """ Print benchmarks results as json lines, exit 1 on regression """
+    opts = parse_options().parse_args(args)
+    results = []
+    for result in run_benchmarks(opts.names, opts.nodes, opts.associations,
+                                 opts.rounds):
+        print(json.dumps(result, sort_keys=True))
+        results.append(result)
+
+    if opts.save:
+        with open(opts.save, 'w') as bench_file:
+            json.dump(results, bench_file, indent=4, sort_keys=True)
+    if opts.compare:
+        _check_regressions(results, opts.compare, opts.threshold)
+
+
+def _check_regressions(results, path, threshold):
+    """ Exit with error if `results` regressed since `path` results """
+    with open(path) as bench_file:
+        messages = regressions(results, json.load(bench_file), threshold)
+    for message in messages:
+        print('Regression: %s' % message, file=sys.stderr)
+    if messages:
+        sys.exit(1)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -0,0 +1,424 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Local stand-in for the IoT-LAB REST API
+
+`MockTestbed` answers the requests done by `rest.Api` from generated
+resources, with configurable nodes count, latency, error rate and payload
+size. `MockRestServer` serves it over http to measure the library and the
+command line tools without the real testbed:
+
+    $ python -m iotlabcli.benchmarks.mock_server --port 8000 --nodes 1000
+    $ IOTLAB_API_URL=http://localhost:8000/ iotlab-experiment info -l
+
+Experiments are 'Running' as soon as submitted, commands always succeed.
+"""
+
+from __future__ import print_function
+import re
+import json
+import time
+import random
+import argparse
+import threading
+
+try:  # pragma: no cover
+    # pylint: disable=import-error,no-name-in-module
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlsplit, parse_qsl
+except ImportError:  # pragma: no cover
+    # pylint: disable=import-error,no-name-in-module
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlsplit, parse_qsl
+
+from iotlabcli import helpers
+from iotlabcli.parser import formatters
+
+SITES = ('grenoble', 'lille', 'saclay', 'strasbourg')
+ARCHIS = ('m3:at86rf231', 'a8:at86rf231')
+USER = 'bench'
+
+
+class MockTestbed(object):  # pylint:disable=too-many-instance-attributes
+    """ Generated testbed answering REST requests
+
+    :param nodes: number of nodes per site and architecture
+    :param latency: seconds waited before each response
+    :param error_rate: probability for a request to get a 500 error
+    :param padding: size of a filler string added to each returned item
+    :param seed: random errors generator seed
+    """
+    # (method, path regex, handler method)
+    ROUTES = (
+        ('get', r'experiments$', '_get_experiments'),
+        ('post', r'experiments$', '_submit'),
+        ('get', r'experiments/(\d+)$', '_get_experiment'),
+        ('delete', r'experiments/(\d+)$', '_stop'),
+        ('post', r'experiments/(\d+)$', '_reload'),
+        ('post', r'experiments/(\d+)/(?:nodes|robots)$', '_nodes_command'),
+        ('post', r'experiments/(\d+)/script$', '_script_command'),
+        ('get', r'profiles$', '_get_profiles'),
+        ('get', r'profiles/([^/]+)$', '_get_profile'),
+        ('post', r'profiles/([^/]+)$', '_add_profile'),
+        ('delete', r'profiles/([^/]+)$', '_del_profile'),
+        ('get', r'robots/mobility.*$', '_mobilities'),
+        ('get', r'users/([^/]+)$', '_user'),
+    )
+
+    def __init__(self,  # pylint:disable=too-many-arguments
+                 nodes=100, sites=SITES, archis=ARCHIS,
+                 latency=0.0, error_rate=0.0, padding=0, seed=0):
+        self.sites = list(sites)
+        self.padding = 'x' * padding
+        self.resources = [self._item(_resource(site, archi, num))
+                          for site in sites for archi in archis
+                          for num in range(1, nodes + 1)]
+        self.latency = latency
+        self.error_rate = error_rate
+        self.experiments = {}
+        self.profiles = {}
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def handle(self, method, path, body=b'', content_type=''):
+        """ Return (status, content) answer to `method` request on `path`
+
+        :param method: 'get', 'post' or 'delete'
+        :param path: url path with query string, relative to the api url
+        :returns: http status and json object or bytes content
+        """
+        time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            if self._random.random() < self.error_rate:
+                return 500, {'error': 'Injected error'}
+            return self._dispatch(method, path, _request_data(body,
+                                                              content_type))
+
+    def _dispatch(self, method, path, data):
+        """ Call the handler method matching `method` and `path` """
+        url = urlsplit(path)
+        query = dict(parse_qsl(url.query, keep_blank_values=True))
+        for route_method, pattern, name in self.ROUTES:
+            match = re.match(pattern, url.path.lstrip('/'))
+            if method == route_method and match:
+                return getattr(self, name)(query, data, *match.groups())
+        return 404, {'error': 'No route for %s %s' % (method, url.path)}
+
+    def add_experiment(self, nodes, name='bench'):
+        """ Add a 'Running' experiment on `nodes` and return its id """
+        exp_id = max([0] + list(self.experiments)) + 1
+        self.experiments[exp_id] = self._item({
+            'id': exp_id, 'name': name, 'state': 'Running', 'user': USER,
+            'duration': 20, 'nb_resources': len(nodes),
+            'nodes': sorted(nodes, key=helpers.node_url_sort_key)})
+        return exp_id
+
+    def _item(self, item):
+        """ Add configured padding to returned `item` """
+        if self.padding:
+            item['padding'] = self.padding
+        return item
+
+    def _select(self, query):
+        """ Resources matching 'site', 'archi' and 'state' query values """
+        selection = dict((key, value) for key, value in query.items()
+                         if key in ('site', 'archi', 'state'))
+        return [res for res in self.resources
+                if all(res[key] == value for key, value in selection.items())]
+
+    def _experiment(self, exp_id):
+        """ Return experiment `exp_id` """
+        return self.experiments[int(exp_id)]
+
+    # Experiments
+
+    def _get_experiments(self, query, _data):
+        """ Resources, sites or user experiments list """
+        for key in ('resources', 'id', 'sites'):
+            if key in query:
+                return 200, getattr(self, '_%s_list' % key)(query)
+        return 200, self._experiments_list(query)
+
+    def _resources_list(self, query):
+        """ Resources description """
+        return {'items': self._select(query)}
+
+    def _id_list(self, query):
+        """ Resources ids in '1-34+72' format by site, archi and state """
+        groups = {}
+        for res in self._select(query):
+            key = (res['site'], res['archi'], res['state'])
+            groups.setdefault(key, []).append(
+                helpers.node_url_sort_key(res['network_address'])[2])
+        return {'items': [
+            {'site': site, 'archi': archi, 'state': state,
+             'ids': formatters.short_nodes_str(nums)}
+            for (site, archi, state), nums in sorted(groups.items())]}
+
+    def _sites_list(self, _query):
+        """ Sites description """
+        return {'items': [self._item({'site': site}) for site in self.sites]}
+
+    def _experiments_list(self, query):
+        """ User experiments in 'state', newest first, from 'offset',
+        'limit' long """
+        states = query.get('state', 'Running').split(',')
+        exps = [exp for _, exp in sorted(self.experiments.items(),
+                                         reverse=True)
+                if exp['state'] in states]
+        offset = int(query.get('offset') or 0)
+        limit = int(query.get('limit') or 0) or len(exps)
+        return {'items': exps[offset:offset + limit]}
+
+    def _submit(self, _query, data):
+        """ Submit experiment, allocating the requested nodes """
+        exp = json.loads(data['new_exp.json'].decode('utf-8'))
+        if exp['type'] == 'physical':
+            nodes = exp['nodes']
+        else:
+            nodes = [node for alias in exp['nodes']
+                     for node in self._alias_nodes(alias)]
+        return 200, {'id': self.add_experiment(nodes, exp['name'])}
+
+    def _alias_nodes(self, alias):
+        """ First 'Alive' nodes matching `alias` properties """
+        props = alias['properties']
+        nodes = [res['network_address'] for res in self._select(
+            {'site': props['site'], 'archi': props['archi'],
+             'state': 'Alive'})]
+        return nodes[:alias['nbnodes']]
+
+    def _get_experiment(self, query, _data, exp_id):
+        """ Experiment description, resources, state or start time """
+        exp = self._experiment(exp_id)
+        if 'resources' in query:
+            nodes = set(exp['nodes'])
+            return 200, {'items': [res for res in self.resources
+                                   if res['network_address'] in nodes]}
+        if 'state' in query or 'anystate' in query:
+            return 200, {'state': exp['state']}
+        return 200, dict(exp, start_time=0)
+
+    def _stop(self, _query, _data, exp_id):
+        """ Stop experiment """
+        self._experiment(exp_id)['state'] = 'Terminated'
+        return 200, {'id': int(exp_id), 'status': 'Delete request registered'}
+
+    def _reload(self, _query, _data, exp_id):
+        """ Reload experiment with its nodes in a new experiment """
+        exp = self._experiment(exp_id)
+        return 200, {'id': self.add_experiment(exp['nodes'], exp['name'])}
+
+    # Commands
+
+    def _nodes_command(self, _query, data, exp_id):
+        """ Nodes or robots command, all nodes if no nodes given """
+        nodes = data if isinstance(data, list) else None
+        return 200, {'0': nodes or self._experiment(exp_id)['nodes']}
+
+    def _script_command(self, _query, data, _exp_id):
+        """ Script command on given sites or all sites """
+        sites = data if isinstance(data, list) else None
+        return 200, {'0': sites or self.sites}
+
+    # Profiles
+
+    def _get_profiles(self, query, _data):
+        """ Profiles list """
+        archi = query.get('archi')
+        return 200, [prof for _, prof in sorted(self.profiles.items())
+                     if archi in (None, prof.get('nodearch'))]
+
+    def _get_profile(self, _query, _data, name):
+        """ Profile description """
+        if name not in self.profiles:
+            return 404, {'error': 'Profile %s not found' % name}
+        return 200, self.profiles[name]
+
+    def _add_profile(self, _query, data, name):
+        """ Add profile """
+        self.profiles[name] = dict(data, profilename=name)
+        return 200, {'profilename': name}
+
+    def _del_profile(self, _query, _data, name):
+        """ Delete profile """
+        self.profiles.pop(name, None)
+        return 200, {'profilename': name}
+
+    # Others
+
+    @staticmethod
+    def _mobilities(_query, _data):
+        """ Empty mobilities list """
+        return 200, []
+
+    @staticmethod
+    def _user(_query, _data, _name):
+        """ Valid credentials """
+        return 200, b''
+
+
+def _resource(site, archi, num):
+    """ Resource description for node `num`
+
+    >>> _resource('lille', 'm3:at86rf231', 2)['network_address']
+    'm3-2.lille.iot-lab.info'
+    """
+    node = '%s-%u.%s.iot-lab.info' % (archi.partition(':')[0], num, site)
+    return {'network_address': node, 'site': site, 'archi': archi,
+            'state': 'Alive', 'mobile': 0, 'mobility_type': '',
+            'uid': '%04x' % num, 'x': float(num % 100), 'y': float(num // 100),
+            'z': 1.0}
+
+
+def _request_data(body, content_type):
+    """ Return request `body` as json object or multipart files dict
+
+    >>> _request_data(b'[1, 2]', 'application/json')
+    [1, 2]
+    >>> _request_data(b'', '') is None
+    True
+    """
+    if content_type.startswith('multipart/form-data'):
+        return _form_data(body, content_type)
+    return json.loads(body.decode('utf-8')) if body else None
+
+
+def _form_data(body, content_type):
+    """ Return multipart `body` as a {name: content} dict
+
+    >>> data = (b'--xx\\r\\nContent-Disposition: form-data; name="a.json"; '
+    ...         b'filename="a.json"\\r\\n\\r\\n{}\\r\\n--xx--\\r\\n')
+    >>> _form_data(data, 'multipart/form-data; boundary=xx') == {
+    ...     'a.json': b'{}'}
+    True
+    """
+    boundary = b'--' + content_type.partition('boundary=')[2].encode('ascii')
+    form = {}
+    for part in body.split(boundary)[1:-1]:
+        headers, _, content = part.partition(b'\r\n\r\n')
+        name = re.search(b'name="([^"]*)"', headers).group(1)
+        form[name.decode('utf-8')] = content[:-2]  # remove part final CRLF
+    return form
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """ Answer requests with the server testbed """
+    protocol_version = 'HTTP/1.1'  # keep-alive connections for sessions
+
+    def _handle(self):
+        """ Write testbed answer to current request """
+        length = int(self.headers.get('Content-Length') or 0)
+        status, content = self.server.testbed.handle(
+            self.command.lower(), self.path, self.rfile.read(length),
+            self.headers.get('Content-Type') or '')
+        if not isinstance(content, bytes):
+            content = json.dumps(content).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_DELETE = _handle
+
+    def log_message(self, *args):  # pylint:disable=arguments-differ
+        """ Do not log requests """
+
+
+class MockRestServer(ThreadingMixIn, HTTPServer):
+    """ Threaded http server answering requests with `testbed` """
+    daemon_threads = True
+
+    def __init__(self, testbed, address=('localhost', 0)):
+        HTTPServer.__init__(self, address, _RequestHandler)
+        self.testbed = testbed
+        self._thread = None
+
+    @property
+    def url(self):
+        """ Server url, to use as `rest.Api.url` """
+        return 'http://%s:%u/' % self.server_address[:2]
+
+    def start(self):
+        """ Serve requests in a background thread """
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """ Stop background thread and close server """
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+
+def testbed_options(parser):
+    """ Add `MockTestbed` options to `parser` """
+    parser.add_argument('--nodes', type=int, default=100,
+                        help='nodes per site and architecture')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds waited before each response')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='probability for a request to fail with 500')
+    parser.add_argument('--padding', type=int, default=0,
+                        help='size of filler string added to items')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random errors seed')
+
+
+def testbed_from_opts(opts):
+    """ Return `MockTestbed` configured with `testbed_options` """
+    return MockTestbed(opts.nodes, latency=opts.latency,
+                       error_rate=opts.error_rate, padding=opts.padding,
+                       seed=opts.seed)
+
+
+def parse_options():
+    """ Parse command line option """
+    parser = argparse.ArgumentParser(description='Local IoT-LAB REST mock')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8000)
+    testbed_options(parser)
+    return parser
+
+
+def main(args=None):
+    """ Serve mock REST API until interrupted """
+    opts = parse_options().parse_args(args)
+    server = MockRestServer(testbed_from_opts(opts), (opts.host, opts.port))
+    print('Serving mock REST API on %s' % server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -0,0 +1,141 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Local cache of json serializable values
+
+Values are stored in one file per key in CACHE_DIR, failing to read or write
+the cache is the same as a cache miss.
+"""
+
+import os
+import json
+import time
+import errno
+import sqlite3
+import hashlib
+import tempfile
+import contextlib
+
+CACHE_DIR = (os.getenv('IOTLAB_CACHE_DIR') or
+             os.path.expanduser('~/.cache/iotlabcli'))
+
+
+class DiskCache(object):
+    """ Cache `name` values in files stored in CACHE_DIR/`name` directory
+
+    :param name: cache name, used as directory name
+    :param ttl: values expire `ttl` seconds after being set, None to never
+    """
+
+    def __init__(self, name, ttl=None):
+        self.name = name
+        self.ttl = ttl
+
+    @property
+    def directory(self):
+        """ Cache directory, read at each call to allow changing CACHE_DIR """
+        return os.path.join(CACHE_DIR, self.name)
+
+    def path(self, key):
+        """ Return the file path storing `key` value """
+        digest = hashlib.sha1(str(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest)
+
+    def get(self, key, default=None):
+        """ Return `key` value or `default` if missing or expired """
+        path = self.path(key)
+        try:
+            if self._expired(path):
+                return default
+            with open(path) as cache_fd:
+                return json.load(cache_fd)
+        except (IOError, OSError, ValueError):
+            return default
+
+    def set(self, key, value):
+        """ Set `key` value, the file is replaced atomically """
+        self._write(key, 'w', lambda cache_fd: json.dump(value, cache_fd))
+        return value
+
+    def get_bytes(self, key, default=None):
+        """ Return `key` bytes value or `default` if missing or expired """
+        path = self.path(key)
+        try:
+            if self._expired(path):
+                return default
+            with open(path, 'rb') as cache_fd:
+                return cache_fd.read()
+        except (IOError, OSError):
+            return default
+
+    def set_bytes(self, key, value):
+        """ Set `key` bytes value, stored as is """
+        self._write(key, 'wb', lambda cache_fd: cache_fd.write(value))
+        return value
+
+    def _write(self, key, mode, write):
+        """ Replace `key` file atomically with `write(file)` content """
+        try:
+            makedirs(self.directory)
+            tmp_fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(tmp_fd, mode) as cache_fd:
+                write(cache_fd)
+            os.rename(tmp_path, self.path(key))
+        except (IOError, OSError):
+            pass
+
+    def delete(self, key):
+        """ Remove `key` value if present """
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+    def _expired(self, path):
+        """ Return if value stored in `path` is older than `ttl` """
+        if self.ttl is None:
+            return False
+        return time.time() - os.path.getmtime(path) > self.ttl
+
+
+def makedirs(directory):
+    """ Create directory and its parents if they do not exist """
+    try:
+        os.makedirs(directory)
+    except OSError as err:
+        if err.errno != errno.EEXIST:
+            raise
+
+
+@contextlib.contextmanager
+def sqlite_connection(path, schema):
+    """ SQLite connection to `path` with `schema` script run
+
+    Changes are committed if no exception is raised.
+    """
+    makedirs(os.path.dirname(path))
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(schema)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
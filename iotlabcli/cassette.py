@@ -0,0 +1,176 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Record and replay REST requests
+
+A Cassette replaces the 'requests' transport used by `rest.Api`, it records
+requests and their responses to a json file, or replays the recorded
+responses without network access, with an optional added latency.
+
+It is enabled for the command line tools with environment variables:
+
+    IOTLAB_CASSETTE=path.json           cassette file
+    IOTLAB_CASSETTE_MODE=record|replay  default 'replay'
+    IOTLAB_CASSETTE_LATENCY=0.05        replay latency in seconds, default 0
+
+Requests are matched on method, url and a digest of the sent data,
+credentials are never recorded. Identical requests get their responses in
+recorded order.
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from iotlabcli import cache
+
+MODES = ('record', 'replay')
+
+
+class Cassette(object):
+    """ Requests transport recording or replaying responses in `path`
+
+    :param mode: 'record' real responses or 'replay' recorded ones
+    :param latency: seconds waited before returning a replayed response
+    :param transport: function doing real requests, 'requests.request'
+    """
+
+    def __init__(self, path, mode='replay', latency=0.0, transport=None):
+        if mode not in MODES:
+            raise ValueError('Invalid cassette mode %r, not in %r' %
+                             (mode, MODES))
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.transport = transport or requests.request
+        self.interactions = [] if mode == 'record' else self._load()
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """ Return recorded interactions """
+        with open(self.path) as cassette:
+            return json.load(cassette)
+
+    def save(self):
+        """ Write recorded interactions, file is replaced atomically """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        cache.makedirs(directory)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as cassette:
+            json.dump(self.interactions, cassette, indent=1, sort_keys=True)
+        os.rename(tmp_path, self.path)
+
+    def request(self, method, url, **kwargs):
+        """ Same as 'requests.request' """
+        if self.mode == 'record':
+            return self._record(method, url, **kwargs)
+        return self._replay(method, url, **kwargs)
+
+    def _record(self, method, url, **kwargs):
+        """ Do request and record it with its response """
+        response = self.transport(method, url, **kwargs)
+        interaction = _request_key(method, url, **kwargs)
+        interaction['response'] = _response_dict(response)
+        with self._lock:
+            self.interactions.append(interaction)
+            self.save()
+        return response
+
+    def _replay(self, method, url, **kwargs):
+        """ Return the first not replayed response for request """
+        key = _request_key(method, url, **kwargs)
+        with self._lock:
+            interaction = self._pop_interaction(key)
+        time.sleep(self.latency)
+        return _response(interaction['response'], url)
+
+    def _pop_interaction(self, key):
+        """ Remove and return first interaction matching key """
+        for index, interaction in enumerate(self.interactions):
+            if all(interaction[k] == v for k, v in key.items()):
+                return self.interactions.pop(index)
+        raise ValueError('No recorded response for %s %s' %
+                         (key['method'].upper(), key['url']))
+
+
+def _request_key(method, url, json=None, files=None, **_):
+    """ Return request matching fields, without credentials
+
+    >>> key = _request_key('get', 'http://api/experiments', auth=('u', 'p'))
+    >>> sorted(key.items())  # doctest: +NORMALIZE_WHITESPACE
+    [('body', 'da39a3ee5e6b4b0d3255bfef95601890afd80709'),
+     ('method', 'get'), ('url', 'http://api/experiments')]
+    """
+    # pylint:disable=redefined-outer-name
+    body = hashlib.sha1()
+    if json is not None:
+        body.update(_dumps(json).encode('utf-8'))
+    for name, content in sorted((files or {}).items()):
+        body.update(name.encode('utf-8'))
+        body.update(_bytes(content))
+    return {'method': method, 'url': url, 'body': body.hexdigest()}
+
+
+def _dumps(obj):
+    """ Deterministic json dump, objects are dumped as their __dict__ """
+    return json.dumps(obj, sort_keys=True, default=lambda o: o.__dict__)
+
+
+def _bytes(content):
+    """ Return content as bytes """
+    if isinstance(content, bytes):
+        return content
+    return content.encode('utf-8')
+
+
+def _response_dict(response):
+    """ Return json serializable response """
+    return {'status_code': response.status_code,
+            'headers': dict(response.headers or {}),
+            'content': base64.b64encode(response.content).decode('ascii')}
+
+
+def _response(response_dict, url):
+    """ Return 'requests.Response' from recorded response """
+    response = requests.Response()
+    response.status_code = response_dict['status_code']
+    response.headers = CaseInsensitiveDict(response_dict['headers'])
+    response._content = base64.b64decode(  # pylint:disable=protected-access
+        response_dict['content'])
+    response.encoding = 'utf-8'
+    response.url = url
+    return response
+
+
+def from_env(environ=None):
+    """ Return Cassette configured by IOTLAB_CASSETTE* variables, or None """
+    environ = os.environ if environ is None else environ
+    path = environ.get('IOTLAB_CASSETTE')
+    if not path:
+        return None
+    return Cassette(path, environ.get('IOTLAB_CASSETTE_MODE', 'replay'),
+                    float(environ.get('IOTLAB_CASSETTE_LATENCY', 0)))
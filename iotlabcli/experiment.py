@@ -24,6 +24,7 @@
 from os.path import basename
 import json
 import time
+import itertools
 try:
     # pylint: disable=import-error,no-name-in-module
     import backport_collections as collections
@@ -32,6 +33,8 @@ except ImportError:  # pragma: no cover
     import collections
 
 from iotlabcli import helpers
+from iotlabcli import history
+from iotlabcli import resources_index
 from iotlabcli.associations import AssociationsMap
 from iotlabcli.associations import associationsmapdict_from_dict
 
@@ -91,16 +94,36 @@ def stop_experiment(api, exp_id):
     return api.stop_experiment(exp_id)
 
 
-def get_experiments_list(api, state, limit, offset):
+def get_experiments_list(  # pylint:disable=too-many-arguments
+        api, state, limit, offset, local=False, page_size=None):
     """ Get the experiment list with the specific restriction:
     :param state: State of the experiment
     :param limit: maximum number of outputs
     :param offset: offset of experiments to start at
+    :param local: serve list from local history, synchronized first
+    :param page_size: return experiments 'items' as an iterator on
+        experiments requested `page_size` at a time instead of a list
     """
     state = helpers.check_experiment_state(state)
+    if local:
+        return history.ExperimentsHistory().experiments(api, state, limit,
+                                                        offset)
+    if page_size:
+        return {'items': _iter_experiments(api, state, limit, offset,
+                                           page_size)}
     return api.get_experiments(state, limit, offset)
 
 
+def _iter_experiments(api, state, limit, offset, page_size):
+    """ Iterate on at most `limit` experiments, no limit if 0 """
+    experiments = api.iter_experiments(state, page_size, offset)
+    try:
+        for exp in itertools.islice(experiments, limit or None):
+            yield exp
+    finally:
+        experiments.close()
+
+
 def get_experiment(api, exp_id, option=''):
     """ Get user experiment's description :
 
@@ -211,7 +234,8 @@ def reload_experiment(api, exp_id, duration=None, start_time=None):
     return api.reload_experiment(exp_id, exp_json)
 
 
-def info_experiment(api, list_id=False, site=None, **selections):
+def info_experiment(api, list_id=False, site=None, from_index=False,
+                    **selections):
     """ Print testbed information for user experiment submission:
     * resources description
     * resources description in short mode
@@ -220,8 +244,14 @@ def info_experiment(api, list_id=False, site=None, **selections):
     :param list_id: By default, return full nodes list, if list_id
         return output in exp_list format '3-12+42'
     :param site: Restrict informations collection on site
+    :param from_index: Query resources description from local index
     :param **selections: other selections than site
     """
+    if from_index:
+        if list_id:
+            raise ValueError('Resources index only stores resources list')
+        return resources_index.ResourcesIndex().resources(api, site,
+                                                          **selections)
     return api.get_resources(list_id, site, **selections)
 
 
@@ -245,6 +275,49 @@ def script_experiment(api, exp_id, command, *options):
         raise ValueError('Unknown script command %r' % command)
 
 
+def script_experiment_per_site(api, exp_id, command, options=(),
+                               timeout=None):
+    """Run script command concurrently with one request per site.
+
+    Results are merged per site, sites that failed or timed out are listed
+    in the 'errors' entry with the failure reason.
+
+    :param api: API Rest api object
+    :param command: in ('run', 'kill', 'status')
+    :param options: list of 'site_association' with script 'run'
+                    list of sites for 'kill', 'status', empty for all sites
+    :param timeout: max time in seconds for each site request
+    """
+    sites_options = _script_sites_options(api, exp_id, command, options)
+    sites_args = {site: (api, exp_id, command, opt)
+                  for site, opt in sites_options.items()}
+
+    results, errors = helpers.parallel_map(script_experiment, sites_args,
+                                           timeout)
+    return helpers.merge_results(results, errors)
+
+
+def _script_sites_options(api, exp_id, command, options):
+    """Return {site: option} for `command` with only one site per option."""
+    if command == 'run':
+        _check_sites_uniq(*options)
+        return {site: site_association(site, **assoc.associations)
+                for assoc in options for site in assoc.sites}
+
+    elif command in ('kill', 'status'):
+        sites = options or _get_experiment_sites(api, exp_id)
+        return {site: site for site in sites}
+
+    else:
+        raise ValueError('Unknown script command %r' % command)
+
+
+def _get_experiment_sites(api, exp_id):
+    """Return the sorted sites list, with domain, of experiment nodes."""
+    nodes = helpers.experiment_nodes(api, exp_id)
+    return sorted(set(node.partition('.')[2] for node in nodes))
+
+
 def _script_run_files_dict(*site_associations):
     """Return script start files dict.
 
@@ -422,9 +495,11 @@ def site_association(*sites, **kwassociations):
 class AliasNodes(object):  # pylint: disable=too-few-public-methods
     """An AliasNodes class
 
+    Alias is allocated when added to an experiment, if not given.
+
     >>> AliasNodes(5, 'grenoble', 'm3:at86rf231', False)
-    AliasNodes(5, 'grenoble', 'm3:at86rf231', False, _alias='1')
-    >>> save = AliasNodes(2, 'strasbourg', 'wsn430:cc1101', True)
+    AliasNodes(5, 'grenoble', 'm3:at86rf231', False, _alias=None)
+    >>> save = AliasNodes(2, 'strasbourg', 'wsn430:cc1101', True, _alias=2)
     >>> save
     AliasNodes(2, 'strasbourg', 'wsn430:cc1101', True, _alias='2')
 
@@ -432,7 +507,6 @@ class AliasNodes(object):  # pylint: disable=too-few-public-methods
     True
 
     """
-    _alias = 0  # static count of current alias number
 
     def __init__(self, nbnodes, site, archi, mobile=False, _alias=None):
         """
@@ -446,7 +520,7 @@ class AliasNodes(object):  # pylint: disable=too-few-public-methods
             }
         }
         """
-        self.alias = self._alias_uid(_alias)
+        self.alias = None if _alias is None else str(_alias)
         self.nbnodes = nbnodes
         self.properties = {
             "archi": archi,
@@ -454,16 +528,16 @@ class AliasNodes(object):  # pylint: disable=too-few-public-methods
             "mobile": mobile,
         }
 
-    @classmethod
-    def _alias_uid(cls, alias=None):
-        """Return an unique uid string.
+    def to_json_obj(self):
+        """Return alias nodes json dict."""
+        return {'alias': self.alias, 'nbnodes': self.nbnodes,
+                'properties': dict(self.properties)}
 
-        if alias is given, return it as a String
-        """
-        if alias is None:
-            cls._alias += 1
-            alias = cls._alias
-        return str(alias)
+    def with_alias(self, alias):
+        """Return a copy of these alias nodes with `alias`."""
+        return AliasNodes(self.nbnodes, self.properties['site'],
+                          self.properties['archi'], self.properties['mobile'],
+                          _alias=alias)
 
     def __repr__(self):  # pragma: no cover
         return 'AliasNodes(%r, %r, %r, %r, _alias=%r)' % (
@@ -571,8 +645,8 @@ class _Experiment(object):  # pylint:disable=too-many-instance-attributes
         self._set_type(resources['type'])
 
         # register nodes in experiment
-        nodes = resources['nodes']
-        self._register_nodes(nodes)  # pylint:disable=not-callable
+        nodes = self._register_nodes(  # pylint:disable=not-callable
+            resources['nodes'])
         nodes = self._nodes_to_assoc(nodes)
 
         # register firmware
@@ -623,11 +697,25 @@ class _Experiment(object):  # pylint:disable=too-many-instance-attributes
         # Keep unique values and sorted
         self.nodes = sorted(list(set(self.nodes)),
                             key=helpers.node_url_sort_key)
+        return nodes_list
 
     def set_alias_nodes(self, alias_nodes):
-        """Set alias nodes list """
+        """Set alias nodes list
+
+        Alias nodes without alias are copied with the next free alias of
+        this experiment, so they can be shared between experiments.
+        """
         self._set_type('alias')
+        if alias_nodes.alias is None:
+            alias_nodes = alias_nodes.with_alias(self._next_alias())
         self.nodes.append(alias_nodes)
+        return alias_nodes
+
+    def _next_alias(self):
+        """Return first alias number not used in experiment, from 1."""
+        used = set(getattr(nodes, 'alias', None) for nodes in self.nodes)
+        return next(str(num) for num in itertools.count(1)
+                    if str(num) not in used)
 
     @property
     def _register_nodes(self):
@@ -638,6 +726,10 @@ class _Experiment(object):  # pylint:disable=too-many-instance-attributes
         }
         return _register_fct_dict[self.type]
 
+    def to_json_obj(self):
+        """Return experiment description as plain json dicts and lists."""
+        return helpers.to_json_obj(self.__dict__)
+
     def filenames(self):
         """Extract list of filenames required."""
         # No need to check nodes associations if there is only 'firmware'
@@ -24,8 +24,15 @@
 import sys
 import os
 import json
+import time
+import types
+import functools
 import itertools
 import warnings
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+
+from iotlabcli import cache
 
 OAR_STATES = ["Waiting", "toLaunch", "Launching",
               "Running",
@@ -37,6 +44,13 @@ DEPRECATION_MESSAGE = ("{old_cmd} command is deprecated and will be removed "
                        "in next release. Please \033[1muse {new_cmd} "
                        "instead\033[0m.\n\n")
 
+# Current experiment id per user and states, skips a request on hot paths
+CURRENT_EXPERIMENT_CACHE = cache.DiskCache('current_experiment', ttl=30)
+
+# Experiment nodes lists, they do not change once nodes are allocated
+EXPERIMENT_NODES_CACHE = cache.DiskCache('experiment_nodes')
+_EXPERIMENT_NODES = {}
+
 
 def get_current_experiment(api, experiment_id=None, running_only=True):
     """ Return the given experiment or get the currently running one.
@@ -52,13 +66,75 @@ def get_current_experiment(api, experiment_id=None, running_only=True):
         # or experiment that are starting (from waiting to Running')
         states = ACTIVE_STATES
 
-    exp_by_states = exps_by_states_dict(api, states)
+    return _cached_current_exp(api, states)
+
+
+def _cached_current_exp(api, states):
+    """ Return current experiment in `states` from cache or from server """
+    key = _current_experiment_key(api)
+    cached = CURRENT_EXPERIMENT_CACHE.get(key, {}) if key else {}
+    states_str = ','.join(states)
+    if states_str in cached:
+        return cached[states_str]
 
+    exp_by_states = exps_by_states_dict(api, states)
     exp_id = get_current_exp(exp_by_states, states)
 
+    if key:
+        cached[states_str] = exp_id
+        CURRENT_EXPERIMENT_CACHE.set(key, cached)
     return exp_id
 
 
+def _current_experiment_key(api):
+    """ Return api user cache key, None if api has no username """
+    username = getattr(getattr(api, 'auth', None), 'username', None)
+    if not isinstance(username, (type(u''), str)):
+        return None
+    return '%s@%s' % (username, api.url)
+
+
+def forget_current_experiment(api):
+    """ Invalidate api user cached current experiment
+
+    Called when experiments are submitted or stopped, or when a request
+    on an experiment fails.
+    """
+    key = _current_experiment_key(api)
+    if key:
+        CURRENT_EXPERIMENT_CACHE.delete(key)
+
+
+def experiment_nodes(api, exp_id):
+    """ Return experiment nodes list, from memory, disk cache or server
+
+    Only lists where all nodes are allocated are cached.
+    """
+    key = '%s:%s' % (api.url, exp_id)
+    try:
+        return _EXPERIMENT_NODES[key]
+    except KeyError:
+        pass
+
+    nodes = EXPERIMENT_NODES_CACHE.get(key) or _experiment_nodes(api, exp_id)
+    if nodes and all(nodes):
+        _EXPERIMENT_NODES[key] = EXPERIMENT_NODES_CACHE.set(key, nodes)
+    return nodes
+
+
+def _experiment_nodes(api, exp_id):
+    """ Get experiment nodes list from server """
+    exp_resources = api.get_experiment_info(exp_id, 'resources')
+    return [res["network_address"] for res in exp_resources["items"]]
+
+
+def forget_experiment_nodes(api, exp_id):
+    """ Remove experiment nodes list from cache, when it is terminated """
+    key = '%s:%s' % (api.url, exp_id)
+    _EXPERIMENT_NODES.pop(key, None)
+    EXPERIMENT_NODES_CACHE.delete(key)
+
+
 def exps_by_states_dict(api, states):
     """ Return current experiment in `states` as a per state dict """
 
@@ -245,13 +321,106 @@ def check_experiment_state(state_str=None):
     return state_str
 
 
+class _Encoder(json.JSONEncoder):  # pylint: disable=too-few-public-methods
+    """ Encoder for serialization object python to JSON format """
+    def default(self, o):  # pylint: disable=method-hidden
+        if hasattr(o, 'to_json_obj'):
+            return o.to_json_obj()
+        return o.__dict__
+
+
+_COMPACT_ENCODER = _Encoder(sort_keys=True, separators=(',', ':'))
+_INDENT_ENCODER = _Encoder(sort_keys=True, indent=4)
+
+# Plain data sample checking an optional json backend output
+_JSON_SAMPLE = {'a': [1, -2, 0.5, None, True, False, {}, []],
+                'b': {'c': u'\u00e9"\\/\n'}, 'd': {'e': []}}
+
+
+def _fast_dumps_function():
+    """ Return optional 'ujson' dumps, if it gives 'json_dumps' output """
+    try:
+        import ujson  # pylint:disable=import-error
+    except ImportError:
+        return None
+    dumps = functools.partial(ujson.dumps, sort_keys=True, indent=4,
+                              escape_forward_slashes=False)
+    return dumps if _same_dumps(dumps) else None
+
+
+def _same_dumps(dumps):
+    """ Return if `dumps` gives the same output as `json_dumps` """
+    try:
+        return dumps(_JSON_SAMPLE) == _INDENT_ENCODER.encode(_JSON_SAMPLE)
+    except (TypeError, ValueError):
+        return False
+
+
+_FAST_DUMPS = _fast_dumps_function()
+
+
+def to_json_obj(obj):
+    """ Return `obj` with objects replaced by their 'to_json_obj()' value
+
+    >>> to_json_obj({'a': (1, 2), 'b': [{'c': None}]})
+    {'a': [1, 2], 'b': [{'c': None}]}
+    """
+    if hasattr(obj, 'to_json_obj'):
+        return obj.to_json_obj()
+    if isinstance(obj, dict):
+        return dict((key, to_json_obj(value)) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return [to_json_obj(value) for value in obj]
+    return obj
+
+
 def json_dumps(obj):
-    """ Dumps data to json """
-    class _Encoder(json.JSONEncoder):  # pylint: disable=too-few-public-methods
-        """ Encoder for serialization object python to JSON format """
-        def default(self, o):  # pylint: disable=method-hidden
-            return o.__dict__
-    return json.dumps(obj, cls=_Encoder, sort_keys=True, indent=4)
+    """ Dumps data to json
+
+    Objects with a 'to_json_obj' method are first converted to plain dicts
+    and lists, dumped by 'ujson' if installed.
+    """
+    if hasattr(obj, 'to_json_obj'):
+        return (_FAST_DUMPS or _INDENT_ENCODER.encode)(obj.to_json_obj())
+    return _INDENT_ENCODER.encode(obj)
+
+
+def json_compact_chunks(obj):
+    """ Iterate over `obj` compact json dump chunks, ends with a newline.
+
+    >>> ''.join(json_compact_chunks({'b': [1, 2], 'a': None}))
+    '{"a":null,"b":[1,2]}\\n'
+    """
+    for chunk in _COMPACT_ENCODER.iterencode(obj):
+        yield chunk
+    yield '\n'
+
+
+# Results lists, or lists streamed as they are produced
+ITERABLES = (list, types.GeneratorType)
+
+
+def json_ndjson_chunks(obj):
+    """ Iterate over `obj` newline delimited json dump chunks.
+
+    Each element of an 'items' list or iterator, or of a list or iterator,
+    is dumped on its own line. Other objects are dumped on one line.
+
+    >>> print(''.join(json_ndjson_chunks({'items': [{'id': 1}, {'id': 2}]})))
+    {"id":1}
+    {"id":2}
+    <BLANKLINE>
+    >>> ''.join(json_ndjson_chunks({'id': 1}))
+    '{"id":1}\\n'
+    """
+    if isinstance(obj, dict) and isinstance(obj.get('items'), ITERABLES):
+        obj = obj['items']
+    if not isinstance(obj, ITERABLES):
+        obj = [obj]
+
+    for item in obj:
+        yield _COMPACT_ENCODER.encode(item)
+        yield '\n'
 
 
 def flatten_list_list(list_list):
@@ -263,6 +432,137 @@ def flatten_list_list(list_list):
     return list(itertools.chain.from_iterable(list_list))
 
 
+def merge_results(results, errors):
+    """Merge parallel_map results {key: {result_key: [values]}}.
+
+    Values lists are concatenated in keys order, errors are kept by key.
+
+    >>> merge_results({'lille': {'0': ['lille']},
+    ...                'grenoble': {'0': ['grenoble']}}, {})
+    {'0': ['grenoble', 'lille']}
+
+    >>> merge_results({'lille': {'0': ['lille']}},
+    ...               {'grenoble': 'Timeout reached'})
+    {'0': ['lille'], 'errors': {'grenoble': 'Timeout reached'}}
+    """
+    merged = {}
+    for key in sorted(results):
+        for result_key, values in results[key].items():
+            merged.setdefault(result_key, []).extend(values)
+    if errors:
+        merged['errors'] = errors
+    return merged
+
+
+def parallel_map(function, args_dict, timeout=None, workers=None):
+    """Run `function(*args)` concurrently for each `args` in `args_dict`.
+
+    Each call is given at most `timeout` seconds from dispatch, failing calls
+    do not prevent getting the other results.
+
+    :param function: function to call
+    :param args_dict: {key: args_tuple} dict
+    :param timeout: max time in seconds for each call, None for no timeout
+    :param workers: max number of concurrent calls, default one per key
+    :returns: ({key: result}, {key: error_message}) tuple
+
+    >>> parallel_map(lambda x: 1 / x, {'a': (1,), 'b': (0,)})
+    ...  # doctest: +ELLIPSIS
+    ({'a': 1...}, {'b': '...'})
+    """
+    if not args_dict:
+        return {}, {}
+
+    pool = ThreadPool(workers or len(args_dict))
+    try:
+        async_results = {key: pool.apply_async(function, args)
+                         for key, args in args_dict.items()}
+        deadline = time.time() + (timeout or float('+inf'))
+        return _async_results_get(async_results, deadline)
+    finally:
+        pool.terminate()
+
+
+def _async_results_get(async_results, deadline):
+    """Get `async_results` values before `deadline`.
+
+    :returns: ({key: result}, {key: error_message}) tuple
+    """
+    results, errors = {}, {}
+    for key, async_res in async_results.items():
+        try:
+            results[key] = async_res.get(_remaining_time(deadline))
+        except Exception as err:  # pylint:disable=broad-except
+            errors[key] = error_message(err)
+    return results, errors
+
+
+def error_message(err):
+    """Return a one line error message for `err`.
+
+    >>> error_message(ValueError('Invalid value'))
+    'ValueError: Invalid value'
+    >>> error_message(multiprocessing.TimeoutError())
+    'Timeout reached'
+    """
+    if isinstance(err, multiprocessing.TimeoutError):
+        return 'Timeout reached'
+    return '{0}: {1!s}'.format(type(err).__name__, err)
+
+
+def _remaining_time(deadline):
+    """Return time until `deadline`, None if there is no deadline.
+
+    >>> _remaining_time(float('+inf')) is None
+    True
+    >>> _remaining_time(0)
+    0
+    """
+    if deadline == float('+inf'):
+        return None
+    return max(0, deadline - time.time())
+
+
+def iter_pages(get_page, page_size, offset=0, prefetch=True):
+    """Iterate on the items of pages returned by `get_page(offset)`.
+
+    Pages are requested until one has less than `page_size` items.
+    With `prefetch`, the next page is requested in background while the
+    current one is consumed.
+
+    >>> items = list(range(7))
+    >>> list(iter_pages(lambda off: items[off:off + 3], 3))
+    [0, 1, 2, 3, 4, 5, 6]
+    >>> list(iter_pages(lambda off: items[off:off + 3], 3, 2, False))
+    [2, 3, 4, 5, 6]
+    """
+    pool = ThreadPool(1) if prefetch else None
+    try:
+        next_page = _page_getter(pool, get_page, offset)
+        while next_page is not None:
+            page = next_page()
+            offset += page_size
+            next_page = (_page_getter(pool, get_page, offset)
+                         if page_size and len(page) == page_size else None)
+            for item in page:
+                yield item
+    finally:
+        _terminate(pool)
+
+
+def _page_getter(pool, get_page, offset):
+    """Return a function returning `offset` page, run in pool if given."""
+    if pool is None:
+        return lambda: get_page(offset)
+    return pool.apply_async(get_page, (offset,)).get
+
+
+def _terminate(pool):
+    """Terminate pool if not None."""
+    if pool is not None:
+        pool.terminate()
+
+
 def deprecate_cmd(cmd_func, old_cmd, new_cmd):
     """Display a deprecation warning message and run command."""
     warnings.simplefilter('always', DeprecationWarning)
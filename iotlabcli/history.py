@@ -0,0 +1,154 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Local history of user experiments
+
+Experiments returned by `Api.get_experiments` are stored in a SQLite
+database in cache.CACHE_DIR, experiments list queries are then served
+locally.
+
+Synchronization is incremental: experiments are listed newest first and
+pages are downloaded until reaching the oldest experiment that may still
+change, older experiments are Terminated or in Error and stay the same.
+"""
+
+import os
+import json
+
+from iotlabcli import cache
+from iotlabcli import helpers
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiments (
+    user TEXT, id INTEGER, state TEXT, experiment TEXT,
+    PRIMARY KEY (user, id));
+CREATE INDEX IF NOT EXISTS experiments_state ON experiments (user, state);
+"""
+
+FINAL_STATES = ('Terminated', 'Error')
+
+
+class ExperimentsHistory(object):
+    """ SQLite store of user experiments
+
+    :param path: database path, default 'experiments.sqlite' in CACHE_DIR
+    :param page_size: number of experiments downloaded per request
+    :param prefetch: download next page while writing the current one
+    """
+
+    def __init__(self, path=None, page_size=100, prefetch=True):
+        self._path = path
+        self.page_size = page_size
+        self.prefetch = prefetch
+
+    @property
+    def path(self):
+        """ Database path, CACHE_DIR is read at each call """
+        return self._path or os.path.join(cache.CACHE_DIR,
+                                          'experiments.sqlite')
+
+    def _connection(self):
+        """ Connection with schema created, committed on success """
+        return cache.sqlite_connection(self.path, _SCHEMA)
+
+    def experiments(self, api, state=None, limit=0, offset=0):
+        """ Return user experiments list, history is synchronized first
+
+        Same arguments and result as `Api.get_experiments`.
+        """
+        self.sync(api)
+        return {'items': self.query(api.auth.username, state, limit, offset)}
+
+    def query(self, user, state=None, limit=0, offset=0):
+        """ Return stored `user` experiments, newest first
+
+        :param state: comma separated states, all states if None
+        :param limit: maximum number of experiments, 0 for no limit
+        """
+        states = helpers.check_experiment_state(state).split(',')
+        query = ('SELECT experiment FROM experiments WHERE user = ? '
+                 'AND state IN (%s) ORDER BY id DESC LIMIT ? OFFSET ?' %
+                 ','.join('?' * len(states)))
+        params = [user] + states + [limit or -1, offset]
+        with self._connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def sync(self, api):
+        """ Download experiments newer than the last unchanging one
+
+        :returns: number of written experiments
+        """
+        user = api.auth.username
+        states = helpers.check_experiment_state()
+        with self._connection() as conn:
+            last_id = _last_final_id(conn, user)
+            # experiments are listed newest first
+            experiments = api.iter_experiments(states, self.page_size,
+                                               prefetch=self.prefetch)
+            return _update(conn, user, _until(experiments, last_id))
+
+
+def _last_final_id(conn, user):
+    """ Return id from which older experiments do not change
+
+    It is the oldest experiment not yet in a final state, or the newest
+    experiment if all are in a final state. None if history is empty.
+    """
+    query = ('SELECT MIN(id) FROM experiments WHERE user = ? '
+             'AND state NOT IN (?, ?)')
+    not_final = conn.execute(query, (user,) + FINAL_STATES).fetchone()[0]
+    if not_final is not None:
+        return not_final
+    query = 'SELECT MAX(id) FROM experiments WHERE user = ?'
+    return conn.execute(query, (user,)).fetchone()[0]
+
+
+def _until(experiments, last_id):
+    """ Iterate on experiments until older than `last_id`
+
+    Iteration only stops on decreasing ids, as experiments are listed newest
+    first, experiments listed in another order are all iterated.
+
+    >>> exps = [{'id': 5}, {'id': 4}, {'id': 3}, {'id': 2}]
+    >>> [exp['id'] for exp in _until(exps, 4)]
+    [5, 4]
+    >>> [exp['id'] for exp in _until(exps[::-1], 4)]
+    [2, 3, 4, 5]
+    >>> [exp['id'] for exp in _until(exps, None)]
+    [5, 4, 3, 2]
+    """
+    previous_id = None
+    for exp in experiments:
+        if None not in (last_id, previous_id) and \
+                exp['id'] < min(last_id, previous_id):
+            return
+        yield exp
+        previous_id = exp['id']
+
+
+def _update(conn, user, experiments):
+    """ Write experiments as they are iterated, returns their number """
+    rows = ((user, exp['id'], exp['state'], json.dumps(exp, sort_keys=True))
+            for exp in experiments)
+    return conn.executemany(
+        'INSERT OR REPLACE INTO experiments VALUES (?, ?, ?, ?)',
+        rows).rowcount
@@ -0,0 +1,319 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Batch parser, run iotlab-* commands read as json lines """
+
+import sys
+import json
+import time
+import argparse
+from multiprocessing.dummy import Queue
+from multiprocessing.pool import ThreadPool
+
+from iotlabcli import auth
+from iotlabcli import rest
+from iotlabcli import helpers
+from iotlabcli.parser import common
+import iotlabcli.parser.admin
+import iotlabcli.parser.experiment
+import iotlabcli.parser.node
+import iotlabcli.parser.profile
+import iotlabcli.parser.robot
+
+BATCH_PARSER = """
+
+iotlab-batch runs operations read as json lines, one per line:
+
+    {"id": "reset", "command": "node", "args": ["--reset"], "after": [...]}
+
+'command' is an iotlab-<command> name or 'sleep', 'args' its arguments.
+Each operation is started as soon as its 'after' dependencies succeeded,
+independent operations are run concurrently.
+One {"id": ..., "result": ...} or {"id": ..., "error": ...} line is
+written per operation, in completion order.
+
+Credentials and the running experiment are resolved once for all the
+operations.
+
+"""
+
+BATCH_EPILOG = """
+Examples:
+    * flash then reset nodes, and get the experiment meanwhile
+        $ cat ops.ndjson
+        {"id": "flash", "command": "node", "args": ["--flash", "fw.elf"]}
+        {"id": "reset", "command": "node", "args": ["--reset"],
+         "after": ["flash"]}
+        {"id": "exp", "command": "experiment", "args": ["get", "-p"]}
+        $ iotlab-batch < ops.ndjson
+"""
+
+
+def sleep_parse_options():
+    """ Handle 'sleep' operation options with argparse """
+    parser = argparse.ArgumentParser(prog='sleep')
+    parser.add_argument('seconds', type=float)
+    return parser
+
+
+def sleep_parse_and_run(opts):
+    """ Sleep during opts.seconds """
+    time.sleep(opts.seconds)
+    return {'sleep': opts.seconds}
+
+
+# command: (parse_options, parse_and_run)
+COMMANDS = {
+    'admin': (iotlabcli.parser.admin.parse_options,
+              iotlabcli.parser.admin.admin_parse_and_run),
+    'experiment': (iotlabcli.parser.experiment.parse_options,
+                   iotlabcli.parser.experiment.experiment_parse_and_run),
+    'node': (iotlabcli.parser.node.parse_options,
+             iotlabcli.parser.node.node_parse_and_run),
+    'profile': (iotlabcli.parser.profile.parse_options,
+                iotlabcli.parser.profile.profile_parse_and_run),
+    'robot': (iotlabcli.parser.robot.parse_options,
+              iotlabcli.parser.robot.robot_parse_and_run),
+    'sleep': (sleep_parse_options, sleep_parse_and_run),
+}
+
+
+def parse_options():
+    """ Handle iotlab-batch command-line options with argparse """
+    parent_parser = common.base_parser()
+    parser = argparse.ArgumentParser(
+        description=BATCH_PARSER, epilog=BATCH_EPILOG,
+        parents=[parent_parser],
+        formatter_class=argparse.RawTextHelpFormatter)
+    common.add_expid_arg(parser)
+    parser.add_argument('ops_file', nargs='?', default='-',
+                        type=argparse.FileType('r'),
+                        help='operations json lines file, default stdin')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='concurrent operations, default %(default)s')
+    parser.set_defaults(output='ndjson')
+    return parser
+
+
+class Operation(object):  # pylint:disable=too-few-public-methods
+    """ Batch operation, a parsed iotlab-<command> """
+
+    def __init__(self, op_id, command, args=(), after=()):
+        self.op_id = op_id
+        self.after = [str(dep) for dep in after]
+        try:
+            parse_options, self.function = COMMANDS[command]
+        except KeyError:
+            raise ValueError('Operation %r: unknown command %r' %
+                             (op_id, command))
+        self.opts = _parse_args(op_id, parse_options(), list(args))
+
+    @classmethod
+    def from_line(cls, line, num):
+        """ Create operation from json `line`, default id is line `num` """
+        try:
+            operation = json.loads(line)
+        except ValueError as err:
+            raise ValueError('Line %u: invalid json: %s' % (num, err))
+        if not isinstance(operation, dict):
+            raise ValueError('Line %u: operation is not a json object' % num)
+        return cls(str(operation.get('id', num)),
+                   operation.get('command'), operation.get('args', ()),
+                   operation.get('after', ()))
+
+    def __call__(self):
+        return self.function(self.opts)
+
+
+def _parse_args(op_id, parser, args):
+    """ Parse operation args, argparse errors are raised as ValueError """
+    try:
+        return parser.parse_args(args)
+    except SystemExit:
+        raise ValueError('Operation %r: invalid arguments %r' % (op_id, args))
+
+
+def read_operations(ops_file):
+    """ Return operations read from json lines `ops_file`
+
+    Empty lines and lines starting with '#' are ignored, operations without
+    'id' are identified by their line number.
+    """
+    operations = []
+    for num, line in enumerate(ops_file, 1):
+        if line.strip() and not line.lstrip().startswith('#'):
+            operations.append(Operation.from_line(line, num))
+    _check_ids(operations)
+    _check_cycles(operations)
+    return operations
+
+
+def _check_ids(operations):
+    """ Check operations ids are unique and dependencies exist """
+    ids = [op.op_id for op in operations]
+    duplicates = sorted(set(i for i in ids if ids.count(i) > 1))
+    if duplicates:
+        raise ValueError('Duplicated operations ids %r' % duplicates)
+    unknown = sorted(set(d for op in operations for d in op.after) - set(ids))
+    if unknown:
+        raise ValueError('Unknown operations dependencies %r' % unknown)
+
+
+def _check_cycles(operations):
+    """ Check operations can all be run in dependencies order
+
+    :raises ValueError: on circular dependencies
+    """
+    done = set()
+    remaining = list(operations)
+    while remaining:
+        ready = [op for op in remaining if done.issuperset(op.after)]
+        if not ready:
+            raise ValueError('Circular dependencies between operations %r' %
+                             [op.op_id for op in remaining])
+        done.update(op.op_id for op in ready)
+        remaining = [op for op in remaining if op not in ready]
+
+
+def set_common_options(operations, username=None, password=None,
+                       experiment_id=None):
+    """ Resolve credentials and current experiment once for all operations
+
+    If no experiment is running, operations still resolve it themselves,
+    it may have been started by a previous operation.
+    """
+    username, password = auth.get_user_credentials(username, password)
+    if experiment_id is None and _need_experiment_id(operations):
+        experiment_id = _running_experiment_id(rest.Api(username, password))
+
+    for operation in operations:
+        operation.opts.username = username
+        operation.opts.password = password
+        if getattr(operation.opts, 'experiment_id', 0) is None:
+            operation.opts.experiment_id = experiment_id
+
+
+def _need_experiment_id(operations):
+    """ Return if an operation uses current experiment """
+    return any(getattr(op.opts, 'experiment_id', 0) is None
+               for op in operations)
+
+
+def _running_experiment_id(api):
+    """ Return running experiment id or None """
+    try:
+        return helpers.get_current_experiment(api, None)
+    except ValueError:
+        return None
+
+
+def run_operations(operations, workers=None):
+    """ Run operations and iterate on their result or error dict
+
+    Operations with a failed dependency are not run.
+    """
+    return Scheduler(operations, workers).results()
+
+
+class Scheduler(object):
+    """ Start each operation as soon as its own dependencies succeeded
+
+    Results are given in completion order.
+    """
+
+    def __init__(self, operations, workers=None):
+        self.pending = list(operations)
+        self.succeeded = set()
+        self.failed = set()
+        self.running = 0
+        self.done = Queue()
+        self.pool = ThreadPool(workers or max(len(self.pending), 1))
+
+    def results(self):
+        """ Iterate on operations result or error dict """
+        try:
+            for result in self._results():
+                yield result
+        finally:
+            self.pool.terminate()
+
+    def _results(self):
+        self._start_ready()
+        while self.running:
+            result = self.done.get()
+            self.running -= 1
+            if 'result' in result:
+                self.succeeded.add(result['id'])
+            else:
+                self.failed.add(result['id'])
+            self._start_ready()
+            yield result
+            for skipped in self._skip_blocked():
+                yield skipped
+
+    def _start_ready(self):
+        """ Start operations whose dependencies all succeeded """
+        ready = self._pop(lambda op: self.succeeded.issuperset(op.after))
+        for operation in ready:
+            self.running += 1
+            self.pool.apply_async(_operation_result, (operation,),
+                                  callback=self.done.put)
+
+    def _skip_blocked(self):
+        """ Return error dicts of operations with a failed dependency """
+        skipped = []
+        blocked = self._pop(lambda op: self.failed.intersection(op.after))
+        while blocked:
+            self.failed.update(op.op_id for op in blocked)
+            skipped.extend({'id': op.op_id, 'error': 'Dependency failed'}
+                           for op in blocked)
+            blocked = self._pop(lambda op: self.failed.intersection(op.after))
+        return skipped
+
+    def _pop(self, predicate):
+        """ Remove and return pending operations matching `predicate` """
+        matching = [op for op in self.pending if predicate(op)]
+        self.pending = [op for op in self.pending if op not in matching]
+        return matching
+
+
+def _operation_result(operation):
+    """ Run operation and return its fully read result, or error dict """
+    try:
+        return {'id': operation.op_id,
+                'result': common.materialized(operation())}
+    except (Exception, SystemExit) as err:  # pylint:disable=broad-except
+        return {'id': operation.op_id, 'error': helpers.error_message(err)}
+
+
+def batch_parse_and_run(opts):
+    """ Parse namespace 'opts' object and run operations """
+    operations = read_operations(opts.ops_file)
+    set_common_options(operations, opts.username, opts.password,
+                       opts.experiment_id)
+    return run_operations(operations, opts.workers)
+
+
+def main(args=None):
+    """ 'iotlab-batch' main function """
+    args = args or sys.argv[1:]
+    parser = parse_options()
+    common.main_cli(batch_parse_and_run, parser, args)
@@ -24,7 +24,9 @@
 from __future__ import print_function
 import sys
 import errno
+import types
 import argparse
+import warnings
 import contextlib
 from collections import OrderedDict
 
@@ -41,9 +43,15 @@ import jmespath
 import iotlabcli
 from iotlabcli import helpers
 from iotlabcli import rest
+from iotlabcli import spatial
+from iotlabcli.parser import formatters
 
 DOMAIN_DNS = 'iot-lab.info'
 
+# Compiled jmespath expressions by expression text, for this process only
+_JMESPATH_COMPILED = {}
+_JMESPATH_OPTIONS = jmespath.Options(dict_cls=OrderedDict)
+
 
 def base_parser(user_required=False):
     """ Base parser giving 'user' 'password' and 'version' arguments
@@ -69,13 +77,84 @@ def add_version(parser):
         '-v', '--version', action='version', version=iotlabcli.__version__)
 
 
+# Outputs written by chunks instead of formatting the whole result at once
+STREAM_OUTPUTS = {
+    'compact': helpers.json_compact_chunks,
+    'ndjson': helpers.json_ndjson_chunks,
+}
+OUTPUTS = ['json'] + sorted(STREAM_OUTPUTS)
+STREAM_FUNCTIONS = (set(STREAM_OUTPUTS.values()) |
+                    set(formatters.FORMATTERS.values()))
+# Functions also accepting an iterator on items
+ITERATOR_FUNCTIONS = (set([helpers.json_ndjson_chunks]) |
+                      set(formatters.FORMATTERS.values()))
+
+
+PYTHON_FORMAT_PREFIX = 'python:'
+FORMAT_DEPRECATION_MESSAGE = ("--format python expressions without 'python:' "
+                              "prefix are deprecated and will be removed in "
+                              "next release. Please \033[1muse --format "
+                              "'python:{fmt}' instead\033[0m.\n\n")
+
+
 def add_output_formatter(parser):
-    """ Add '--jmespath' argument """
+    """ Add '--jmespath', '--format' and '--output' arguments """
     group = parser.add_argument_group("Output Format")
-    group.add_argument('--jmespath', '--jp', type=jmespath.compile,
+    group.add_argument('--jmespath', '--jp', type=jmespath_compile,
                        help="Query output using `jmespath` syntax")
-    group.add_argument('--format', '--fmt', type=eval,
-                       help="Format function, default `helpers.json_dumps`")
+    group.add_argument('--jmespath-items', '--jpi', type=jmespath_compile,
+                       help=("Query each element of output 'items' list, "
+                             "null results are removed"))
+    group.add_argument('--format', '--fmt', type=format_function_from_str,
+                       help=("Formatter name in %s, or python format function "
+                             "prefixed with '%s', default "
+                             "`helpers.json_dumps`" %
+                             (sorted(formatters.FORMATTERS),
+                              PYTHON_FORMAT_PREFIX)))
+    # default resolved when printing, commands may choose their own default
+    group.add_argument('--output', choices=OUTPUTS,
+                       help=("json output: 'json' indented (default), "
+                             "'compact' on one line, 'ndjson' one line per "
+                             "'items' element"))
+
+
+def jmespath_compile(expression):
+    """ Compile jmespath expression, compiled expressions are memoized """
+    try:
+        return _JMESPATH_COMPILED[expression]
+    except KeyError:
+        compiled = _JMESPATH_COMPILED[expression] = jmespath.compile(
+            expression)
+        return compiled
+
+
+def format_function_from_str(format_str):
+    """ Return named formatter in `formatters.FORMATTERS`
+
+    Python expressions must be explicitly prefixed, like 'python:str',
+    expressions without prefix are deprecated.
+    """
+    try:
+        return formatters.FORMATTERS[format_str]
+    except KeyError:
+        pass
+    if not format_str.startswith(PYTHON_FORMAT_PREFIX):
+        warnings.simplefilter('always', DeprecationWarning)
+        warnings.warn(FORMAT_DEPRECATION_MESSAGE.format(fmt=format_str),
+                      DeprecationWarning, stacklevel=2)
+        format_str = PYTHON_FORMAT_PREFIX + format_str
+    return _eval_format(format_str[len(PYTHON_FORMAT_PREFIX):])
+
+
+def _eval_format(expression):
+    """ Return python format function `expression` value """
+    try:
+        return eval(expression)  # pylint:disable=eval-used
+    except Exception as err:  # pylint:disable=broad-except
+        raise argparse.ArgumentTypeError(
+            "invalid format %r, choose from %s or '%s<expression>': %s" %
+            (expression, sorted(formatters.FORMATTERS), PYTHON_FORMAT_PREFIX,
+             err))
 
 
 def add_expid_arg(parser, required=False):
@@ -115,26 +194,94 @@ class HelpAction(argparse.Action):
         parser.add_argument(name, action=action, nargs=0, help=description)
 
 
-def print_result(result, jmespath_expr=None, format_function=None):
-    """ Print result vule """
-    format_function = format_function or helpers.json_dumps
+def print_result(  # pylint:disable=too-many-arguments
+        result, jmespath_expr=None, format_function=None, output='json',
+        jmespath_items_expr=None):
+    """ Print result value
 
-    # Query using jmespath
-    if jmespath_expr is not None:
-        keep_dict_order = jmespath.Options(dict_cls=OrderedDict)
-        result = jmespath_expr.search(result, keep_dict_order)
-
-    # Format output
-    formatted = format_function(result)
+    :param output: json output in OUTPUTS, ignored if format_function given
+    :param jmespath_items_expr: jmespath applied on each 'items' element,
+        items are queried while being printed by ITERATOR_FUNCTIONS
+    """
+    result = jmespath_search(result, jmespath_expr)
+    result = jmespath_search_items(result, jmespath_items_expr)
 
     try:
-        print(formatted)
+        _print_formatted(result, format_function, output)
     except IOError as err:
         # Ignore BrokenPipe
         if err.errno != errno.EPIPE:
             raise err
 
 
+def jmespath_search(result, jmespath_expr=None):
+    """ Query result using jmespath, return result as is if no expression """
+    if jmespath_expr is None:
+        return result
+    return jmespath_expr.search(materialized(result), _JMESPATH_OPTIONS)
+
+
+def jmespath_search_items(result, jmespath_expr=None):
+    """ Lazily query each element of result 'items', or of result list
+
+    Return an iterator on non null query results, or result as is if no
+    expression.
+    """
+    if jmespath_expr is None:
+        return result
+    items = formatters.items_list(result)
+    return _jmespath_search_iter(items, jmespath_expr)
+
+
+def _jmespath_search_iter(items, jmespath_expr):
+    """ Iterate on non null `jmespath_expr` results on items """
+    for item in items:
+        value = jmespath_expr.search(item, _JMESPATH_OPTIONS)
+        if value is not None:
+            yield value
+
+
+def _print_formatted(result, format_function=None, output='json'):
+    """ Format and print result, streamed for STREAM_FUNCTIONS """
+    format_function = (format_function or
+                       STREAM_OUTPUTS.get(output, helpers.json_dumps))
+    if format_function not in ITERATOR_FUNCTIONS:
+        result = materialized(result)
+
+    if format_function in STREAM_FUNCTIONS:
+        _write_chunks(format_function(result),
+                      isinstance(result, types.GeneratorType))
+    else:
+        print(format_function(result))
+
+
+def materialized(result):
+    """ Return result with iterator, or 'items' iterator, converted to list
+
+    >>> materialized({'items': (i for i in range(2))})
+    {'items': [0, 1]}
+    """
+    if isinstance(result, types.GeneratorType):
+        return list(result)
+    if isinstance(result, dict) and isinstance(result.get('items'),
+                                               types.GeneratorType):
+        return dict(result, items=list(result['items']))
+    return result
+
+
+def _write_chunks(chunks, flush_lines=False):
+    """ Write chunks to stdout as they are generated
+
+    With `flush_lines`, each line is flushed when written, for iterators
+    slowly producing their items.
+    """
+    for chunk in chunks:
+        sys.stdout.write(chunk)
+        if flush_lines and chunk == '\n':
+            sys.stdout.flush()
+    sys.stdout.flush()
+
+
 @contextlib.contextmanager
 def catch_missing_auth_cli():
     """Catch HTTPError 401 and display a message on missing iotlab-auth."""
@@ -157,6 +304,11 @@ def main_cli(function, parser, args=None):  # flake8: noqa
         with catch_missing_auth_cli():
             parser_opts = parser.parse_args(args)
             result = function(parser_opts)
+            # lazy results still run requests while being printed
+            print_result(result, parser_opts.jmespath, parser_opts.format,
+                         parser_opts.output or 'json',
+                         parser_opts.jmespath_items)
+            return
     except HTTPError as err:  # should be first as it's an IOError
         print(err, file=sys.stderr)
 
@@ -167,9 +319,6 @@ def main_cli(function, parser, args=None):  # flake8: noqa
 
     except KeyboardInterrupt:  # pragma: no cover
         print("\nStopped.", file=sys.stderr)
-    else:
-        print_result(result, parser_opts.jmespath, parser_opts.format)
-        return
     sys.exit(1)
 
 
@@ -219,7 +368,13 @@ def nodes_list_from_info(site, archi, nodes_str):
     >>> nodes_list_from_info('grenoble', 'wsn430', 'a-b')
     Traceback (most recent call last):
     ValueError: Invalid nodes list: a-b ([0-9+-])
+
+    Geometric queries are resolved later with `resolved_nodes`
+    >>> nodes_list_from_info('grenoble', 'm3', 'near=100:5')
+    SpatialSelection('grenoble', 'm3', 'near=100:5')
     """
+    if spatial.is_spatial_selection(nodes_str):
+        return spatial.SpatialSelection(site, archi, nodes_str)
 
     nodes_list = nodes_id_list(archi, nodes_str)
     fmt = "%s.{site}.{domain}".format(site=site, domain=DOMAIN_DNS)
@@ -311,11 +466,12 @@ def list_nodes(api, exp_id, nodes_ll=None, excl_nodes_ll=None):
 
     if nodes_ll is not None:
         # flatten lists into one
-        nodes = helpers.flatten_list_list(nodes_ll)
+        nodes = helpers.flatten_list_list(resolved_nodes(api, nodes_ll))
 
     elif excl_nodes_ll is not None:
         # flatten lists into one
-        excl_nodes = set(helpers.flatten_list_list(excl_nodes_ll))
+        excl_nodes = set(helpers.flatten_list_list(
+            resolved_nodes(api, excl_nodes_ll)))
 
         # remove exclude nodes from experiment nodes
         exp_nodes = set(_get_experiment_nodes_list(api, exp_id))
@@ -326,11 +482,14 @@ def list_nodes(api, exp_id, nodes_ll=None, excl_nodes_ll=None):
     return sorted(nodes, key=helpers.node_url_sort_key)
 
 
+def resolved_nodes(api, nodes_ll):
+    """ Return nodes lists with geometric selections resolved """
+    return [spatial.resolve_nodes(api, nodes) for nodes in nodes_ll]
+
+
 def _get_experiment_nodes_list(api, exp_id):
-    """ Get the nodes_list for given experiment"""
-    exp_resources = api.get_experiment_info(exp_id, 'resources')
-    exp_nodes = [res["network_address"] for res in exp_resources["items"]]
-    return exp_nodes
+    """ Get the nodes_list for given experiment, cached """
+    return helpers.experiment_nodes(api, exp_id)
 
 
 def nodes_list_from_str(nodes_list_str):
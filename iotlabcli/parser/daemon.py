@@ -0,0 +1,340 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Daemon running iotlab-* commands in a persistent process
+
+'iotlab-daemon' keeps imported modules, credentials, caches and http
+connections between commands sent by 'iotlab-client' through a UNIX socket.
+
+Commands are run one at a time, their outputs are sent back while running.
+"""
+
+from __future__ import print_function
+import os
+import sys
+import json
+import errno
+import socket
+import argparse
+import traceback
+import contextlib
+
+try:  # pragma: no cover
+    # pylint: disable=import-error
+    import socketserver
+except ImportError:  # pragma: no cover
+    # pylint: disable=import-error
+    import SocketServer as socketserver
+
+import requests
+
+from iotlabcli import rest
+import iotlabcli.parser.admin
+import iotlabcli.parser.auth
+import iotlabcli.parser.experiment
+import iotlabcli.parser.node
+import iotlabcli.parser.profile
+import iotlabcli.parser.robot
+
+SOCKET_PATH = (os.getenv('IOTLAB_DAEMON_SOCKET') or
+               os.path.expanduser('~/.iotlab-daemon.sock'))
+
+# 'iotlab-<command>' main functions
+COMMANDS = {
+    'admin': iotlabcli.parser.admin.main,
+    'auth': iotlabcli.parser.auth.main,
+    'experiment': iotlabcli.parser.experiment.main,
+    'node': iotlabcli.parser.node.main,
+    'profile': iotlabcli.parser.profile.main,
+    'robot': iotlabcli.parser.robot.main,
+}
+
+DAEMON_PARSER = """
+
+iotlab-daemon runs iotlab-* commands sent by iotlab-client.
+
+Credentials must be stored with iotlab-auth or given with both
+-u/--user and -p/--password as the daemon cannot prompt for them.
+
+"""
+
+DAEMON_EPILOG = """
+Examples:
+    * start the daemon
+        $ iotlab-daemon &
+    * run 'iotlab-node --reset' in the daemon
+        $ iotlab-client node --reset
+"""
+
+CLIENT_USAGE = """usage: iotlab-client {commands} [args...]
+
+Run 'iotlab-<command> [args...]' in iotlab-daemon listening on
+IOTLAB_DAEMON_SOCKET (default {socket}).
+Command is run by iotlab-client itself if the daemon is not running.
+"""
+
+
+def run_command(argv, cwd=None, stdout=None, stderr=None):
+    """ Run 'iotlab-<argv[0]>' with argv[1:] arguments
+
+    :param cwd: run command in `cwd` directory
+    :param stdout: file object replacing sys.stdout during command
+    :param stderr: file object replacing sys.stderr during command
+    :returns: command exit code
+    """
+    stderr = stderr or sys.stderr
+    main = COMMANDS.get((argv or [None])[0])
+    if main is None:
+        print('Unknown command {0!r}, should be in {1}'.format(
+            ' '.join(argv[:1]), sorted(COMMANDS)), file=stderr)
+        return 2
+
+    with _command_context(argv, cwd, stdout, stderr):
+        return _run_main(main, argv[1:])
+
+
+def _run_main(main, args):
+    """ Run main(args) and return its exit code """
+    try:
+        main(args)
+    except SystemExit as err:
+        return _exit_code(err.code)
+    except Exception:  # pylint:disable=broad-except
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+@contextlib.contextmanager
+def _command_context(argv, cwd=None, stdout=None, stderr=None):
+    """ Set process argv, working directory and outputs during command """
+    saved = (sys.argv, sys.stdout, sys.stderr, os.getcwd())
+    try:
+        sys.argv = ['iotlab-%s' % argv[0]] + list(argv[1:])
+        sys.stdout = stdout or sys.stdout
+        sys.stderr = stderr or sys.stderr
+        os.chdir(cwd or saved[3])
+        yield
+    finally:
+        sys.argv, sys.stdout, sys.stderr = saved[:3]
+        os.chdir(saved[3])
+
+
+def _exit_code(code):
+    """ Return process exit code for `sys.exit(code)`
+
+    >>> _exit_code(None), _exit_code(2)
+    (0, 2)
+    """
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+class _StreamWriter(object):  # pylint:disable=too-few-public-methods
+    """ File object sending written data as {`name`: data} json lines """
+
+    def __init__(self, wfile, name):
+        self.wfile = wfile
+        self.name = name
+
+    def write(self, data):
+        """ Send data to client """
+        _send_json(self.wfile, {self.name: data})
+
+    def flush(self):
+        """ Flush socket file """
+        self.wfile.flush()
+
+
+def _send_json(wfile, message):
+    """ Send message as one json line """
+    wfile.write((json.dumps(message) + '\n').encode('utf-8'))
+    wfile.flush()
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    """ Run the command received as {'argv': [...], 'cwd': path} json line
+
+    Outputs are sent as {'stdout': data} and {'stderr': data} json lines and
+    the command exit code as {'exit': code}.
+    """
+
+    def handle(self):
+        request = json.loads(self.rfile.readline().decode('utf-8'))
+        code = run_command(request['argv'], request.get('cwd'),
+                           _StreamWriter(self.wfile, 'stdout'),
+                           _StreamWriter(self.wfile, 'stderr'))
+        _send_json(self.wfile, {'exit': code})
+
+
+def make_server(socket_path=SOCKET_PATH):
+    """ Create daemon server listening on `socket_path`
+
+    Socket is only accessible by current user as commands use its
+    credentials. All requests share one http session.
+    """
+    _remove_stale_socket(socket_path)
+    rest.Api.session = rest.Api.default_session() or requests.Session()
+
+    umask = os.umask(0o077)
+    try:
+        return socketserver.UnixStreamServer(socket_path, CommandHandler)
+    finally:
+        os.umask(umask)
+
+
+def _remove_stale_socket(socket_path):
+    """ Remove `socket_path` if no daemon is listening on it
+
+    :raises RuntimeError: if a daemon is already running
+    """
+    if not os.path.exists(socket_path):
+        return
+    try:
+        _connect(socket_path).close()
+    except socket.error:
+        os.remove(socket_path)
+    else:
+        raise RuntimeError('iotlab-daemon already running on %s' %
+                           socket_path)
+
+
+def _connect(socket_path):
+    """ Return a socket connected to `socket_path` """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except socket.error:
+        sock.close()
+        raise
+    return sock
+
+
+def serve(socket_path=SOCKET_PATH):
+    """ Run daemon until interrupted """
+    server = make_server(socket_path)
+    sys.stderr.write('iotlab-daemon listening on %s\n' % socket_path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        sys.stderr.write('\nStopped.\n')
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+
+
+def client(argv, socket_path=SOCKET_PATH, stdout=None, stderr=None):
+    """ Run `argv` command in daemon and write its outputs
+
+    :raises socket.error: if daemon is not running or connection fails
+    :returns: command exit code
+    """
+    return _request(_connect(socket_path), argv, stdout, stderr)
+
+
+def _request(sock, argv, stdout=None, stderr=None):
+    """ Send `argv` command to daemon connected `sock` and write its outputs
+
+    `sock` is closed when done.
+    """
+    outputs = {'stdout': stdout or sys.stdout, 'stderr': stderr or sys.stderr}
+    try:
+        _send_json(sock.makefile('wb'), {'argv': argv, 'cwd': os.getcwd()})
+        return _read_outputs(sock.makefile('rb'), outputs)
+    finally:
+        sock.close()
+
+
+def _read_outputs(rfile, outputs):
+    """ Write received outputs until exit code message
+
+    :raises socket.error: if connection is closed before exit code
+    """
+    for line in rfile:
+        message = json.loads(line.decode('utf-8'))
+        if 'exit' in message:
+            return message['exit']
+        for name, data in message.items():
+            outputs[name].write(data)
+    raise socket.error(errno.ECONNRESET, 'iotlab-daemon connection closed')
+
+
+def parse_options():
+    """ Handle iotlab-daemon command-line options with argparse """
+    parser = argparse.ArgumentParser(
+        description=DAEMON_PARSER, epilog=DAEMON_EPILOG,
+        formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--socket', default=SOCKET_PATH,
+                        help='UNIX socket path, default %(default)s')
+    return parser
+
+
+def main(args=None):
+    """ 'iotlab-daemon' main function """
+    args = args or sys.argv[1:]
+    opts = parse_options().parse_args(args)
+    try:
+        serve(opts.socket)
+    except (RuntimeError, socket.error) as err:
+        print(err, file=sys.stderr)
+        sys.exit(1)
+
+
+def client_main(args=None):
+    """ 'iotlab-client' main function, returns exit code """
+    args = args or sys.argv[1:]
+    if not args or args[0] in ('-h', '--help'):
+        print(CLIENT_USAGE.format(commands='{%s}' % ','.join(sorted(COMMANDS)),
+                                  socket=SOCKET_PATH), end='')
+        return 0
+    try:
+        sock = _connect(SOCKET_PATH)
+    except socket.error as err:
+        return _daemon_unavailable(args, err)
+    return _client_exit_code(sock, args)
+
+
+# Connection errors meaning that no daemon is running
+NOT_RUNNING_ERRNOS = (errno.ENOENT, errno.ECONNREFUSED)
+
+
+def _daemon_unavailable(args, err):
+    """ Run command here if daemon is not running, else report `err` """
+    if err.errno in NOT_RUNNING_ERRNOS:
+        return run_command(args)
+    print('iotlab-client: %s' % err, file=sys.stderr)
+    return 1
+
+
+def _client_exit_code(sock, args):
+    """ Run command in daemon connected `sock`, exit code 1 on errors
+
+    Command may have been run, so it is never run again here.
+    """
+    try:
+        return _request(sock, args)
+    except (IOError, OSError) as err:
+        print('iotlab-client: %s' % err, file=sys.stderr)
+        return 1
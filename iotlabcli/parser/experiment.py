@@ -31,6 +31,7 @@ from iotlabcli import experiment
 from iotlabcli import helpers
 from iotlabcli import rest
 from iotlabcli import auth
+from iotlabcli import spatial
 from iotlabcli.parser import common, help_msgs
 
 EXPERIMENT_PARSER = """
@@ -109,6 +110,14 @@ def parse_options():
 
     get_parser.add_argument('--state', help='experiment list state filter')
 
+    get_parser.add_argument('--local', action='store_true', default=False,
+                            help=('experiment list from local history, '
+                                  'only new experiments are downloaded'))
+
+    get_parser.add_argument('--page-size', type=int, default=None,
+                            help=('experiment list requested PAGE_SIZE at a '
+                                  'time, streamed with --output ndjson'))
+
     get_group.add_argument('-e', '--experiments', dest='get_cmd',
                            action='store_const',
                            const='experiments',
@@ -160,6 +169,10 @@ def parse_options():
     info_parser.add_argument('--state', action='append', dest='info_selection',
                              type=lambda x: ('state', x),
                              help='resources list filter by state')
+    info_parser.add_argument('--index', action='store_true',
+                             dest='from_index',
+                             help=('query resources list from local index, '
+                                   'refreshed every minute'))
 
     # subcommand
     info_group = info_parser.add_mutually_exclusive_group(required=True)
@@ -268,6 +281,14 @@ def parser_add_script_subparser(subparsers):
     script_group.add_argument('--status', type=common.site_with_domain_checked,
                               metavar='site', dest='status_sites',
                               nargs='*', help='sites list')
+
+    per_site_group = _script_parser.add_argument_group("Per site execution")
+    per_site_group.add_argument(
+        '--per-site', action='store_true', default=False,
+        help='send one concurrent request per site and merge results')
+    per_site_group.add_argument(
+        '--site-timeout', type=float, default=None,
+        help='per-site: max time in seconds for each site request')
     return _script_parser
 
 
@@ -640,6 +661,9 @@ def submit_experiment_parser(opts):
     user, passwd = auth.get_user_credentials(opts.username, opts.password)
     api = rest.Api(user, passwd)
 
+    for resources in opts.nodes_list:
+        resources['nodes'] = spatial.resolve_nodes(api, resources['nodes'])
+
     return experiment.submit_experiment(api, opts.name, opts.duration,
                                         opts.nodes_list, opts.reservation,
                                         opts.print_json,
@@ -654,6 +678,10 @@ def script_parser(opts):
 
     command, options = _script_command_options(opts)
 
+    if opts.per_site:
+        return experiment.script_experiment_per_site(api, exp_id, command,
+                                                     options,
+                                                     opts.site_timeout)
     return experiment.script_experiment(api, exp_id, command, *options)
 
 
@@ -692,7 +720,8 @@ def get_experiment_parser(opts):
     # pylint:disable=no-else-return
     if opts.get_cmd == 'experiment_list':
         return experiment.get_experiments_list(api, opts.state, opts.limit,
-                                               opts.offset)
+                                               opts.offset, opts.local,
+                                               opts.page_size)
     elif opts.get_cmd == 'start':
         exp_id = helpers.get_current_experiment(api, opts.experiment_id,
                                                 running_only=False)
@@ -733,7 +762,8 @@ def info_experiment_parser(opts):
     api = rest.Api(user, passwd)
 
     selection = dict(opts.info_selection or ())
-    return experiment.info_experiment(api, opts.list_id, **selection)
+    return experiment.info_experiment(api, opts.list_id,
+                                      from_index=opts.from_index, **selection)
 
 
 def wait_experiment_parser(opts):
@@ -0,0 +1,267 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Named output formatters
+
+Formatters are selected by name with '--format' and return an iterator on
+output chunks, they do not build an intermediate json string.
+"""
+
+import json
+
+from iotlabcli import helpers
+
+FORMATTERS = {}
+
+
+def register(name):
+    """ Decorator adding formatter function to FORMATTERS as `name` """
+    def _register(function):
+        FORMATTERS[name] = function
+        return function
+    return _register
+
+
+def items_list(result):
+    """ Return the elements to format from result
+
+    Result 'items' list or iterator, result if it is a list or an iterator,
+    else the result as only element.
+
+    >>> items_list({'items': [1, 2]})
+    [1, 2]
+    >>> items_list([1, 2])
+    [1, 2]
+    >>> items_list({'id': 1})
+    [{'id': 1}]
+    """
+    if isinstance(result, dict) and isinstance(result.get('items'),
+                                               helpers.ITERABLES):
+        return result['items']
+    if isinstance(result, helpers.ITERABLES):
+        return result
+    return [result]
+
+
+def _field_str(value):
+    """ Return value as a string for a table cell
+
+    >>> _field_str('a8-1'), _field_str(None), _field_str(3)
+    ('a8-1', '', '3')
+    >>> _field_str({'site': 'grenoble'})
+    '{"site":"grenoble"}'
+    """
+    if value is None:
+        return ''
+    if isinstance(value, (type(u''), str)):
+        return value
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+
+def _rows(items):
+    """ Iterate on rows of string fields, first one is the header
+
+    Columns are the sorted keys of the first item, if items are not dicts
+    they are written in one 'value' column.
+
+    >>> list(_rows([{'b': 1, 'a': 'x'}, {'a': 'y'}]))
+    [['a', 'b'], ['x', '1'], ['y', '']]
+    >>> list(_rows(['a8-1', 'a8-2']))
+    [['value'], ['a8-1'], ['a8-2']]
+    >>> list(_rows([]))
+    []
+    """
+    items = iter(items)
+    try:
+        first = next(items)
+    except StopIteration:
+        return
+
+    columns = sorted(first) if isinstance(first, dict) else None
+    yield columns or ['value']
+    for item in _chain_first(first, items):
+        yield _row(item, columns)
+
+
+def _row(item, columns=None):
+    """ Return item `columns` values, or item as value if no columns """
+    if columns is None:
+        return [_field_str(item)]
+    return [_field_str(item.get(col)) for col in columns]
+
+
+def _chain_first(first, items):
+    """ Iterate on first then on items """
+    yield first
+    for item in items:
+        yield item
+
+
+def _delimited_field(field, delimiter):
+    """ Quote field if required
+
+    >>> _delimited_field('a8-1', ',')
+    'a8-1'
+    >>> print(_delimited_field('a,b', ','))
+    "a,b"
+    >>> print(_delimited_field('x"y', ','))
+    "x""y"
+    """
+    if delimiter in field or '"' in field or '\n' in field:
+        return '"%s"' % field.replace('"', '""')
+    return field
+
+
+def _delimited(result, delimiter):
+    """ Iterate on `delimiter` separated lines """
+    for row in _rows(items_list(result)):
+        yield delimiter.join(_delimited_field(f, delimiter) for f in row)
+        yield '\n'
+
+
+@register('csv')
+def csv_format(result):
+    """ Comma separated values, one line per item
+
+    >>> print(''.join(csv_format({'items': [{'id': 1, 'name': 'a,b'}]})))
+    id,name
+    1,"a,b"
+    <BLANKLINE>
+    """
+    return _delimited(result, ',')
+
+
+@register('tsv')
+def tsv_format(result):
+    """ Tab separated values, one line per item
+
+    >>> ''.join(tsv_format([{'id': 1, 'name': 'exp'}]))
+    'id\\tname\\n1\\texp\\n'
+    """
+    return _delimited(result, '\t')
+
+
+@register('table')
+def table_format(result):
+    """ Aligned columns table, one line per item
+
+    Columns width requires all the rows before writing.
+
+    >>> print(''.join(table_format([{'id': 1, 'name': 'exp'},
+    ...                             {'id': 123, 'name': None}])))
+    id   name
+    1    exp
+    123
+    <BLANKLINE>
+    """
+    rows = list(_rows(items_list(result)))
+    widths = [max(len(f) for f in col) for col in zip(*rows)]
+    for row in rows:
+        line = '  '.join(f.ljust(w) for f, w in zip(row, widths))
+        yield line.rstrip()
+        yield '\n'
+
+
+@register('ids-only')
+def ids_format(result):
+    """ One 'id' per line, or 'network_address' for resources
+
+    >>> print(''.join(ids_format({'items': [{'id': 1}, {'id': 2}]})))
+    1
+    2
+    <BLANKLINE>
+    >>> print(''.join(ids_format([{'network_address': 'm3-1'}, 3])))
+    m3-1
+    3
+    <BLANKLINE>
+    """
+    for item in items_list(result):
+        yield _field_str(_item_id(item))
+        yield '\n'
+
+
+def _item_id(item):
+    """ Return item 'id' or 'network_address', item if not a dict """
+    if not isinstance(item, dict):
+        return item
+    return item.get('id', item.get('network_address'))
+
+
+@register('short-nodes')
+def short_nodes_format(result):
+    """ Nodes as 'site,archi,1-5+7' lines, the '-l' nodes list format
+
+    >>> nodes = ['m3-1.grenoble.iot-lab.info', 'm3-2.grenoble.iot-lab.info',
+    ...          'm3-3.grenoble.iot-lab.info', 'a8-5.grenoble.iot-lab.info',
+    ...          'm3-7.grenoble.iot-lab.info', 'm3-1.lille.iot-lab.info']
+    >>> print(''.join(short_nodes_format(nodes)))
+    grenoble,a8,5
+    grenoble,m3,1-3+7
+    lille,m3,1
+    <BLANKLINE>
+
+    Items that are not nodes are skipped
+
+    >>> print(''.join(short_nodes_format([42, '3', 'grenoble', None] + nodes)))
+    grenoble,a8,5
+    grenoble,m3,1-3+7
+    lille,m3,1
+    <BLANKLINE>
+    """
+    nodes_dict = {}
+    for item in items_list(result):
+        key = _node_key(_item_id(item))
+        if key is not None:
+            nodes_dict.setdefault(key[:2], set()).add(key[2])
+
+    for (site, archi), nums in sorted(nodes_dict.items()):
+        yield '%s,%s,%s' % (site, archi, short_nodes_str(nums))
+        yield '\n'
+
+
+def _node_key(node):
+    """ Return node (site, archi, num), None if `node` is not a node url """
+    try:
+        site, archi, num = helpers.node_url_sort_key(node)
+    except (AttributeError, TypeError, ValueError):
+        return None
+    return site, archi, num
+
+
+def short_nodes_str(nums):
+    """ Return the '1-5+7' string for given nodes numbers
+
+    >>> short_nodes_str([7, 1, 2, 3, 4, 5, 9, 10])
+    '1-5+7+9-10'
+    >>> short_nodes_str([3])
+    '3'
+    """
+    nums = sorted(nums)
+    ranges = []
+    first = prev = nums[0]
+    for num in nums[1:] + [None]:
+        if num is not None and num == prev + 1:
+            prev = num
+            continue
+        ranges.append(str(first) if first == prev else
+                      '%u-%u' % (first, prev))
+        first = prev = num
+    return '+'.join(ranges)
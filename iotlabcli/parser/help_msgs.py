@@ -83,6 +83,8 @@ Examples:
     * Check and control script
         $ iotlab-experiment script --status
         $ iotlab-experiment script --kill
+    * Get script status with one request per site, waiting 10s max per site
+        $ iotlab-experiment script --status --per-site --site-timeout 10
 """
 
 WAIT_EPILOG = """
@@ -146,6 +148,8 @@ Examples:
         $ iotlab-experiment info -l --site grenoble
     * Get resources id list (e.g. 1-34+72)
         $ iotlab-experiment info -li
+    * Get Alive m3 nodes from the local resources index
+        $ iotlab-experiment info -l --index --archi m3 --state Alive
 
 """
 
@@ -179,3 +183,35 @@ Examples :
     $ iotlab-profile {cmd} -n sniff_11 -sniffer -channels 11
 
 """
+
+SYNC_EPILOG = """
+
+Profiles are compared with their canonical JSON digest, ignoring fields
+only set by the server: id, user and creation_date. Sections removed from
+a profile file are changes. Only new and changed ones are added.
+
+Examples :
+    # Add new and changed profiles from 'profiles/*.json' files
+    $ iotlab-profile sync -d profiles/
+
+    # Also delete user profiles without a file
+    $ iotlab-profile sync -d profiles/ --delete
+
+"""
+
+SWEEP_EPILOG = """
+
+Profiles are named '<prefix>_<period>_<average>[_<mode><channel>]'.
+
+Examples :
+    # Add m3 profiles measuring power for each period with average 1
+    $ iotlab-profile sweep m3 --prefix pw -power -avg 1
+
+    # Add a8 rssi profiles for each channel, period and average
+    $ iotlab-profile sweep a8 --prefix rssi -rssi -rperiod 100 \
+        -period 140 1100 -avg 1 4
+
+    # Print the generated profiles without adding them
+    $ iotlab-profile sweep custom --prefix test -period 140 -avg 1 -j
+
+"""
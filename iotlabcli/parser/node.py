@@ -51,6 +51,8 @@ Examples:
         $ iotlab-node --update /home/tp.hex -e grenoble,m3,1-2
     * commmand list : site_name,archi,nodeid_list
         $ iotlab-node --reset -l grenoble,wsn430,1-34+72
+    * reset m3 nodes within 5 meters of m3-100, see 'submit --help-list'
+        $ iotlab-node --reset -l grenoble,m3,near=100:5
     * command with several experiments with state Running
         $ iotlab-node -i <expid> --reset
 
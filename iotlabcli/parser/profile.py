@@ -21,7 +21,9 @@
 
 """ Profile parser"""
 
+import os
 import json
+import glob
 import sys
 import argparse
 from argparse import RawTextHelpFormatter
@@ -33,6 +35,7 @@ from iotlabcli.parser import help_msgs
 from iotlabcli.parser import common
 from iotlabcli.profile import ProfileWSN430, ProfileM3, ProfileA8
 from iotlabcli.profile import ProfileCustom
+from iotlabcli import profile as profile_module
 
 PROFILE_PARSER = """
 
@@ -87,9 +90,16 @@ def parse_options():
         formatter_class=RawTextHelpFormatter)
     add_m3_a8_parser('CUSTOM', add_custom_parser)
 
+    add_sweep_parser(subparsers.add_parser(
+        'sweep', help='add m3, a8 or custom profiles for all combinations',
+        epilog=help_msgs.SWEEP_EPILOG, formatter_class=RawTextHelpFormatter))
+
     del_parser = subparsers.add_parser('del', help='delete user profile')
     get_parser = subparsers.add_parser('get', help='get user\'s profile')
     load_parser = subparsers.add_parser('load', help='load user profile')
+    sync_parser = subparsers.add_parser(
+        'sync', help='sync user profiles with a profiles directory',
+        epilog=help_msgs.SYNC_EPILOG, formatter_class=RawTextHelpFormatter)
 
     #
     # WSN430 profile
@@ -167,6 +177,17 @@ def parse_options():
         '-f', '--file', dest='path_file', required=True,
         help='profile JSON representation path file')
 
+    # Sync Profiles
+    sync_parser.add_argument(
+        '-d', '--dir', dest='path_dir', required=True,
+        help='directory of profiles JSON representation \'*.json\' files')
+    sync_parser.add_argument(
+        '--delete', action='store_true',
+        help='delete user profiles not in directory')
+    sync_parser.add_argument(
+        '--workers', type=int, default=4,
+        help='maximum concurrent profile requests (default 4)')
+
     return parser
 
 
@@ -239,6 +260,63 @@ def add_m3_a8_parser(node_type, subparser):
         metavar='{1..65535}', help='period measure')
 
 
+SWEEP_CLASSES = {'m3': ProfileM3, 'a8': ProfileA8, 'custom': ProfileCustom}
+
+
+def add_sweep_parser(subparser):
+    """ Add options for profiles sweep parser """
+    choices = ProfileM3.choices
+
+    subparser.add_argument('archi', choices=sorted(SWEEP_CLASSES),
+                           help='profiles node architecture')
+    subparser.add_argument('--prefix', required=True,
+                           help='profiles name prefix')
+    subparser.add_argument('-p', '--power', dest='power_mode', default='dc',
+                           help='power mode (dc by default)',
+                           choices=choices['power_mode'])
+    subparser.add_argument(
+        '--workers', type=int, default=4,
+        help='maximum concurrent profile uploads (default 4)')
+    subparser.add_argument(
+        '-j', '--json', action='store_true',
+        help='print profiles JSON representation without add them')
+
+    consumption = subparser.add_argument_group(
+        'Consumption measure', 'measure all if none given')
+    consumption.add_argument(
+        '-current', action='store_true', help='current measure')
+    consumption.add_argument(
+        '-voltage', action='store_true', help='voltage measure')
+    consumption.add_argument(
+        '-power', action='store_true', help='power measure')
+    consumption.add_argument(
+        '-period', dest='periods', type=int, nargs='+',
+        choices=choices['consumption']['period'],
+        help='periods to sweep (us), all by default')
+    consumption.add_argument(
+        '-avg', dest='averages', type=int, nargs='+',
+        choices=choices['consumption']['average'],
+        help='averages to sweep, all by default')
+
+    radio = subparser.add_argument_group(
+        'Radio measure', 'one profile per channel')
+    radio_mode = radio.add_mutually_exclusive_group()
+    radio_mode.add_argument(
+        '-rssi', dest='mode', action='store_const', const='rssi',
+        help='RSSI measure, requires `rperiod`')
+    radio_mode.add_argument(
+        '-sniffer', dest='mode', action='store_const', const='sniffer',
+        help='Radio Sniffer')
+    radio.add_argument(
+        '-channels', dest='channels', nargs='+',
+        type=int, choices=choices['radio']['channels'],
+        metavar='{11..26}', help='channels to sweep, all by default')
+    radio.add_argument(
+        '-rperiod', dest='rperiod', type=int,
+        choices=choices['radio']['period'],
+        metavar='{1..65535}', help='period measure')
+
+
 def _wsn430_profile(opts):
     """ Create a wsn430 profile from namespace object """
     profile = ProfileWSN430(profilename=opts.name, power=opts.power_mode)
@@ -306,19 +384,84 @@ def add_profile_parser(api, opts):
         raise ValueError(str(err))
 
 
-def load_profile_parser(api, opts):
-    """  Load and add user profile description
+def _sweep_radio(opts):
+    """ Return sweep_profiles radio argument from namespace object """
+    if opts.mode is None:
+        return None
+    channels = opts.channels or list(ProfileM3.choices['radio']['channels'])
+    return (opts.mode, channels, opts.rperiod)
+
+
+def sweep_profile_parser(api, opts):
+    """ Add profiles for all the requested measures combinations.
+
+    All profiles are validated before the first one is added.
 
     :param api: API Rest api object
     :param opts: command-line parser opts
-    :type opts: Namespace object with opts attribute
+    :type opts:  Namespace object with opts attribute
     """
     try:
-        profile = json.loads(helpers.read_file(opts.path_file))
-        return _add_profile(api, profile['profilename'], profile)
+        profiles = list(profile_module.sweep_profiles(
+            SWEEP_CLASSES[opts.archi], opts.prefix, opts.power_mode,
+            opts.periods, opts.averages, _sweep_radio(opts),
+            _sweep_measures(opts)))
+    except AssertionError as err:
+        raise ValueError(str(err))
+
+    if opts.json:
+        return profiles
+    return profile_module.add_profiles(api, profiles, opts.workers)
+
+
+def _sweep_measures(opts):
+    """ Return the selected consumption measures flags, empty if none
+
+    >>> _sweep_measures(argparse.Namespace(power=True, voltage=False,
+    ...                                    current=False))
+    {'power': True}
+    """
+    return dict((measure, True) for measure in ('power', 'voltage', 'current')
+                if getattr(opts, measure))
+
+
+def _read_profile(path_file):
+    """ Return (profilename, profile) from profile JSON file """
+    try:
+        profile = json.loads(helpers.read_file(path_file))
+        return profile['profilename'], profile
     except KeyError:  # pragma: no cover
         raise ValueError(
-            "'profilename' required in profile JSON file: %r" % opts.path_file)
+            "'profilename' required in profile JSON file: %r" % path_file)
+
+
+def load_profile_parser(api, opts):
+    """  Load and add user profile description
+
+    :param api: API Rest api object
+    :param opts: command-line parser opts
+    :type opts: Namespace object with opts attribute
+    """
+    name, profile = _read_profile(opts.path_file)
+    return _add_profile(api, name, profile)
+
+
+def sync_profile_parser(api, opts):
+    """ Sync user profiles with profiles directory JSON files
+
+    Only new and changed profiles are added, an empty directory is an
+    error so it never deletes all user profiles.
+
+    :param api: API Rest api object
+    :param opts: command-line parser opts
+    :type opts: Namespace object with opts attribute
+    """
+    paths = sorted(glob.glob(os.path.join(opts.path_dir, '*.json')))
+    if not paths:
+        raise ValueError("No profile JSON file in: %r" % opts.path_dir)
+    profiles = dict(_read_profile(path) for path in paths)
+    return profile_module.sync_profiles(api, profiles, opts.delete,
+                                        opts.workers)
 
 
 def del_profile_parser(api, opts):
@@ -360,7 +503,9 @@ def profile_parse_and_run(opts):
         'addm3': add_profile_parser,
         'adda8': add_profile_parser,
         'addcustom': add_profile_parser,
+        'sweep': sweep_profile_parser,
         'load': load_profile_parser,
+        'sync': sync_profile_parser,
         'get': get_profile_parser,
         'del': del_profile_parser,
     }[opts.command]
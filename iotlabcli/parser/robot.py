@@ -22,10 +22,14 @@
 """Robot parser"""
 import sys
 import argparse
+import collections
+
+import requests
 
 from iotlabcli import rest
 from iotlabcli import auth
 from iotlabcli import helpers
+from iotlabcli import spatial
 from iotlabcli.parser import common
 import iotlabcli.robot
 
@@ -53,6 +57,38 @@ def name_site(name_site_str):
     return name, site
 
 
+def mobility_nodes(mobility_nodes_str):
+    """Extract 'name,site[=nodes]' mobility and its optional nodes list.
+
+    Nodes use the '-l' nodes list format 'site,archi,1-5+7'.
+
+    >>> mobility_nodes('name,site')
+    (('name', 'site'), None)
+    """
+    mobility_str, _, nodes_str = mobility_nodes_str.partition('=')
+    nodes = common.nodes_list_from_str(nodes_str) if nodes_str else None
+    return name_site(mobility_str), nodes
+
+
+def positive(value_type):
+    """ Return argparse type function for strictly positive `value_type`
+
+    >>> positive(float)('0.5')
+    0.5
+    >>> positive(int)('0')
+    ... # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    ArgumentTypeError: Invalid value, should be strictly positive: '0'
+    """
+    def _positive(value_str):
+        value = value_type(value_str)
+        if value <= 0:
+            raise argparse.ArgumentTypeError(
+                'Invalid value, should be strictly positive: %r' % value_str)
+        return value
+    return _positive
+
+
 def parse_options():
     """ Handle iotlab-robot command-line options with argparse """
 
@@ -69,11 +105,22 @@ def parse_options():
     status_parser = subparsers.add_parser('status', help='Get robot status')
     common.add_nodes_selection_list(status_parser)
     common.add_expid_arg(status_parser)
+    status_parser.add_argument(
+        '--watch', nargs='?', const=5.0, type=positive(float),
+        metavar='SECONDS',
+        help=('poll status every SECONDS (default 5) and print robots changed '
+              'fields, as ndjson by default, until interrupted'))
+    status_parser.add_argument(
+        '--count', type=positive(int),
+        help='with --watch, stop after COUNT polls')
 
     # 'update' command
     up_parser = subparsers.add_parser('update', help='Update robot mobility')
-    up_parser.add_argument('update_name_site', help='Update robot mobility',
-                           metavar='NAME,SITE', type=name_site)
+    up_parser.add_argument(
+        'update_mobilities', nargs='+', type=mobility_nodes,
+        metavar='NAME,SITE[=NODES]',
+        help=('Update robot mobility, NODES in \'-l\' format. Several '
+              'mobilities require NODES and are updated concurrently'))
     common.add_nodes_selection_list(up_parser)
     common.add_expid_arg(up_parser)
 
@@ -93,23 +140,16 @@ def parse_options():
 
 def robot_parse_and_run(opts):  # noqa  # Too complex but straightforward
     """ Parse namespace 'opts' object and execute requested command """
+    _status_options(opts)
     user, passwd = auth.get_user_credentials(opts.username, opts.password)
     api = rest.Api(user, passwd)
 
     command = opts.command
 
     if command == 'status':
-        exp_id = helpers.get_current_experiment(api, opts.experiment_id)
-        nodes = common.list_nodes(api, exp_id, opts.nodes_list,
-                                  opts.exclude_nodes_list)
-        ret = iotlabcli.robot.robot_command(api, 'status', exp_id, nodes)
+        ret = robot_status(api, opts)
     elif command == 'update':
-        exp_id = helpers.get_current_experiment(api, opts.experiment_id)
-        nodes = common.list_nodes(api, exp_id, opts.nodes_list,
-                                  opts.exclude_nodes_list)
-        name, site = opts.update_name_site
-        ret = iotlabcli.robot.robot_update_mobility(api, exp_id,
-                                                    name, site, nodes)
+        ret = robot_update(api, opts)
     elif command == 'get' and opts.get_list:
         ret = iotlabcli.robot.mobility_command(api, 'list')
     elif command == 'get' and opts.get_name_site is not None:
@@ -121,6 +161,84 @@ def robot_parse_and_run(opts):  # noqa  # Too complex but straightforward
     return ret
 
 
+def _status_options(opts):
+    """ Check 'status' --watch options, changes are printed as ndjson if no
+    output was chosen """
+    if opts.command != 'status':
+        return
+    if opts.count is not None and opts.watch is None:
+        raise ValueError('--count requires --watch')
+    if opts.watch is not None and opts.output is None:
+        opts.output = 'ndjson'
+
+
+def robot_status(api, opts):
+    """ Return robots status, or iterator on their changes with --watch """
+    exp_id = helpers.get_current_experiment(api, opts.experiment_id)
+    nodes = common.list_nodes(api, exp_id, opts.nodes_list,
+                              opts.exclude_nodes_list)
+    if opts.watch is None:
+        return iotlabcli.robot.robot_command(api, 'status', exp_id, nodes)
+
+    # polls reuse connections, and changes are printed as they come
+    rest.Api.session = rest.Api.default_session() or requests.Session()
+    return iotlabcli.robot.robot_status_watch(api, exp_id, nodes, opts.watch,
+                                              opts.count)
+
+
+def robot_update(api, opts):
+    """ Update robots mobility, concurrently for several mobilities """
+    exp_id = helpers.get_current_experiment(api, opts.experiment_id)
+    mobilities = _mobilities_nodes(api, exp_id, opts)
+    if len(mobilities) == 1:
+        (name, site), nodes = mobilities.popitem()
+        return iotlabcli.robot.robot_update_mobility(api, exp_id,
+                                                     name, site, nodes)
+    return iotlabcli.robot.robot_update_mobilities(api, exp_id, mobilities)
+
+
+def _mobilities_nodes(api, exp_id, opts):
+    """ Return {(name, site): nodes} for 'update' mobilities
+
+    One mobility without nodes applies to '-l' or '-e' selected nodes.
+    Several ones all require their own nodes.
+    """
+    groups = opts.update_mobilities
+    if len(groups) == 1 and groups[0][1] is None:
+        nodes = common.list_nodes(api, exp_id, opts.nodes_list,
+                                  opts.exclude_nodes_list)
+        return {groups[0][0]: nodes}
+    selection = opts.nodes_list or opts.exclude_nodes_list
+    if selection or any(nodes is None for _, nodes in groups):
+        raise ValueError('Several mobilities require NAME,SITE=NODES '
+                         'and no nodes selection')
+
+    mobilities = {}
+    for mobility, nodes in groups:
+        mobilities.setdefault(mobility, []).extend(
+            spatial.resolve_nodes(api, nodes))
+    _check_nodes_uniq(mobilities.values())
+    return dict((mob, sorted(nodes, key=helpers.node_url_sort_key))
+                for mob, nodes in mobilities.items())
+
+
+def _check_nodes_uniq(nodes_lists):
+    """ Check that nodes are given only once
+
+    >>> _check_nodes_uniq([['m3-1', 'm3-2'], ['m3-3']])
+    >>> _check_nodes_uniq([['m3-1', 'm3-2'], ['m3-2']])
+    Traceback (most recent call last):
+    ...
+    ValueError: Nodes may only be given one mobility: ['m3-2']
+    """
+    nodes = helpers.flatten_list_list(nodes_lists)
+    duplicates = sorted(n for n, c in collections.Counter(nodes).items()
+                        if c > 1)
+    if duplicates:
+        raise ValueError('Nodes may only be given one mobility: %r' %
+                         duplicates)
+
+
 def main(args=None):
     """ Main command-line execution loop." """
     args = args or sys.argv[1:]
@@ -21,17 +21,79 @@
 
 """Class python for Profile serialization JSON"""
 
+import numbers
+import hashlib
+import itertools
+
+from iotlabcli import helpers
+
 # pylint:disable=too-few-public-methods
 
+# Profiles fields only set by the server, ignored by 'sync'
+SERVER_FIELDS = ('id', 'user', 'creation_date')
+
+
+class Choices(tuple):
+    """Ordered valid values, checked with constant time 'in'
+
+    >>> choices = Choices(['dc', 'battery'])
+    >>> 'dc' in choices, 'other' in choices, [] in choices
+    (True, False, False)
+    >>> list(choices)
+    ['dc', 'battery']
+    """
+    def __new__(cls, values):
+        self = tuple.__new__(cls, values)
+        self.valid = frozenset(self)
+        return self
+
+    def __contains__(self, value):
+        try:
+            return value in self.valid
+        except TypeError:  # unhashable
+            return False
+
+
+class IntRange(object):
+    """Integers from `start` to `stop` excluded, checked with an interval
+
+    Iterating gives the values like 'range' for argparse 'choices'.
+
+    >>> channels = IntRange(11, 27)
+    >>> 11 in channels, 26 in channels, 27 in channels, 11.5 in channels
+    (True, True, False, False)
+    >>> list(IntRange(1, 4))
+    [1, 2, 3]
+    """
+    def __init__(self, start, stop):
+        self.start = start
+        self.stop = stop
+
+    def __contains__(self, value):
+        return (isinstance(value, numbers.Integral) and
+                self.start <= value < self.stop)
+
+    def __iter__(self):
+        return iter(range(self.start, self.stop))
+
+    def __repr__(self):
+        return 'IntRange(%r, %r)' % (self.start, self.stop)
+
+
+POWER_MODES = Choices(['dc', 'battery'])
+
 
 class ProfileM3A8(object):
     """A generic Profile for M3 and A8 """
     choices = {
-        'power_mode': ['dc', 'battery'],
-        'consumption': {'period': [140, 204, 332, 588, 1100, 2116, 4156, 8244],
-                        'average': [1, 4, 16, 64, 128, 256, 512, 1024]},
-        'radio': {'channels': range(11, 27), 'num_per_channel': range(0, 256),
-                  'period': range(1, 2**16)}
+        'power_mode': POWER_MODES,
+        'consumption': {'period': Choices([140, 204, 332, 588, 1100, 2116,
+                                           4156, 8244]),
+                        'average': Choices([1, 4, 16, 64, 128, 256, 512,
+                                            1024])},
+        'radio': {'channels': IntRange(11, 27),
+                  'num_per_channel': IntRange(0, 256),
+                  'period': IntRange(1, 2**16)}
     }
     arch = None
 
@@ -72,7 +134,7 @@ class ProfileM3A8(object):
         for channel in channels:
             assert channel in self.choices['radio']['channels']
 
-        assert mode in ['rssi', 'sniffer']
+        assert mode in ('rssi', 'sniffer')
         self.radio = {
             'mode': mode
         }
@@ -116,6 +178,10 @@ class ProfileM3A8(object):
         self.radio['period'] = None
         self.radio['num_per_channel'] = None
 
+    def to_json_obj(self):
+        """Return profile json dict."""
+        return helpers.to_json_obj(self.__dict__)
+
     def __eq__(self, other):  # pragma: no cover
         return self.__dict__ == other.__dict__
 
@@ -138,10 +204,10 @@ class ProfileCustom(ProfileM3A8):
 class ProfileWSN430(object):
     """A Profile measure class for WSN430 """
     choices = {
-        'power_mode': ['dc', 'battery'],
-        'consumption': {'frequency': [5000, 1000, 500, 100, 70]},
-        'radio': {'frequency': [5000, 1000, 500]},
-        'sensor': {'frequency': [30000, 10000, 5000, 1000]},
+        'power_mode': POWER_MODES,
+        'consumption': {'frequency': Choices([5000, 1000, 500, 100, 70])},
+        'radio': {'frequency': Choices([5000, 1000, 500])},
+        'sensor': {'frequency': Choices([30000, 10000, 5000, 1000])},
     }
 
     def __init__(self, profilename, power):
@@ -194,5 +260,174 @@ class ProfileWSN430(object):
             'temperature': temperature,
         }
 
+    def to_json_obj(self):
+        """Return profile json dict."""
+        return helpers.to_json_obj(self.__dict__)
+
     def __eq__(self, other):  # pragma: no cover
         return self.__dict__ == other.__dict__
+
+
+def sweep_profiles(node_class, prefix,  # pylint:disable=too-many-arguments
+                   power_mode='dc', periods=None, averages=None, radio=None,
+                   measures=None):
+    """Iterate on `node_class` profiles for each consumption period and
+    average and each radio channel.
+
+    Profiles are named '<prefix>_<period>_<average>[_<mode><channel>]'.
+
+    :param periods: consumption periods, default all valid ones
+    :param averages: consumption averages, default all valid ones
+    :param radio: (mode, channels, period) radio measures, one profile per
+        channel, None for no radio measures
+    :param measures: consumption {'power', 'voltage', 'current': bool}
+        flags, default all
+    """
+    choices = node_class.choices['consumption']
+    measures = measures or {'power': True, 'voltage': True, 'current': True}
+    for period, average, (suffix, radio_cfg) in itertools.product(
+            periods or choices['period'], averages or choices['average'],
+            _sweep_radios(radio)):
+        profile = node_class('%s_%u_%u%s' % (prefix, period, average, suffix),
+                             power_mode)
+        profile.set_consumption(period, average, **measures)
+        profile.set_radio(*radio_cfg)
+        yield profile
+
+
+def _sweep_radios(radio=None):
+    """Return (name_suffix, set_radio_args) for each `radio` channel.
+
+    >>> _sweep_radios(('rssi', [11, 12], 10))
+    [('_rssi11', ('rssi', [11], 10)), ('_rssi12', ('rssi', [12], 10))]
+    >>> _sweep_radios(None)
+    [('', (None, None))]
+    """
+    if radio is None:
+        return [('', (None, None))]
+    mode, channels, period = radio
+    return [('_%s%u' % (mode, channel), (mode, [channel], period))
+            for channel in channels]
+
+
+def add_profiles(api, profiles, workers=4):
+    """Add `profiles` with at most `workers` concurrent requests.
+
+    :returns: {'items': [{'profilename': name, 'result'|'error': value}]}
+        sorted by profile name
+    """
+    args = dict((prof.profilename, (prof.profilename, prof))
+                for prof in profiles)
+    results, errors = helpers.parallel_map(api.add_profile, args,
+                                           workers=workers)
+    return {'items': [_profile_result(name, results, errors)
+                      for name in sorted(args)]}
+
+
+def _profile_result(name, results, errors):
+    """Return profile `name` result or error dict.
+
+    >>> _profile_result('a', {}, {'a': 'HTTP Error 500'})
+    {'profilename': 'a', 'error': 'HTTP Error 500'}
+    """
+    if name in errors:
+        return {'profilename': name, 'error': errors[name]}
+    return {'profilename': name, 'result': results[name]}
+
+
+def profile_digest(profile):
+    """Return `profile` canonical JSON sha256 digest.
+
+    Canonical JSON has sorted keys and no whitespace, so equal profiles have
+    the same digest whatever their keys order.
+
+    >>> digest = profile_digest({'power': 'dc', 'profilename': 'a'})
+    >>> digest == profile_digest({'profilename': 'a', 'power': 'dc'})
+    True
+    """
+    canonical = ''.join(helpers.json_compact_chunks(
+        helpers.to_json_obj(profile)))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def sync_actions(remote_profiles, profiles, delete=False):
+    """Return the {name: action} required to sync remote with `profiles`.
+
+    Actions are 'add', 'update', 'unchanged' or 'delete' for remote profiles
+    not in `profiles` if `delete`. Fields added by the server are ignored.
+
+    >>> sorted(sync_actions(
+    ...     [{'profilename': 'a', 'power': 'dc'}, {'profilename': 'b'}],
+    ...     {'a': {'profilename': 'a', 'power': 'battery'},
+    ...      'b': {'profilename': 'b'}, 'c': {'profilename': 'c'}}).items())
+    [('a', 'update'), ('b', 'unchanged'), ('c', 'add')]
+    >>> sync_actions([{'profilename': 'a', 'radio': {'mode': 'rssi'}}],
+    ...              {'a': {'profilename': 'a'}})
+    {'a': 'update'}
+    >>> sync_actions([{'profilename': 'b'}], {}, delete=True)
+    {'b': 'delete'}
+    """
+    remote = dict((prof['profilename'], prof) for prof in remote_profiles)
+    actions = dict((name, _sync_action(remote.get(name), prof))
+                   for name, prof in profiles.items())
+    if delete:
+        actions.update((name, 'delete') for name in remote
+                       if name not in profiles)
+    return actions
+
+
+def _sync_action(remote_profile, profile):
+    """Return action to sync `remote_profile` with `profile`."""
+    if remote_profile is None:
+        return 'add'
+    remote_digest = profile_digest(_comparable(remote_profile))
+    if remote_digest == profile_digest(_comparable(profile)):
+        return 'unchanged'
+    return 'update'
+
+
+def _comparable(profile):
+    """Return `profile` without SERVER_FIELDS, missing and None are the same.
+
+    >>> _comparable({'radio': None, 'power': 'dc', 'id': 3})
+    {'power': 'dc'}
+    """
+    return dict((key, value)
+                for key, value in helpers.to_json_obj(profile).items()
+                if key not in SERVER_FIELDS and value is not None)
+
+
+def sync_profiles(api, profiles, delete=False, workers=4):
+    """Add new and changed `profiles` with at most `workers` concurrent
+    requests, delete remote profiles not in `profiles` if `delete`.
+
+    :param profiles: {name: profile} dict
+    :returns: {'items': [{'profilename': name, 'action': action,
+        'result'|'error': value}]} sorted by profile name,
+        'unchanged' profiles have no result
+    """
+    actions = sync_actions(api.get_profiles(), profiles, delete)
+    calls = dict((name, _sync_call(api, action, name, profiles.get(name)))
+                 for name, action in actions.items() if action != 'unchanged')
+    results, errors = helpers.parallel_map(_call, calls, workers=workers)
+    return {'items': [_sync_result(name, actions[name], results, errors)
+                      for name in sorted(actions)]}
+
+
+def _sync_call(api, action, name, profile):
+    """Return (function, args...) tuple doing profile `action`."""
+    if action == 'delete':
+        return (api.del_profile, name)
+    return (api.add_profile, name, profile)
+
+
+def _call(function, *args):
+    """Return function(*args)."""
+    return function(*args)
+
+
+def _sync_result(name, action, results, errors):
+    """Return profile `name` sync result dict."""
+    if action == 'unchanged':
+        return {'profilename': name, 'action': action}
+    return dict(_profile_result(name, results, errors), action=action)
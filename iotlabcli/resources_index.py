@@ -0,0 +1,249 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Local index of testbed resources
+
+Resources returned by `Api.get_resources` are stored in a SQLite database
+in cache.CACHE_DIR with indexed columns, filtered queries do not download
+and scan the whole resources list.
+
+The index is refreshed per site, only sites older than `ttl` are downloaded
+again and only changed resources are written.
+"""
+
+import os
+import json
+import time
+
+from iotlabcli import cache
+from iotlabcli import helpers
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    network_address TEXT PRIMARY KEY,
+    site TEXT, archi TEXT, state TEXT, mobile INTEGER,
+    x REAL, y REAL, z REAL,
+    resource TEXT);
+CREATE INDEX IF NOT EXISTS resources_selection
+    ON resources (site, archi, state);
+CREATE INDEX IF NOT EXISTS resources_state ON resources (state);
+CREATE INDEX IF NOT EXISTS resources_site_xy ON resources (site, x, y);
+CREATE TABLE IF NOT EXISTS sites (site TEXT PRIMARY KEY, updated REAL);
+"""
+
+SELECTIONS = ('site', 'archi', 'state', 'mobile')
+
+
+class ResourcesIndex(object):
+    """ SQLite index of testbed resources
+
+    :param path: database path, default 'resources.sqlite' in CACHE_DIR
+    :param ttl: sites are downloaded again after `ttl` seconds
+    """
+
+    def __init__(self, path=None, ttl=60):
+        self._path = path
+        self.ttl = ttl
+
+    @property
+    def path(self):
+        """ Database path, CACHE_DIR is read at each call """
+        return self._path or os.path.join(cache.CACHE_DIR, 'resources.sqlite')
+
+    def _connection(self):
+        """ Connection with schema created, committed on success """
+        return cache.sqlite_connection(self.path, _SCHEMA)
+
+    def resources(self, api, site=None, **selections):
+        """ Return resources matching selections, refresh index if needed
+
+        :param api: API Rest api object
+        :param site: restrict to site
+        :param **selections: 'archi', 'state' or 'mobile' values
+        :returns: {'items': [resource, ...]} like `Api.get_resources`
+        """
+        self.refresh(api, site)
+        return {'items': self.query(site=site, **selections)}
+
+    def query(self, **selections):
+        """ Return indexed resources matching selections
+
+        'archi' matches full architecture 'm3:at86rf231' or its 'm3' prefix.
+        """
+        where, params = _where_clause(selections)
+        return self._select(where, params)
+
+    def area(self, site, mins, maxs):
+        """ Return indexed `site` resources in [mins, maxs] x, y area
+
+        Only the resources in the area are read, with the site x, y index.
+        """
+        return self._select(
+            ' WHERE site = ? AND x BETWEEN ? AND ? AND y BETWEEN ? AND ?',
+            [site, mins[0], maxs[0], mins[1], maxs[1]])
+
+    def node(self, site, name):
+        """ Return indexed `site` resource named `name`, like 'm3-1' """
+        # network_address prefix range 'name.' to 'name/', '/' follows '.'
+        resources = self._select(
+            ' WHERE site = ? AND network_address >= ? AND network_address < ?',
+            [site, name + '.', name + '/'])
+        return resources[0] if resources else None
+
+    def _select(self, where, params):
+        """ Return resources matching `where` clause, sorted by address """
+        with self._connection() as conn:
+            rows = conn.execute(
+                'SELECT resource FROM resources' + where, params).fetchall()
+        resources = [json.loads(row[0]) for row in rows]
+        return sorted(resources, key=lambda res: helpers.node_url_sort_key(
+            res['network_address']))
+
+    def refresh(self, api, site=None, force=False):
+        """ Download resources of outdated sites
+
+        Without site, all the resources are downloaded in one request.
+        :returns: number of written resources
+        """
+        with self._connection() as conn:
+            if not force and self._is_fresh(conn, site):
+                return 0
+            items = api.get_resources(False, site)['items']
+            return _update(conn, items, site)
+
+    def _is_fresh(self, conn, site=None):
+        """ Return if `site`, or all sites if None, are up to date """
+        query = 'SELECT MIN(updated), COUNT(*) FROM sites'
+        params = ()
+        if site is not None:
+            query, params = query + ' WHERE site = ?', (site,)
+        updated, count = conn.execute(query, params).fetchone()
+        if not count or (site is None and not _all_sites_indexed(conn)):
+            return False
+        return time.time() - updated <= self.ttl
+
+
+def _all_sites_indexed(conn):
+    """ Return if the full resources list has been indexed """
+    return conn.execute(
+        "SELECT 1 FROM sites WHERE site = ''").fetchone() is not None
+
+
+def _where_clause(selections):
+    """ Return sql 'WHERE' clause and parameters for selections
+
+    >>> where, params = _where_clause({'site': 'lille', 'archi': 'm3'})
+    >>> print(where)
+     WHERE (archi = ? OR archi LIKE ?) AND site = ?
+    >>> params
+    ['m3', 'm3:%', 'lille']
+    >>> _where_clause({'site': None})
+    ('', [])
+    >>> _where_clause({'uid': '9982'})
+    Traceback (most recent call last):
+    ValueError: Invalid resources selection 'uid'
+    """
+    clauses, params = [], []
+    for key, value in sorted(selections.items()):
+        if key not in SELECTIONS:
+            raise ValueError('Invalid resources selection %r' % key)
+        if value is not None:
+            clause, values = _condition(key, value)
+            clauses.append(clause)
+            params.extend(values)
+    where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+    return where, params
+
+
+def _condition(key, value):
+    """ Return sql condition and parameters for `key` selection """
+    if key == 'archi':
+        return '(archi = ? OR archi LIKE ?)', [value, value + ':%']
+    if key == 'mobile':
+        return 'mobile = ?', [_mobile(value)]
+    return '%s = ?' % key, [value]
+
+
+def _update(conn, items, site=None):
+    """ Write changed resources of `site`, all sites if None
+
+    Resources removed from the testbed are removed from the index.
+    :returns: number of written resources
+    """
+    query = 'SELECT network_address, resource FROM resources'
+    params = ()
+    if site is not None:
+        query, params = query + ' WHERE site = ?', (site,)
+    indexed = dict(conn.execute(query, params).fetchall())
+
+    rows = [_row(res) for res in items]
+    changed = [row for row in rows if indexed.pop(row[0], None) != row[-1]]
+    conn.executemany('INSERT OR REPLACE INTO resources VALUES '
+                     '(?, ?, ?, ?, ?, ?, ?, ?, ?)', changed)
+    conn.executemany('DELETE FROM resources WHERE network_address = ?',
+                     [(addr,) for addr in indexed])
+
+    now = time.time()
+    sites = set(row[1] for row in rows) | set([site or ''])
+    conn.executemany('INSERT OR REPLACE INTO sites VALUES (?, ?)',
+                     [(name, now) for name in sites])
+    return len(changed)
+
+
+def _row(resource):
+    """ Return index row for resource
+
+    >>> _row({'network_address': 'm3-1.lille.iot-lab.info', 'site': 'lille',
+    ...       'archi': 'm3:at86rf231', 'state': 'Alive', 'mobile': '0',
+    ...       'x': '1.5', 'y': '', 'z': None})[:8]
+    ... # doctest: +NORMALIZE_WHITESPACE
+    ('m3-1.lille.iot-lab.info', 'lille', 'm3:at86rf231', 'Alive', 0,
+     1.5, None, None)
+    """
+    return (resource['network_address'], resource.get('site'),
+            resource.get('archi'), resource.get('state'),
+            _mobile(resource.get('mobile')),
+            coordinate(resource.get('x')), coordinate(resource.get('y')),
+            coordinate(resource.get('z')),
+            json.dumps(resource, sort_keys=True))
+
+
+def _mobile(value):
+    """ Return mobile value as an integer
+
+    >>> _mobile('1'), _mobile(True), _mobile('0'), _mobile('false')
+    (1, 1, 0, 0)
+    """
+    return int(str(value).lower() in ('1', 'true'))
+
+
+def coordinate(value):
+    """ Return coordinate as a float, None if not a number
+
+    >>> coordinate('26.76'), coordinate(3)
+    (26.76, 3.0)
+    >>> coordinate(''), coordinate(None)
+    (None, None)
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -29,9 +29,11 @@ first parameter to the function.
 """
 
 import sys
+import threading
 import requests
 from requests.auth import HTTPBasicAuth
 from iotlabcli import helpers
+from iotlabcli import cassette
 # pylint: disable=import-error,no-name-in-module
 # pylint: disable=wrong-import-order
 try:  # pragma: no cover
@@ -67,7 +69,13 @@ except ImportError:
 class Api(object):  # pylint:disable=too-many-public-methods
     """ IoT-Lab REST API """
     _cache = {}
+    _cache_lock = threading.Lock()
     url = helpers.read_custom_api_url() or 'https://www.iot-lab.info/rest/'
+    # Optional 'requests.Session' used by all requests to reuse connections,
+    # or a 'cassette.Cassette' to record or replay requests
+    session = None
+    _session_lock = threading.Lock()
+    _env_session_loaded = False
 
     def __init__(self, username, password):
         """
@@ -76,6 +84,8 @@ class Api(object):  # pylint:disable=too-many-public-methods
         :param url: url of API.
         """
         self.auth = HTTPBasicAuth(username, password)
+        # user profiles by url, replaced when profiles are added or deleted
+        self._profiles = {}
 
     def get_resources(self, list_id=False, site=None, **selections):
         """ Get testbed resources description
@@ -99,6 +109,7 @@ class Api(object):  # pylint:disable=too-many-public-methods
         :type files: dictionnary
         :returns JSONObject
         """
+        helpers.forget_current_experiment(self)
         return self.method('experiments', 'post', files=files)
 
     def get_experiments(self, state='Running', limit=0, offset=0):
@@ -108,6 +119,16 @@ class Api(object):  # pylint:disable=too-many-public-methods
         queryset = 'state=%s&limit=%u&offset=%u' % (state, limit, offset)
         return self.method('experiments?%s' % queryset)
 
+    def iter_experiments(self, state='Running', page_size=100, offset=0,
+                         prefetch=True):
+        """ Iterate on user's experiments, requested `page_size` at a time
+
+        The next page is requested in background if `prefetch`.
+        """
+        def _get_page(page_offset):
+            return self.get_experiments(state, page_size, page_offset)['items']
+        return helpers.iter_pages(_get_page, page_size, offset, prefetch)
+
     def get_experiment_info(self, expid, option=''):
         """ Get user experiment description.
         :param expid: experiment id submission (e.g. OAR scheduler)
@@ -124,7 +145,10 @@ class Api(object):  # pylint:disable=too-many-public-methods
         url = 'experiments/%s' % expid
         if option:
             url += '?%s' % option
-        return self.method(url, raw=(option == 'data'))
+        ret = self.method(url, raw=(option == 'data'))
+        if option == 'state' and ret['state'] in ('Terminated', 'Error'):
+            helpers.forget_experiment_nodes(self, expid)
+        return ret
 
     @classmethod
     def get_any_experiment_state(cls, expid, username):
@@ -142,6 +166,8 @@ class Api(object):  # pylint:disable=too-many-public-methods
 
         :param id: experiment id submission (e.g. OAR scheduler)
         """
+        helpers.forget_current_experiment(self)
+        helpers.forget_experiment_nodes(self, expid)
         return self.method('experiments/%s' % expid, 'delete')
 
     def reload_experiment(self, expid, exp_json=None):
@@ -152,6 +178,7 @@ class Api(object):  # pylint:disable=too-many-public-methods
         :returns JSONObject
         """
         url = 'experiments/%d?reload' % expid
+        helpers.forget_current_experiment(self)
         return self.method(url, 'post', json=exp_json)
 
     # Node commands
@@ -214,21 +241,38 @@ class Api(object):  # pylint:disable=too-many-public-methods
     def get_profiles(self, archi=None):
         """ Get user's list profile description
 
+        Cached until a profile is added or deleted with this Api object.
+
         :returns JSONObject
         """
         url = 'profiles'
         if archi is not None:
             url += '?archi={}'.format(archi)
-        return self.method(url)
+        return self._get_profiles_cached(url)
 
     def get_profile(self, name):
         """ Get user profile description.
 
+        Cached until a profile is added or deleted with this Api object.
+
         :param name: profile name
         :type name: string
         :returns JSONObject
         """
-        return self.method('profiles/%s' % name)
+        return self._get_profiles_cached('profiles/%s' % name)
+
+    def _get_profiles_cached(self, url):
+        """ Get profiles resource from either user profiles cache or rest
+
+        A request concurrent with an invalidation stores its result in the
+        replaced cache, so it is never seen by later calls.
+        """
+        profiles = self._profiles
+        try:
+            return profiles[url]
+        except KeyError:
+            profiles[url] = self.method(url)
+            return profiles[url]
 
     def add_profile(self, name, profile):
         """ Add user profile
@@ -239,8 +283,10 @@ class Api(object):  # pylint:disable=too-many-public-methods
         # dict has no __dict__ and load_profile gives a dict
         # requests wants a 'simple' type like dict
         profile = profile if isinstance(profile, dict) else profile.__dict__
-        ret = self.method('profiles/%s' % name, 'post', json=profile)
-        return ret
+        try:
+            return self.method('profiles/%s' % name, 'post', json=profile)
+        finally:
+            self._profiles = {}
 
     def del_profile(self, name):
         """ Delete user profile
@@ -248,8 +294,10 @@ class Api(object):  # pylint:disable=too-many-public-methods
         :param profile_name: name
         :type profile_name: string
         """
-        ret = self.method('profiles/%s' % name, 'delete')
-        return ret
+        try:
+            return self.method('profiles/%s' % name, 'delete')
+        finally:
+            self._profiles = {}
 
     def check_credential(self):
         """ Check that the credentials are valid """
@@ -315,17 +363,53 @@ class Api(object):  # pylint:disable=too-many-public-methods
                             json=json, files=files)
         if requests.codes.ok == req.status_code:
             return req.content if raw else req.json()
+        if url.startswith('experiments/') and 400 <= req.status_code < 500:
+            # cached current experiment may be the wrong one
+            helpers.forget_current_experiment(self)
         return self._raise_http_error(_url, req)
 
-    @staticmethod
-    def _request(url, method, **kwargs):
+    def get_modified(self, url, validators=None):
+        """Get `url` raw content if modified since `validators` response.
+
+        :param validators: previous response validators, None for no previous
+            response
+        :returns: (content, validators) tuple, content is None if not modified
+        """
+        _url = urljoin(self.url, url)
+        req = self._request(_url, 'get', auth=self.auth,
+                            headers=_conditional_headers(validators or {}))
+        if requests.codes.not_modified == req.status_code:
+            return None, validators
+        if requests.codes.ok == req.status_code:
+            return req.content, _validators(req.headers or {})
+        return self._raise_http_error(_url, req)
+
+    @classmethod
+    def default_session(cls):
+        """ Return the class session
+
+        On first call, it is set to the cassette configured by IOTLAB_CASSETTE*
+        environment variables if any.
+
+        :raises IOError, ValueError: on invalid cassette configuration """
+        with cls._session_lock:
+            if cls.session is None and not cls._env_session_loaded:
+                cls.session = cassette.from_env()
+                cls._env_session_loaded = True
+        return cls.session
+
+    def _request(self, url, method, **kwargs):
         """ Call http `method` on 'url'
 
+        Use the Api object 'session' if set, else the class one.
+
         :param url: url of API.
         :param method: request method
         :param **kwargs: requests.request additional arguments """
+        session = self.session or self.default_session()
+        request = requests.request if session is None else session.request
         try:
-            return requests.request(method, url, **kwargs)
+            return request(method, url, **kwargs)
         except Exception:  # show issue with old requests versions
             raise RuntimeError(sys.exc_info())
 
@@ -361,6 +445,12 @@ class Api(object):  # pylint:disable=too-many-public-methods
         """
         return cls._get_with_cache('experiments?sites')
 
+    @classmethod
+    def clear_cache(cls):
+        """ Forget responses cached by '_get_with_cache' """
+        with cls._cache_lock:
+            cls._cache.clear()
+
     @classmethod
     def _get_with_cache(cls, url):
         """ Get resource from either cache or rest
@@ -369,5 +459,35 @@ class Api(object):  # pylint:disable=too-many-public-methods
         try:
             return cls._cache[url]
         except KeyError:
-            api = cls(None, None)  # unauthenticated request
-            return cls._cache.setdefault(url, api.method(url))
+            # only one thread gets it, others wait for it
+            with cls._cache_lock:
+                if url not in cls._cache:
+                    api = cls(None, None)  # unauthenticated request
+                    cls._cache[url] = api.method(url)
+                return cls._cache[url]
+
+
+# Response header validating a cached content, and the request header sending
+# it back to only get a modified content
+VALIDATORS = (('ETag', 'If-None-Match'),
+              ('Last-Modified', 'If-Modified-Since'))
+
+
+def _validators(headers):
+    """ Return the response `headers` validators
+
+    >>> _validators({'ETag': '"1"', 'Content-Type': 'image/png'})
+    {'ETag': '"1"'}
+    """
+    return dict((header, headers[header]) for header, _ in VALIDATORS
+                if header in headers)
+
+
+def _conditional_headers(validators):
+    """ Return request headers for a previous response `validators`
+
+    >>> _conditional_headers({'ETag': '"1"'})
+    {'If-None-Match': '"1"'}
+    """
+    return dict((cond, validators[header]) for header, cond in VALIDATORS
+                if header in validators)
@@ -21,8 +21,22 @@
 
 """ Implement the 'robot' requests """
 
+import os
+import json
+import time
+import itertools
+from multiprocessing.pool import ThreadPool
+
+import requests
+
+from iotlabcli import cache
+from iotlabcli import helpers
 from iotlabcli.rest import Api
 
+# Robot map files, revalidated with the server before being used
+MAPS_CACHE = cache.DiskCache('robot_maps')
+MAPFILES = {'config': 'mapconfig', 'image': 'mapimage', 'dock': 'dockconfig'}
+
 
 def robot_command(api, command, exp_id, nodes_list=()):
     """ Launch commands ('status',) on nodes_list
@@ -38,6 +52,90 @@ def robot_command(api, command, exp_id, nodes_list=()):
     return result
 
 
+def robot_status_watch(api, exp_id, nodes_list=(), interval=5.0, count=None):
+    """ Iterate on robots status changes, polled every `interval` seconds
+
+    First poll gives all robots status, next ones only the changed fields
+    of changed robots, with their 'network_address'. Removed fields are None.
+
+    :param api: API Rest api object
+    :param exp_id: Target experiment id
+    :param nodes_list: List of nodes where to run command.
+                       Empty list runs on all nodes
+    :param count: number of polls, None to poll until KeyboardInterrupt
+    """
+    try:
+        for delta in _status_deltas(api, exp_id, nodes_list,
+                                    _polls(interval, count)):
+            yield delta
+    except KeyboardInterrupt:
+        return
+
+
+def _status_deltas(api, exp_id, nodes_list, polls):
+    """ Iterate on robots status changes, requested at each poll """
+    previous = {}
+    for _ in polls:
+        current = _status_by_robot(
+            robot_command(api, 'status', exp_id, nodes_list))
+        for delta in status_delta(previous, current):
+            yield delta
+        previous = current
+
+
+def _polls(interval, count=None):
+    """ Iterate `count` times, forever if None, sleeping between each """
+    polls = itertools.count() if count is None else range(count)
+    for poll in polls:
+        if poll:
+            time.sleep(interval)
+        yield poll
+
+
+def _status_by_robot(status):
+    """ Return {network_address: status} from robots status list
+
+    >>> _status_by_robot({'items': [{'network_address': 'm3-1', 'x': 1}]})
+    {'m3-1': {'network_address': 'm3-1', 'x': 1}}
+    >>> _status_by_robot({'m3-1': {'x': 1}})
+    {'m3-1': {'x': 1}}
+    """
+    if isinstance(status, dict) and isinstance(status.get('items'), list):
+        status = status['items']
+    if isinstance(status, list):
+        return dict((robot['network_address'], robot) for robot in status)
+    return status
+
+
+def status_delta(previous, current):
+    """ Iterate on robots changed fields from `previous` to `current` status
+
+    >>> old = {'m3-1': {'battery': 12, 'state': 'Idle'}, 'm3-2': {'x': 3}}
+    >>> new = {'m3-1': {'battery': 11, 'state': 'Idle'}, 'm3-3': {'x': 3}}
+    >>> for delta in status_delta(old, new):
+    ...     print(sorted(delta.items()))
+    [('battery', 11), ('network_address', 'm3-1')]
+    [('network_address', 'm3-2'), ('x', None)]
+    [('network_address', 'm3-3'), ('x', 3)]
+    """
+    for robot in sorted(set(previous) | set(current)):
+        changed = _changed_fields(previous.get(robot, {}),
+                                  current.get(robot, {}))
+        if changed:
+            changed['network_address'] = robot
+            yield changed
+
+
+def _changed_fields(old, new):
+    """ Return `new` fields values different from `old` ones
+
+    >>> sorted(_changed_fields({'a': 1, 'b': 2}, {'a': 1, 'c': 3}).items())
+    [('b', None), ('c', 3)]
+    """
+    return dict((field, new.get(field)) for field in set(old) | set(new)
+                if old.get(field) != new.get(field))
+
+
 def robot_update_mobility(api, exp_id, name, site, nodes_list=()):
     """Update robot mobility 'name [site]' on nodes_list.
 
@@ -52,6 +150,22 @@ def robot_update_mobility(api, exp_id, name, site, nodes_list=()):
     return result
 
 
+def robot_update_mobilities(api, exp_id, mobilities_nodes, timeout=None):
+    """Update robots mobilities with one concurrent request per mobility.
+
+    :param api: API Rest api object
+    :param exp_id: Target experiment id
+    :param mobilities_nodes: {(name, site): nodes_list} mobilities nodes
+    :param timeout: max time in seconds for each request
+    :returns: merged nodes results, failed mobilities 'name,site' in 'errors'
+    """
+    args = dict(('%s,%s' % (name, site), (api, exp_id, name, site, nodes))
+                for (name, site), nodes in mobilities_nodes.items())
+    results, errors = helpers.parallel_map(robot_update_mobility, args,
+                                           timeout)
+    return helpers.merge_results(results, errors)
+
+
 def mobility_command(api, command, arg=None):
     """Run mobility command.
 
@@ -80,11 +194,72 @@ def mobility_command(api, command, arg=None):
 def robot_get_map(site):
     """ Download all robot map files
 
-    Download robot site config, map and docks list """
-    map_cfg = {}
+    Download robot site config, map and docks list concurrently over one
+    session. Files are kept in MAPS_CACHE and only downloaded again if they
+    were modified on the server.
+
+    The map 'image' is a MapFile, its bytes are read on demand. """
+    api = Api(None, None)  # unauthenticated requests
+    session = None if Api.default_session() else requests.Session()
+    api.session = Api.session or session
+    names = sorted(MAPFILES)
+    pool = ThreadPool(len(names))
+    try:
+        values = pool.map(_get_mapfile,
+                          [(api, site, MAPFILES[name]) for name in names])
+    finally:
+        pool.terminate()
+        _close(session)
+    return dict(zip(names, values))
+
+
+def _close(session):
+    """ Close `session` if any """
+    if session is not None:
+        session.close()
+
+
+def _get_mapfile(args):
+    """ Return (api, site, mapfile) mapfile, from cache if not modified """
+    api, site, mapfile = args
+    key = '%s:%s:%s' % (api.url, site, mapfile)
+    url = 'robots/mobility/map/%s?%s' % (site, mapfile)
+
+    content, validators = api.get_modified(url, _cached_validators(key))
+    if content is not None:
+        # validators must never match a previous content
+        MAPS_CACHE.delete(key + ':validators')
+        MAPS_CACHE.set_bytes(key, content)
+        MAPS_CACHE.set(key + ':validators', validators)
+
+    map_file = MapFile(key, content)
+    if mapfile == 'mapimage':
+        return map_file
+    return json.loads(map_file.read().decode('utf-8'))
+
+
+def _cached_validators(key):
+    """ Return `key` cached content validators, None if not cached """
+    if not os.path.exists(MAPS_CACHE.path(key)):
+        return None
+    return MAPS_CACHE.get(key + ':validators')
+
+
+class MapFile(object):  # pylint:disable=too-few-public-methods
+    """ Robot map file content, read from MAPS_CACHE on first 'read()'
+
+    :param key: MAPS_CACHE key
+    :param content: content if already known
+    """
 
-    map_cfg['config'] = Api.get_robot_mapfile(site, 'mapconfig')
-    map_cfg['image'] = Api.get_robot_mapfile(site, 'mapimage')
-    map_cfg['dock'] = Api.get_robot_mapfile(site, 'dockconfig')
+    def __init__(self, key, content=None):
+        self.key = key
+        self._content = content
 
-    return map_cfg
+    def read(self):
+        """ Return map file bytes """
+        if self._content is None:
+            self._content = MAPS_CACHE.get_bytes(self.key)
+        if self._content is None:
+            raise IOError('Robot map file %r not in cache' % self.key)
+        return self._content
@@ -0,0 +1,163 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Nodes selection by coordinates
+
+Nodes of a site are selected with a geometric query on their coordinates:
+
+    * 'near=100:5'          nodes within 5 meters of node 100
+    * 'near=a8-12:3.5'      nodes within 3.5 meters of node 'a8-12'
+    * 'box=0:0:10:20'       nodes with 0 <= x <= 10 and 0 <= y <= 20
+    * 'box=0:0:0:10:20:2'   same with 0 <= z <= 2
+
+Coordinates come from the local resources index, queries use its site x, y
+SQL index so only the nodes in the queried area bounding box are read.
+"""
+
+import math
+
+from iotlabcli import helpers
+from iotlabcli import resources_index
+
+QUERIES = ('near', 'box')
+
+
+def is_spatial_selection(nodes_str):
+    """ Return if nodes_str is a geometric query
+
+    >>> is_spatial_selection('near=100:5'), is_spatial_selection('1-5+7')
+    (True, False)
+    """
+    return nodes_str.split('=', 1)[0] in QUERIES
+
+
+def _point(resource):
+    """ Return resource (x, y, z) coordinates, z defaults to 0
+
+    >>> _point({'x': '1.5', 'y': '2', 'z': ''})
+    (1.5, 2.0, 0.0)
+    >>> _point({'x': '1.5', 'y': None}) is None
+    True
+    """
+    coords = [resources_index.coordinate(resource.get(axis))
+              for axis in ('x', 'y', 'z')]
+    if None in coords[:2]:
+        return None
+    return tuple(c or 0.0 for c in coords)
+
+
+def _distance(point_a, point_b):
+    """ Euclidean distance
+
+    >>> _distance((0, 0, 0), (3, 4, 0))
+    5.0
+    """
+    return math.sqrt(sum((a - b) ** 2 for a, b in zip(point_a, point_b)))
+
+
+class SpatialSelection(object):
+    """ `archi` nodes of `site` matching a geometric query
+
+    Nodes are resolved with `nodes(api)` as coordinates need the resources.
+    """
+
+    def __init__(self, site, archi, nodes_str):
+        self.site = site
+        self.archi = archi
+        self.query, _, params = nodes_str.partition('=')
+        self.params = params.split(':')
+        self._check_params()
+
+    def _check_params(self):
+        """ Check query parameters count and values
+
+        :raises ValueError: on invalid parameters
+        """
+        counts = {'near': (2,), 'box': (4, 6)}[self.query]
+        numbers = self.params[1:] if self.query == 'near' else self.params
+        if len(self.params) not in counts or not all(
+                resources_index.coordinate(n) is not None for n in numbers):
+            raise ValueError('Invalid nodes selection: %s' % self.nodes_str())
+
+    def __repr__(self):
+        return '%s(%r, %r, %r)' % (type(self).__name__, self.site,
+                                   self.archi, self.nodes_str())
+
+    def nodes_str(self):
+        """ Return the selection nodes string """
+        return '%s=%s' % (self.query, ':'.join(self.params))
+
+    def nodes(self, api, index=None):
+        """ Return selected nodes addresses, sorted
+
+        :param index: ResourcesIndex, default one if not given
+        :raises ValueError: if no nodes match, as an empty nodes list
+            means all the experiment nodes
+        """
+        index = index or resources_index.ResourcesIndex()
+        index.refresh(api, self.site)
+        addresses = getattr(self, '_' + self.query)(index)
+        prefix = '%s-' % self.archi
+        nodes = sorted((addr for addr in addresses if addr.startswith(prefix)),
+                       key=helpers.node_url_sort_key)
+        if not nodes:
+            raise ValueError('No %s nodes in %s matching %s' %
+                             (self.archi, self.site, self.nodes_str()))
+        return nodes
+
+    def _near(self, index):
+        """ Nodes within radius of reference node """
+        ref, radius = self.params
+        if ref.isdigit():
+            ref = '%s-%s' % (self.archi, ref)
+        center = _point(index.node(self.site, ref) or {})
+        if center is None:
+            raise ValueError('Unknown node coordinates: %s.%s' %
+                             (ref, self.site))
+        radius = float(radius)
+        mins = [val - radius for val in center]
+        maxs = [val + radius for val in center]
+        return [address for point, address in _points(index, self.site,
+                                                      mins, maxs)
+                if _distance(point, center) <= radius]
+
+    def _box(self, index):
+        """ Nodes in bounding box, z is checked if given """
+        values = [float(p) for p in self.params]
+        half = len(values) // 2
+        mins, maxs = values[:half], values[half:]
+        return [address for point, address in _points(index, self.site,
+                                                      mins, maxs)
+                if all(low <= val <= high for low, val, high in
+                       zip(mins, point, maxs))]
+
+
+def _points(index, site, mins, maxs):
+    """ Return (point, address) of `site` nodes in [mins, maxs] x, y area """
+    return [(_point(res), res['network_address'])
+            for res in index.area(site, mins, maxs)]
+
+
+def resolve_nodes(api, nodes):
+    """ Return nodes list, SpatialSelection are resolved with api """
+    if isinstance(nodes, SpatialSelection):
+        return nodes.nodes(api)
+    return nodes
@@ -149,3 +149,17 @@ class TestAssociation(unittest.TestCase):
         assoc = assocclass('test.elf', ['m3-1', 'm3-2', 'm3-3'])
         with self.assertRaises(AttributeError):
             assoc.update()
+
+    def test_class_cache(self):
+        """Test association classes are created once with slots."""
+        assocclass = associations._Association.for_key_value(
+            'firmware', 'nodes', helpers.node_url_sort_key)
+        self.assertTrue(assocclass is associations._Association.for_key_value(
+            'firmware', 'nodes', helpers.node_url_sort_key))
+        self.assertFalse(assocclass is associations._Association.for_key_value(
+            'firmware', 'nodes'))
+
+        assoc = assocclass('test.elf', ['m3-2', 'm3-1'])
+        self.assertEqual(('firmwarename', 'nodes'), assocclass.__slots__)
+        self.assertEqual({'firmwarename': 'test.elf',
+                          'nodes': ['m3-1', 'm3-2']}, assoc.__dict__)
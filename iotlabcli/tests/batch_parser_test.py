@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Test the iotlabcli.parser.batch module """
+
+import os
+import json
+
+import iotlabcli.parser.batch as batch_parser
+from iotlabcli.tests.my_mock import MainMock
+
+from .c23 import patch, StringIO
+
+# pylint: disable=too-many-public-methods
+
+
+def _node_command(api, command, *_):  # pylint:disable=unused-argument
+    """ Fake node_command, 'stop' fails """
+    if command == 'stop':
+        raise ValueError('stop failed')
+    return {command: ['m3-1']}
+
+
+@patch('iotlabcli.node.node_command')
+@patch('iotlabcli.parser.common.list_nodes')
+class TestMainBatchParser(MainMock):
+    """ Test iotlab-batch main parser """
+
+    def _ops_file(self, *operations):
+        path = os.path.join(self.cache_dir, 'ops.ndjson')
+        with open(path, 'w') as ops_file:
+            ops_file.write('# comment\n\n')
+            for operation in operations:
+                ops_file.write(json.dumps(operation) + '\n')
+        return path
+
+    def _main(self, args):
+        with patch('sys.stdout', StringIO()) as stdout:
+            batch_parser.main(args)
+        return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    def test_main(self, list_nodes, node_command):
+        """ Run the parser.batch.main function """
+        list_nodes.return_value = []
+        node_command.side_effect = _node_command
+
+        path = self._ops_file(
+            {'id': 'reset', 'command': 'node', 'args': ['--reset'],
+             'after': ['start']},
+            {'id': 'start', 'command': 'node', 'args': ['--start']},
+            {'command': 'sleep', 'args': ['0']},
+            {'id': 'stop', 'command': 'node', 'args': ['--stop', '-i', '12']},
+            {'id': 'never', 'command': 'node', 'args': ['--start'],
+             'after': ['stop']})
+
+        lines = self._main([path])
+        self.assertEqual(5, len(lines))
+        self.assertEqual({
+            'start': {'id': 'start', 'result': {'start': ['m3-1']}},
+            '5': {'id': '5', 'result': {'sleep': 0.0}},
+            'stop': {'id': 'stop', 'error': 'ValueError: stop failed'},
+            'reset': {'id': 'reset', 'result': {'reset': ['m3-1']}},
+            'never': {'id': 'never', 'error': 'Dependency failed'},
+        }, dict((line['id'], line) for line in lines))
+        ids = [line['id'] for line in lines]
+        self.assertLess(ids.index('start'), ids.index('reset'))
+
+        # Experiment resolved once, given ids are kept
+        node_command.assert_any_call(self.api, 'start', 123, [], None)
+        node_command.assert_any_call(self.api, 'stop', 12, [], None)
+
+    def test_main_scheduling(self, list_nodes, node_command):
+        """ Operations start as soon as their own dependencies are done """
+        path = self._ops_file(
+            {'id': 'slow', 'command': 'sleep', 'args': ['0.5']},
+            {'id': 1, 'command': 'sleep', 'args': ['0']},
+            {'id': 'next', 'command': 'sleep', 'args': ['0'], 'after': [1]})
+
+        lines = self._main([path, '--workers', '2'])
+        # 'next' does not wait for 'slow' which is not one of its dependencies
+        self.assertEqual(['1', 'next', 'slow'],
+                         [line['id'] for line in lines])
+        self.assertFalse(node_command.called)
+        self.assertFalse(list_nodes.called)
+
+    def test_main_errors(self, list_nodes, node_command):
+        """ Invalid operations are rejected before running """
+        invalid = [
+            [{'id': 'a', 'command': 'unknown'}],
+            [{'id': 'a', 'command': 'node', 'args': ['--invalid']}],
+            [{'id': 'a', 'command': 'sleep', 'args': ['1']},
+             {'id': 'a', 'command': 'sleep', 'args': ['1']}],
+            [{'id': 'a', 'command': 'sleep', 'args': ['1'], 'after': ['b']}],
+            [{'id': 'a', 'command': 'sleep', 'args': ['1'], 'after': ['b']},
+             {'id': 'b', 'command': 'sleep', 'args': ['1'], 'after': ['a']}],
+        ]
+        for operations in invalid:
+            self.assertRaises(SystemExit, self._main,
+                              [self._ops_file(*operations)])
+        for line in ('["node", "--reset"]', '{"id": "a",'):
+            with self.assertRaises(ValueError) as context:
+                batch_parser.Operation.from_line(line, 3)
+            self.assertIn('Line 3: ', str(context.exception))
+        self.assertFalse(node_command.called)
+        self.assertFalse(list_nodes.called)
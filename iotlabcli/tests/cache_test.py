@@ -0,0 +1,84 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Test the iotlabcli.cache module """
+
+import os
+
+from iotlabcli import cache
+from iotlabcli.tests.my_mock import CacheDirMock
+
+from .c23 import patch
+
+
+class TestDiskCache(CacheDirMock):
+    """ Test iotlabcli.cache.DiskCache """
+
+    def test_get_set_delete(self):
+        """ Test setting, getting and deleting values """
+        disk_cache = cache.DiskCache('test')
+        self.assertEqual(disk_cache.get('key'), None)
+        self.assertEqual(disk_cache.get('key', 'default'), 'default')
+
+        disk_cache.set('key', {'value': [1, 2]})
+        self.assertEqual(disk_cache.get('key'), {'value': [1, 2]})
+        self.assertTrue(disk_cache.path('key').startswith(self.cache_dir))
+
+        # Other cache with the same name shares values
+        self.assertEqual(cache.DiskCache('test').get('key'),
+                         {'value': [1, 2]})
+        self.assertEqual(cache.DiskCache('other').get('key'), None)
+
+        disk_cache.delete('key')
+        self.assertEqual(disk_cache.get('key'), None)
+        disk_cache.delete('key')
+
+    def test_bytes(self):
+        """ Test setting and getting bytes values """
+        disk_cache = cache.DiskCache('test')
+        self.assertEqual(disk_cache.get_bytes('key'), None)
+        self.assertEqual(disk_cache.set_bytes('key', b'\x89PNG'), b'\x89PNG')
+        self.assertEqual(disk_cache.get_bytes('key'), b'\x89PNG')
+
+        disk_cache.ttl = -1
+        self.assertEqual(disk_cache.get_bytes('key', b''), b'')
+
+    def test_ttl(self):
+        """ Test values expire after ttl """
+        disk_cache = cache.DiskCache('test', ttl=10)
+        disk_cache.set('key', 'value')
+        self.assertEqual(disk_cache.get('key'), 'value')
+
+        now = os.path.getmtime(disk_cache.path('key'))
+        with patch('time.time', return_value=now + 11):
+            self.assertEqual(disk_cache.get('key'), None)
+
+    def test_invalid_files(self):
+        """ Test invalid or unwritable cache are cache misses """
+        disk_cache = cache.DiskCache('test')
+        disk_cache.set('key', 'value')
+        with open(disk_cache.path('key'), 'w') as cache_fd:
+            cache_fd.write('{invalid')
+        self.assertEqual(disk_cache.get('key'), None)
+
+        with patch('os.makedirs', side_effect=OSError(13, 'Denied')):
+            self.assertEqual(cache.DiskCache('new').set('key', 1), 1)
+        self.assertEqual(cache.DiskCache('new').get('key'), None)
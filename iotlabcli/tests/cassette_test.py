@@ -0,0 +1,117 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Test the iotlabcli.cassette module """
+
+import os
+import time
+
+from iotlabcli import cassette
+from iotlabcli import rest
+from iotlabcli.parser import node as node_parser
+from iotlabcli.helpers import json_dumps
+from iotlabcli.tests.my_mock import CacheDirMock, RequestRet
+
+from .c23 import patch, Mock, StringIO
+
+
+class TestCassette(CacheDirMock):
+    """ Test iotlabcli.cassette.Cassette """
+
+    def setUp(self):
+        CacheDirMock.setUp(self)
+        self.path = os.path.join(self.cache_dir, 'cassette.json')
+        self.api = rest.Api('user', 'password')
+
+    def _record(self):
+        """ Record requests using a fake transport """
+        responses = [
+            RequestRet(200, content=json_dumps({'state': 'Waiting'})),
+            RequestRet(200, content=json_dumps({'state': 'Running'})),
+            RequestRet(200, content=json_dumps({'id': 123})),
+            RequestRet(404, content='Not found'),
+        ]
+        transport = Mock(side_effect=responses)
+        recorder = cassette.Cassette(self.path, 'record', transport=transport)
+        with patch.object(rest.Api, 'session', recorder):
+            self.api.get_experiment_info(123, 'state')
+            self.api.get_experiment_info(123, 'state')
+            self.api.submit_experiment({'new_exp.json': '{"name": "exp"}'})
+            self.assertRaises(rest.HTTPError, self.api.get_profile, 'prof')
+        self.assertEqual(4, transport.call_count)
+
+    def test_record_replay(self):
+        """ Test recording then replaying requests """
+        self._record()
+        self.assertNotIn('password', open(self.path).read())
+
+        player = cassette.Cassette(self.path, latency=0.05)
+        with patch.object(rest.Api, 'session', player):
+            # Not in recorded order
+            self.assertRaises(rest.HTTPError, self.api.get_profile, 'prof')
+            self.assertEqual({'id': 123}, self.api.submit_experiment(
+                {'new_exp.json': '{"name": "exp"}'}))
+
+            # Same request replayed in order
+            start = time.time()
+            self.assertEqual({'state': 'Waiting'},
+                             self.api.get_experiment_info(123, 'state'))
+            self.assertEqual({'state': 'Running'},
+                             self.api.get_experiment_info(123, 'state'))
+            self.assertGreaterEqual(time.time() - start, 0.1)
+
+            # No more recorded responses, or different data
+            self.assertRaises(RuntimeError, self.api.get_experiment_info,
+                              123, 'state')
+            self.assertRaises(RuntimeError, self.api.submit_experiment,
+                              {'new_exp.json': '{"name": "other"}'})
+
+    def test_from_env(self):
+        """ Test creating cassette from environment """
+        self.assertIsNone(cassette.from_env({}))
+        self._record()
+        player = cassette.from_env({'IOTLAB_CASSETTE': self.path,
+                                    'IOTLAB_CASSETTE_LATENCY': '0.5'})
+        self.assertEqual(('replay', 0.5), (player.mode, player.latency))
+        self.assertEqual(4, len(player.interactions))
+
+        self.assertRaises(ValueError, cassette.from_env, {
+            'IOTLAB_CASSETTE': self.path, 'IOTLAB_CASSETTE_MODE': 'invalid'})
+
+    @patch.object(rest.Api, 'session', None)
+    @patch.object(rest.Api, '_env_session_loaded', False)
+    def test_api_env_session(self):
+        """ Test Api cassette from environment, created on first request """
+        environ = {'IOTLAB_CASSETTE': self.path + '.missing'}
+        with patch.dict(os.environ, environ):
+            self.assertRaises(IOError, self.api.get_experiment_info, 123)
+            # node commands report it as a cli error
+            with patch('sys.stderr', StringIO()) as stderr:
+                self.assertRaises(SystemExit, node_parser.main,
+                                  ['-u', 'user', '-p', 'password',
+                                   '--reset', '-i', '123'])
+            self.assertIn(self.path + '.missing', stderr.getvalue())
+
+        self._record()
+        with patch.dict(os.environ, {'IOTLAB_CASSETTE': self.path}):
+            self.assertEqual({'state': 'Waiting'},
+                             self.api.get_experiment_info(123, 'state'))
+        self.assertIsInstance(rest.Api.session, cassette.Cassette)
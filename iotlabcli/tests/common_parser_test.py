@@ -25,16 +25,18 @@
 import unittest
 import sys
 import argparse
+import warnings
 
+from iotlabcli.helpers import json_dumps
 from iotlabcli.parser import common
-from iotlabcli.tests.my_mock import api_mock, api_mock_stop
+from iotlabcli.tests.my_mock import api_mock, api_mock_stop, CacheDirMock
 
 from .c23 import HTTPError, patch, Mock, StringIO
 
 BUILTIN = 'builtins' if sys.version_info[0] == 3 else '__builtin__'
 
 
-class TestCommonParser(unittest.TestCase):
+class TestCommonParser(CacheDirMock):
     """ Test the iotlab.parser.common module """
 
     @patch('iotlabcli.rest.Api.method')
@@ -141,11 +143,145 @@ class TestCommonParser(unittest.TestCase):
             common.main_cli(function, parser, args)
             mock_print.assert_called_with(nodes_list_ret)
 
+    def test_main_cli_output(self):
+        """ Run main_cli with --output compact and ndjson """
+        function = Mock(return_value={'items': [{'id': 2, 'state': 'Running'},
+                                                {'id': 1, 'state': None}]})
+        parser = common.base_parser()
+
+        with patch('sys.stdout', StringIO()) as stdout:
+            common.main_cli(function, parser, ['--output', 'compact'])
+            self.assertEqual(stdout.getvalue(),
+                             '{"items":[{"id":2,"state":"Running"},'
+                             '{"id":1,"state":null}]}\n')
+
+        with patch('sys.stdout', StringIO()) as stdout:
+            common.main_cli(function, parser, ['--output', 'ndjson'])
+            self.assertEqual(stdout.getvalue(),
+                             '{"id":2,"state":"Running"}\n'
+                             '{"id":1,"state":null}\n')
+
+        # Applied after jmespath query
+        with patch('sys.stdout', StringIO()) as stdout:
+            common.main_cli(function, parser, ['--output', 'ndjson',
+                                               '--jp', 'items[].id'])
+            self.assertEqual(stdout.getvalue(), '2\n1\n')
+
+        self.assertRaises(SystemExit, common.main_cli, function, parser,
+                          ['--output', 'unknown'])
+
+    def test_main_cli_named_format(self):
+        """ Run main_cli with --format named formatters """
+        function = Mock(return_value={'items': [
+            {'network_address': 'm3-1.grenoble.iot-lab.info', 'x': 1},
+            {'network_address': 'm3-2.grenoble.iot-lab.info', 'x': None},
+        ]})
+        parser = common.base_parser()
+
+        with patch('sys.stdout', StringIO()) as stdout:
+            common.main_cli(function, parser, ['--format', 'csv'])
+            self.assertEqual(stdout.getvalue(),
+                             'network_address,x\n'
+                             'm3-1.grenoble.iot-lab.info,1\n'
+                             'm3-2.grenoble.iot-lab.info,\n')
+
+        with patch('sys.stdout', StringIO()) as stdout:
+            common.main_cli(function, parser, ['--fmt', 'short-nodes'])
+            self.assertEqual(stdout.getvalue(), 'grenoble,m3,1-2\n')
+
+        # Python expressions with explicit prefix
+        with warnings.catch_warnings(record=True) as warn:
+            self.assertEqual(common.format_function_from_str('python:str'),
+                             str)
+        self.assertEqual([], warn)
+
+        # Not prefixed, deprecated but still evaluated
+        with warnings.catch_warnings(record=True) as warn:
+            self.assertEqual(common.format_function_from_str('str'), str)
+        self.assertEqual(1, len(warn))
+        self.assertTrue(issubclass(warn[-1].category, DeprecationWarning))
+        self.assertIn("'python:str'", str(warn[-1].message))
+
+        # Invalid expressions are cli errors
+        with patch('sys.stderr', StringIO()) as stderr:
+            self.assertRaises(SystemExit, common.main_cli, function, parser,
+                              ['--fmt', 'python:unknown_function'])
+            self.assertIn("invalid format", stderr.getvalue())
+
+    def test_jmespath_compile_cache(self):
+        """ Test jmespath expressions compiled once """
+        expression = "items[?archi=='m3'].network_address"
+        result = {'items': [{'archi': 'm3', 'network_address': 'm3-1'},
+                            {'archi': 'a8', 'network_address': 'a8-1'}]}
+
+        compiled = common.jmespath_compile(expression)
+        with patch('jmespath.compile') as jp_compile:
+            cached = common.jmespath_compile(expression)
+            self.assertFalse(jp_compile.called)
+        self.assertIs(cached, compiled)
+        self.assertEqual(cached.search(result), ['m3-1'])
+
+        self.assertRaises(ValueError, common.jmespath_compile, 'items[')
+
+    def test_main_cli_jmespath_items(self):
+        """ Run main_cli with --jmespath-items """
+        function = Mock(return_value={'items': [
+            {'archi': 'm3', 'network_address': 'm3-1'},
+            {'archi': 'a8', 'network_address': 'a8-1'},
+            {'archi': 'm3', 'network_address': 'm3-2'},
+        ]})
+        parser = common.base_parser()
+        query = "archi=='m3' && network_address || null"
+
+        with patch('sys.stdout', StringIO()) as stdout:
+            common.main_cli(function, parser, ['--jpi', query,
+                                               '--output', 'ndjson'])
+            self.assertEqual(stdout.getvalue(), '"m3-1"\n"m3-2"\n')
+
+        with patch('sys.stdout', StringIO()) as stdout:
+            common.main_cli(function, parser, ['--jpi', query,
+                                               '--output', 'compact'])
+            self.assertEqual(stdout.getvalue(), '["m3-1","m3-2"]\n')
+
+        with patch('sys.stdout', StringIO()) as stdout:
+            common.main_cli(function, parser, ['--jpi', query,
+                                               '--format', 'short-nodes'])
+            self.assertEqual(stdout.getvalue(), ',m3,1-2\n')
+
+    def test_main_cli_items_iterator(self):
+        """ Run main_cli with an 'items' iterator, same output as list """
+        items = [{'id': 1}, {'id': 2}]
+        parser = common.base_parser()
+        outputs = {
+            ('--output', 'json'): json_dumps({'items': items}) + '\n',
+            ('--jp', 'items[].id'): '[\n    1,\n    2\n]\n',
+            ('--output', 'compact'): '{"items":[{"id":1},{"id":2}]}\n',
+            ('--output', 'ndjson'): '{"id":1}\n{"id":2}\n',
+            ('--fmt', 'ids-only'): '1\n2\n',
+        }
+        for args, output in outputs.items():
+            function = Mock(return_value={'items': (i for i in items)})
+            with patch('sys.stdout', StringIO()) as stdout:
+                common.main_cli(function, parser, list(args))
+            self.assertEqual(output, stdout.getvalue())
+
+    def test_print_result_stream_sigpipe(self):
+        """ Test BrokenPipe silent handling when streaming output """
+        result = {'items': [{'ret': 0}]}
+        with patch('sys.stdout') as stdout:
+            stdout.write.side_effect = IOError(32, 'Broken pipe')
+            common.print_result(result, output='ndjson')
+
+            stdout.write.side_effect = IOError(28, 'No space left on device')
+            self.assertRaises(IOError, common.print_result, result,
+                              output='compact')
+
 
-class TestNodeSelectionParser(unittest.TestCase):
+class TestNodeSelectionParser(CacheDirMock):
     """ Test the common '-l' '-e' options node selection parser """
     def tearDown(self):
         api_mock_stop()
+        CacheDirMock.tearDown(self)
 
     @patch('iotlabcli.parser.common._get_experiment_nodes_list')
     def test_list_nodes(self, g_nodes_list):
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Test the iotlabcli.parser.daemon module """
+
+import os
+import sys
+import errno
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+import iotlabcli.parser.daemon as daemon
+from iotlabcli import rest
+from .c23 import patch, Mock, StringIO
+
+# pylint: disable=missing-docstring,too-many-public-methods
+
+
+def _command(args):
+    """ Fake iotlab-<command> main """
+    sys.stdout.write('%s %s\n' % (sys.argv[0], ' '.join(args)))
+    if args == ['fail']:
+        sys.exit('failed')
+    if args == ['raise']:
+        raise ValueError('raised')
+
+
+@patch.dict(daemon.COMMANDS, {'test': _command})
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.tmpdir, 'daemon.sock')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        rest.Api.session = None
+
+    def test_run_command(self):
+        """ Run a command with replaced outputs """
+        stdout, stderr = StringIO(), StringIO()
+        ret = daemon.run_command(['test', 'a', 'b'], self.tmpdir,
+                                 stdout, stderr)
+        self.assertEqual(0, ret)
+        self.assertEqual('iotlab-test a b\n', stdout.getvalue())
+        self.assertNotEqual(stdout, sys.stdout)
+
+        ret = daemon.run_command(['test', 'fail'], None, stdout, stderr)
+        self.assertEqual(1, ret)
+        self.assertEqual('failed\n', stderr.getvalue())
+
+        ret = daemon.run_command(['test', 'raise'], None, stdout, stderr)
+        self.assertEqual(1, ret)
+        self.assertIn('ValueError: raised', stderr.getvalue())
+
+        ret = daemon.run_command(['unknown'], None, stdout, stderr)
+        self.assertEqual(2, ret)
+        ret = daemon.run_command([], None, stdout, stderr)
+        self.assertEqual(2, ret)
+
+    def test_client_server(self):
+        """ Run commands through the daemon socket """
+        server = daemon.make_server(self.socket_path)
+        self.assertIsNotNone(rest.Api.session)
+        self.assertEqual(0, os.stat(self.socket_path).st_mode & 0o077)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            # Already running
+            self.assertRaises(RuntimeError, daemon.make_server,
+                              self.socket_path)
+
+            stdout, stderr = StringIO(), StringIO()
+            ret = daemon.client(['test', 'a'], self.socket_path,
+                                stdout, stderr)
+            self.assertEqual(0, ret)
+            self.assertEqual('iotlab-test a\n', stdout.getvalue())
+
+            ret = daemon.client(['test', 'fail'], self.socket_path,
+                                stdout, stderr)
+            self.assertEqual(1, ret)
+            self.assertEqual('failed\n', stderr.getvalue())
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        # Stale socket is removed
+        server = daemon.make_server(self.socket_path)
+        server.server_close()
+
+    @patch('iotlabcli.parser.daemon.run_command')
+    def test_client_main(self, run_command):
+        """ Run command locally when daemon is not running """
+        run_command.return_value = 0
+        with patch('iotlabcli.parser.daemon.SOCKET_PATH', self.socket_path):
+            self.assertRaises(socket.error, daemon.client, ['test'],
+                              self.socket_path)
+            self.assertEqual(0, daemon.client_main(['test', 'a']))
+            run_command.assert_called_with(['test', 'a'])
+
+            # Stale socket, no daemon listening
+            run_command.reset_mock()
+            stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            stale.bind(self.socket_path)
+            stale.close()
+            self.assertEqual(0, daemon.client_main(['test', 'b']))
+            run_command.assert_called_with(['test', 'b'])
+
+    @patch('iotlabcli.parser.daemon.run_command')
+    def test_client_main_errors(self, run_command):
+        """ Never run command here once sent to the daemon """
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        listener.listen(1)
+        # Daemon closes connection before the exit code
+        thread = threading.Thread(target=lambda: listener.accept()[0].close())
+        thread.start()
+        try:
+            with patch('iotlabcli.parser.daemon.SOCKET_PATH',
+                       self.socket_path), \
+                    patch('sys.stderr', StringIO()) as stderr:
+                self.assertEqual(1, daemon.client_main(['test', 'a']))
+        finally:
+            thread.join()
+            listener.close()
+        self.assertIn('iotlab-client: ', stderr.getvalue())
+        self.assertFalse(run_command.called)
+
+        # Other connection errors are reported
+        with patch('iotlabcli.parser.daemon._connect',
+                   Mock(side_effect=socket.error(errno.EACCES, 'denied'))), \
+                patch('sys.stderr', StringIO()):
+            self.assertEqual(1, daemon.client_main(['test', 'a']))
+        self.assertFalse(run_command.called)
+
+        with patch('sys.stdout', StringIO()) as stdout:
+            self.assertEqual(0, daemon.client_main(['--help']))
+        self.assertIn('{admin,auth,', stdout.getvalue())
@@ -30,35 +30,40 @@ from iotlabcli.tests import resource_file
 from iotlabcli.tests.my_mock import MainMock
 import iotlabcli.parser.experiment as experiment_parser
 from iotlabcli import experiment
+from iotlabcli import helpers
 
-from .c23 import patch, StringIO
+from .c23 import HTTPError, Mock, patch, StringIO
 
 
 class TestMainInfoParser(MainMock):
     """Test experiment.parser."""
 
-    def setUp(self):
-        MainMock.setUp(self)
-        experiment.AliasNodes._alias = 0  # pylint:disable=protected-access
-
     @patch('iotlabcli.experiment.info_experiment')
     def test_main_info_parser(self, info_exp):
         """ Run experiment_parser.main.info """
         info_exp.return_value = {}
 
         experiment_parser.main(['info', '--list'])
-        info_exp.assert_called_with(self.api, False)
+        info_exp.assert_called_with(self.api, False, from_index=False)
         experiment_parser.main(['info', '--list-id', '--site', 'grenoble'])
-        info_exp.assert_called_with(self.api, True, site='grenoble')
+        info_exp.assert_called_with(self.api, True, from_index=False,
+                                    site='grenoble')
 
         # Use other selections
         experiment_parser.main(['info', '--list', '--archi', 'm3',
                                 '--state', 'Alive'])
-        info_exp.assert_called_with(self.api, False, archi='m3', state='Alive')
+        info_exp.assert_called_with(self.api, False, from_index=False,
+                                    archi='m3', state='Alive')
 
         experiment_parser.main(['info', '--list-id', '--site', 'lille',
                                 '--archi', 'm3'])
-        info_exp.assert_called_with(self.api, True, site='lille', archi='m3')
+        info_exp.assert_called_with(self.api, True, from_index=False,
+                                    site='lille', archi='m3')
+
+        experiment_parser.main(['info', '--list', '--index',
+                                '--site', 'lille'])
+        info_exp.assert_called_with(self.api, False, from_index=True,
+                                    site='lille')
 
     @patch('iotlabcli.experiment.stop_experiment')
     def test_main_stop_parser(self, stop_exp):
@@ -100,10 +105,31 @@ class TestMainInfoParser(MainMock):
 
         experiment_parser.main(
             ['get', '--list', '--state=Running', '--limit=10', '--offset=50'])
-        get_exp_list.assert_called_with(self.api, 'Running', 10, 50)
+        get_exp_list.assert_called_with(self.api, 'Running', 10, 50, False,
+                                        None)
 
         experiment_parser.main(['get', '--list'])
-        get_exp_list.assert_called_with(self.api, None, 0, 0)
+        get_exp_list.assert_called_with(self.api, None, 0, 0, False, None)
+
+        experiment_parser.main(['get', '--list', '--local'])
+        get_exp_list.assert_called_with(self.api, None, 0, 0, True, None)
+
+        experiment_parser.main(['get', '--list', '--page-size', '20'])
+        get_exp_list.assert_called_with(self.api, None, 0, 0, False, 20)
+
+    def test_main_get_list_page_error(self):
+        """ Run get --list --page-size with a failing page request """
+        for code, message in ((500, 'HTTP Error 500: page failed'),
+                              (401, 'iotlab-auth')):
+            err = HTTPError(None, code, 'page failed', None, None)
+            self.api.iter_experiments.return_value = helpers.iter_pages(
+                Mock(side_effect=[[{'id': 1}, {'id': 2}], err]), 2,
+                prefetch=False)
+            with patch('sys.stdout', StringIO()):
+                with patch('sys.stderr', StringIO()) as stderr:
+                    self.assertRaises(SystemExit, experiment_parser.main,
+                                      ['get', '--list', '--page-size', '2'])
+            self.assertIn(message, stderr.getvalue())
 
     def test_parser_error(self):
         """ Test some parser errors directly """
@@ -170,6 +196,15 @@ class TestMainInfoParser(MainMock):
         submit_exp.assert_called_with(self.api, None, 20, nodes,
                                       None, True, None)
 
+        # Geometric selection resolved with api
+        with patch('iotlabcli.spatial.SpatialSelection.nodes') as sel_nodes:
+            sel_nodes.return_value = ['m3-1.grenoble.iot-lab.info']
+            experiment_parser.main(
+                ['submit', '-p', '-d', '20', '-l', 'grenoble,m3,near=2:1'])
+            sel_nodes.assert_called_with(self.api)
+        submit_exp.assert_called_with(self.api, None, 20, nodes,
+                                      None, True, None)
+
         # Alias tests
         experiment_parser.main([
             'submit', '-d', '20',
@@ -177,7 +212,6 @@ class TestMainInfoParser(MainMock):
             '-l', '2,archi=m3:at86rf231+site=grenoble,firmware.elf,profile1',
             '-l', '3,archi=m3:at86rf231+site=grenoble,firmware_2.elf,profile2',
         ])
-        experiment.AliasNodes._alias = 0  # pylint:disable=protected-access
         resources = [
             experiment.exp_resources(
                 experiment.AliasNodes(1, 'grenoble', 'm3:at86rf231', False),
@@ -431,6 +465,19 @@ class TestMainInfoParser(MainMock):
                                   'grenoble.iot-lab.info',
                                   'strasbourg.iot-lab.info')
 
+    @patch('iotlabcli.experiment.script_experiment_per_site')
+    def test_main_script_per_site(self, script):
+        """ Run experiment_parser.main.script --per-site """
+        script.return_value = {}
+        experiment_parser.main(['script', '--status', 'grenoble',
+                                '--per-site'])
+        script.assert_called_with(self.api, 123, 'status',
+                                  ['grenoble.iot-lab.info'], None)
+
+        experiment_parser.main(['script', '--kill', '--per-site',
+                                '--site-timeout', '10'])
+        script.assert_called_with(self.api, 123, 'kill', [], 10.0)
+
 
 # pylint:disable=protected-access
 class TestAssociationParser(unittest.TestCase):
@@ -32,12 +32,14 @@
 # pylint:disable=attribute-defined-outside-init
 
 import json
+import time
 import unittest
 
 from iotlabcli import experiment
 from iotlabcli import rest
 from iotlabcli import helpers
 from iotlabcli import tests
+from iotlabcli.rest import Api
 from iotlabcli.tests.my_mock import CommandMock, API_RET, RequestRet
 
 from .c23 import mock, patch, mock_open
@@ -83,6 +85,27 @@ class TestExperiment(unittest.TestCase):
         self.assertEqual(2, len(exp.firmwareassociations))
         self.assertEqual(2, len(exp.profileassociations))
 
+    def test_alias_allocation(self):
+        """ Aliases are allocated per experiment, also from threads """
+        shared = experiment.AliasNodes(2, 'grenoble', 'm3:at86rf231')
+        given = experiment.AliasNodes(1, 'lille', 'a8:at86rf231', _alias=2)
+
+        def _experiment_aliases(_):
+            # pylint:disable=protected-access
+            exp = experiment._Experiment('ExpName', 30, None)
+            for nodes in (shared, given, shared):
+                exp.add_exp_resources(experiment.exp_resources(nodes, 'fw'))
+            return ([nodes.alias for nodes in exp.nodes],
+                    exp.firmwareassociations['fw'])
+
+        results, errors = helpers.parallel_map(
+            _experiment_aliases, dict((i, (i,)) for i in range(20)))
+        self.assertEqual({}, errors)
+        self.assertEqual(set([(('1', '2', '3'), ('1', '2', '3'))]),
+                         set((tuple(aliases), tuple(assoc))
+                             for aliases, assoc in results.values()))
+        self.assertTrue(shared.alias is None)
+
 
 class TestExperimentSubmit(CommandMock):
     """ Test iotlabcli.experiment.submit_experiment """
@@ -522,6 +545,62 @@ class TestExperimentScript(CommandMock):
         self.api.script_command.assert_called_with(
             123, 'status', json=['grenoble', 'strasbourg'])
 
+    def test_script_per_site(self):
+        """Test running experiment script with one request per site."""
+        self.api.script_command.side_effect = (
+            lambda exp_id, cmd, files=None, json=None: {'0': json})
+
+        ret = experiment.script_experiment_per_site(
+            self.api, 123, 'status', ['strasbourg', 'grenoble'])
+        self.assertEqual(ret, {'0': ['grenoble', 'strasbourg']})
+        self.assertEqual(2, self.api.script_command.call_count)
+        self.api.script_command.assert_any_call(123, 'status',
+                                                json=['grenoble'])
+
+        # All experiment sites, from the experiment nodes cache
+        self.api.get_experiment_info.reset_mock()
+        self.api.get_experiment_info.return_value = {'items': [
+            {'network_address': 'm3-1.grenoble.iot-lab.info'},
+            {'network_address': 'm3-2.grenoble.iot-lab.info'},
+            {'network_address': 'a8-1.lille.iot-lab.info'},
+        ]}
+        ret = experiment.script_experiment_per_site(self.api, 123, 'kill')
+        self.assertEqual(ret, {'0': ['grenoble.iot-lab.info',
+                                     'lille.iot-lab.info']})
+        experiment.script_experiment_per_site(self.api, 123, 'kill')
+        self.api.get_experiment_info.assert_called_once_with(123, 'resources')
+
+        # Run splits sites associations
+        self.api.script_command.reset_mock()
+        self.api.script_command.side_effect = None
+        self.api.script_command.return_value = {'0': ['site']}
+        experiment.script_experiment_per_site(
+            self.api, 123, 'run',
+            [experiment.site_association(
+                'grenoble', 'lille', script=tests.resource_file('script.sh'))])
+        self.assertEqual(2, self.api.script_command.call_count)
+
+        self.assertRaises(ValueError, experiment.script_experiment_per_site,
+                          self.api, 123, 'unknown_command')
+
+    def test_script_per_site_errors(self):
+        """Test script per site with failing and timeout sites."""
+        def _script_command(_, __, json=None):
+            if json == ['lille']:
+                raise RuntimeError('lille failure')
+            if json == ['paris']:
+                time.sleep(1)
+            return {'0': json}
+        self.api.script_command.side_effect = _script_command
+
+        ret = experiment.script_experiment_per_site(
+            self.api, 123, 'status', ['grenoble', 'lille', 'paris'],
+            timeout=0.1)
+        self.assertEqual(ret['0'], ['grenoble'])
+        self.assertEqual(sorted(ret['errors']), ['lille', 'paris'])
+        self.assertTrue('lille failure' in ret['errors']['lille'])
+        self.assertEqual(ret['errors']['paris'], 'Timeout reached')
+
     def test_script_invalid_cmd(self):
         """Test running experiment script with invalid command."""
         self.assertRaises(ValueError,
@@ -560,6 +639,22 @@ class TestExperimentGet(CommandMock):
         experiment.get_experiments_list(self.api, 'Running', 100, 100)
         self.api.get_experiments.assert_called_with('Running', 100, 100)
 
+    def test_get_experiments_list_pages(self):
+        """ Test experiment.get_experiments_list iterator """
+        exps = [{'id': i} for i in range(10)]
+        api = Api('user', 'password')
+        api.get_experiments = mock.Mock(
+            side_effect=lambda state, limit, offset: {
+                'items': exps[offset:offset + limit]})
+
+        ret = experiment.get_experiments_list(api, 'Running', 0, 1,
+                                              page_size=3)
+        self.assertEqual(exps[1:], list(ret['items']))
+        api.get_experiments.assert_called_with('Running', 3, 10)
+
+        ret = experiment.get_experiments_list(api, None, 4, 0, page_size=3)
+        self.assertEqual(exps[:4], list(ret['items']))
+
     def test_get_experiment(self):
         """ Test experiment.get_experiment """
 
@@ -21,15 +21,21 @@
 
 """ Test the iotlabcli.helpers module """
 # pylint:disable=too-many-public-methods
+# pylint:disable=protected-access
 
 import unittest
 import sys
+import json
+import time
 import warnings
 
 from iotlabcli import helpers
+from iotlabcli import experiment
+from iotlabcli import profile
+from iotlabcli.rest import Api
 from iotlabcli.tests import my_mock
 
-from .c23 import patch
+from .c23 import patch, Mock
 
 
 class TestHelpers(unittest.TestCase):
@@ -59,6 +65,25 @@ class TestHelpers(unittest.TestCase):
             self.assertEqual(234, helpers.get_current_experiment(
                 api, None, running_only=False))
 
+    def test_iter_pages_prefetch(self):
+        """ Test iter_pages requests next page before it is consumed """
+        requested = []
+
+        def _get_page(offset):
+            requested.append(offset)
+            return list(range(offset, min(offset + 2, 5)))
+
+        pages = helpers.iter_pages(_get_page, 2)
+        self.assertEqual([0, 1], [next(pages), next(pages)])
+        time.sleep(0.1)
+        self.assertEqual([0, 2], requested)
+        self.assertEqual([2, 3, 4], list(pages))
+        self.assertEqual([0, 2, 4], requested)
+
+        # Errors are raised when page is consumed
+        pages = helpers.iter_pages(Mock(side_effect=ValueError), 2)
+        self.assertRaises(ValueError, list, pages)
+
     @patch('sys.stderr', sys.stdout)
     @patch('iotlabcli.helpers.read_file')
     def test_read_custom_api_url(self, read_file_mock):
@@ -102,6 +127,58 @@ class TestHelpers(unittest.TestCase):
                         in str(warn[-1].message))
 
 
+class _LegacyEncoder(json.JSONEncoder):
+    """ Previous 'json_dumps' encoder, serializing objects '__dict__' """
+    def default(self, o):  # pylint: disable=method-hidden
+        return o.__dict__
+
+
+class TestJsonDumps(unittest.TestCase):
+    """ Test helpers.json_dumps """
+
+    @staticmethod
+    def _legacy_dumps(obj):
+        """ Dumps with the previous 'json_dumps' """
+        return json.dumps(obj, cls=_LegacyEncoder, sort_keys=True, indent=4)
+
+    def test_experiment(self):
+        """ Experiments are dumped as before 'to_json_obj' """
+        nodes = ['m3-%u.grenoble.iot-lab.info' % num for num in (3, 1, 20)]
+        exp = experiment._Experiment('exp', 20, 1234)
+        exp.add_exp_resources(experiment.exp_resources(
+            nodes[:2], 'tuto.elf', 'prof', mobility='circle'))
+        exp.add_exp_resources(experiment.exp_resources(
+            nodes[2:], '/tmp/tuto.elf', 'other'))
+        exp.add_site_association(experiment.site_association(
+            'grenoble', script='script.sh'))
+        self.assertEqual(self._legacy_dumps(exp), helpers.json_dumps(exp))
+
+        alias = experiment._Experiment('alias', 10)
+        alias.add_exp_resources(experiment.exp_resources(
+            experiment.AliasNodes(2, 'lille', 'm3:at86rf231', True), None))
+        alias.profiles = {'prof': profile.ProfileM3('prof', 'dc')}
+        self.assertEqual(self._legacy_dumps(alias), helpers.json_dumps(alias))
+
+    def test_fast_dumps_function(self):
+        """ Optional backend is used only if it gives the same output """
+        ujson = Mock()
+        ujson.dumps.side_effect = (
+            lambda obj, escape_forward_slashes, **kwargs:
+            json.dumps(obj, **kwargs))
+        with patch.dict(sys.modules, {'ujson': ujson}):
+            dumps = helpers._fast_dumps_function()
+            self.assertEqual(helpers._INDENT_ENCODER.encode([1]), dumps([1]))
+
+            ujson.dumps.side_effect = lambda obj, **_: json.dumps(obj)
+            self.assertTrue(helpers._fast_dumps_function() is None)
+
+            ujson.dumps.side_effect = TypeError
+            self.assertTrue(helpers._fast_dumps_function() is None)
+
+        with patch.dict(sys.modules, {'ujson': None}):
+            self.assertTrue(helpers._fast_dumps_function() is None)
+
+
 class TestFilesDict(unittest.TestCase):
     """Test FilesDict class."""
 
@@ -152,3 +229,69 @@ class TestFilesDict(unittest.TestCase):
         self.assertEqual(file_dict,
                          {'1.elf': b'ELF32_1', '2.elf': b'ELF32_2',
                           'prof.json': b'{}', })
+
+
+class TestCurrentExperimentCache(my_mock.CacheDirMock):
+    """ Test the current experiment cache """
+
+    @patch('iotlabcli.helpers.exps_by_states_dict')
+    def test_get_current_experiment_cache(self, exps_m):
+        """ Test get_current_experiment uses cached value """
+        api = Api('user', 'password')
+        exps_m.return_value = {'Running': [234]}
+        self.assertEqual(234, helpers.get_current_experiment(api))
+        self.assertEqual(234, helpers.get_current_experiment(api))
+        self.assertEqual(1, exps_m.call_count)
+
+        # cached per states and per user
+        exps_m.return_value = {'Running': [235]}
+        self.assertEqual(235, helpers.get_current_experiment(
+            api, running_only=False))
+        self.assertEqual(235, helpers.get_current_experiment(
+            Api('other', 'password')))
+        self.assertEqual(3, exps_m.call_count)
+
+        # Invalidated
+        helpers.forget_current_experiment(api)
+        self.assertEqual(235, helpers.get_current_experiment(api))
+        self.assertEqual(4, exps_m.call_count)
+
+        # Expired
+        with patch.object(helpers.CURRENT_EXPERIMENT_CACHE, 'ttl', -1):
+            helpers.get_current_experiment(api)
+        self.assertEqual(5, exps_m.call_count)
+
+
+class TestExperimentNodesCache(my_mock.CacheDirMock):
+    """ Test the experiment nodes cache """
+
+    def test_experiment_nodes(self):
+        """ Test experiment_nodes memory and disk cache """
+        nodes = ['m3-1.grenoble.iot-lab.info', 'm3-2.grenoble.iot-lab.info']
+        api = Api('user', 'password')
+        api.get_experiment_info = Mock(return_value={'items': [
+            {'network_address': node} for node in nodes]})
+
+        self.assertEqual(nodes, helpers.experiment_nodes(api, 123))
+        self.assertEqual(nodes, helpers.experiment_nodes(api, 123))
+        self.assertEqual(1, api.get_experiment_info.call_count)
+        api.get_experiment_info.assert_called_with(123, 'resources')
+
+        # From disk in another process
+        with patch.dict('iotlabcli.helpers._EXPERIMENT_NODES', clear=True):
+            self.assertEqual(nodes, helpers.experiment_nodes(api, 123))
+        self.assertEqual(1, api.get_experiment_info.call_count)
+
+        # Terminated
+        api.method = Mock(return_value={'state': 'Terminated'})
+        Api.get_experiment_info(api, 123, 'state')
+        api.get_experiment_info.return_value = {'items': [
+            {'network_address': nodes[0]}]}
+        self.assertEqual(nodes[:1], helpers.experiment_nodes(api, 123))
+
+        # Not allocated nodes are not cached
+        api.get_experiment_info.return_value = {'items': [
+            {'network_address': ''}]}
+        self.assertEqual([''], helpers.experiment_nodes(api, 124))
+        self.assertEqual([''], helpers.experiment_nodes(api, 124))
+        self.assertEqual(4, api.get_experiment_info.call_count)
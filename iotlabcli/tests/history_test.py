@@ -0,0 +1,91 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Test the iotlabcli.history module """
+
+from iotlabcli import experiment
+from iotlabcli.history import ExperimentsHistory
+from iotlabcli.rest import Api
+from iotlabcli.tests.my_mock import CacheDirMock
+
+from .c23 import Mock
+
+
+class ServerExperiments(object):  # pylint:disable=too-few-public-methods
+    """ Mock of Api.get_experiments on `experiments`, newest first """
+
+    def __init__(self, experiments):
+        self.experiments = experiments
+        self.calls = []
+
+    def __call__(self, state, limit, offset):
+        self.calls.append(offset)
+        return {'items': self.experiments[offset:offset + limit]}
+
+
+def _exps(first, last, state='Terminated'):
+    """ Return experiments from `last` id to `first` """
+    return [{'id': i, 'state': state, 'name': 'exp_%u' % i}
+            for i in range(last, first - 1, -1)]
+
+
+class TestExperimentsHistory(CacheDirMock):
+    """ Test iotlabcli.history.ExperimentsHistory """
+
+    def setUp(self):
+        CacheDirMock.setUp(self)
+        self.api = Api('user', 'password')
+        self.server = ServerExperiments(_exps(1, 25))
+        self.api.get_experiments = Mock(side_effect=self.server)
+        self.history = ExperimentsHistory(page_size=10, prefetch=False)
+
+    def test_sync(self):
+        """ Test incremental synchronization """
+        self.assertEqual(25, self.history.sync(self.api))
+        self.assertEqual([0, 10, 20], self.server.calls)
+
+        # Only one page with new experiments
+        self.server.calls = []
+        self.server.experiments = (_exps(28, 29, 'Waiting') +
+                                   _exps(26, 27, 'Running') + _exps(1, 25))
+        self.assertEqual(5, self.history.sync(self.api))
+        self.assertEqual([0], self.server.calls)
+
+        # Download until oldest non terminated experiment 26
+        self.server.calls = []
+        self.server.experiments = _exps(26, 29) + _exps(1, 25)
+        self.history.page_size = 2
+        self.assertEqual(4, self.history.sync(self.api))
+        self.assertEqual([0, 2, 4], self.server.calls)
+        self.assertEqual(_exps(26, 29) + _exps(1, 25),
+                         self.history.query('user'))
+
+    def test_query(self):
+        """ Test filtered queries """
+        self.server.experiments = _exps(21, 25, 'Running') + _exps(1, 20)
+        ret = experiment.get_experiments_list(self.api, 'Running', 2, 1,
+                                              local=True)
+        self.assertEqual({'items': _exps(23, 24, 'Running')}, ret)
+
+        ret = self.history.query('user', 'Terminated,Error', 0, 18)
+        self.assertEqual(_exps(1, 2), ret)
+        self.assertEqual([], self.history.query('other'))
+        self.assertRaises(ValueError, self.history.query, 'user', 'Unknown')
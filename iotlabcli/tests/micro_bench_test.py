@@ -0,0 +1,66 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Test the iotlabcli.benchmarks.micro_bench module """
+
+import os
+import json
+
+from iotlabcli.benchmarks import micro_bench
+from iotlabcli.tests.my_mock import CacheDirMock
+
+from .c23 import patch, StringIO
+
+
+class TestMicroBench(CacheDirMock):
+    """ Test iotlabcli.benchmarks.micro_bench """
+
+    @patch('sys.stderr', new_callable=StringIO)
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_main(self, stdout, stderr):
+        """ Run, save and compare benchmarks """
+        path = os.path.join(self.cache_dir, 'bench.json')
+        args = ['--nodes', '10', '20', '--associations', '1', '20',
+                '--rounds', '1']
+        micro_bench.main(args + ['--save', path])
+
+        results = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual(len(micro_bench.BENCHMARKS) * 3, len(results))
+        self.assertEqual(('add_exp_resources', 10, 1),
+                         micro_bench._result_key(results[0]))
+        with open(path) as bench_file:
+            self.assertEqual(results, json.load(bench_file))
+
+        # any time is a regression compared to zero seconds
+        self.assertRaises(SystemExit, micro_bench.main,
+                          args + ['--compare', path, '--threshold', '-1'])
+        self.assertIn('Regression: add_exp_resources nodes=10',
+                      stderr.getvalue())
+        micro_bench.main(args + ['-b', 'exp_resources', '--compare', path,
+                                 '--threshold', '1000'])
+
+    def test_experiment_content(self):
+        """ Benchmarked experiment has one association per nodes group """
+        exp = micro_bench.build_experiment(micro_bench.resources_list(10, 3))
+        self.assertEqual(10, len(exp.nodes))
+        self.assertEqual(['fw_0.elf', 'fw_1.elf', 'fw_2.elf'],
+                         sorted(exp.firmwareassociations.keys()))
+        self.assertEqual(3, len(exp.associations['mobility']))
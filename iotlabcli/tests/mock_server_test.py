@@ -0,0 +1,131 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Test the iotlabcli.benchmarks module """
+
+import json
+
+from iotlabcli import experiment
+from iotlabcli.rest import Api
+from iotlabcli.benchmarks import mock_server
+from iotlabcli.benchmarks import cli_bench
+from iotlabcli.tests.my_mock import CacheDirMock
+
+from .c23 import patch, StringIO, HTTPError
+
+
+class TestMockServer(CacheDirMock):
+    """ Test iotlabcli.benchmarks.mock_server """
+
+    def setUp(self):
+        CacheDirMock.setUp(self)
+        self.testbed = mock_server.MockTestbed(nodes=3, sites=['grenoble'],
+                                               padding=4)
+        self.server = mock_server.MockRestServer(self.testbed).start()
+        patch('iotlabcli.rest.Api.url', self.server.url).start()
+        self.api = Api('user', 'password')
+
+    def tearDown(self):
+        CacheDirMock.tearDown(self)
+        self.server.stop()
+
+    def test_experiment(self):
+        """ Run an experiment on the mock server """
+        res = self.api.get_resources(site='grenoble', archi='a8:at86rf231')
+        self.assertEqual(['a8-1.grenoble.iot-lab.info',
+                          'a8-2.grenoble.iot-lab.info',
+                          'a8-3.grenoble.iot-lab.info'],
+                         [node['network_address'] for node in res['items']])
+        self.assertEqual('xxxx', res['items'][0]['padding'])
+        self.assertEqual([{'site': 'grenoble', 'archi': 'm3:at86rf231',
+                           'state': 'Alive', 'ids': '1-3'}],
+                         self.api.get_resources(True, archi='m3:at86rf231')
+                         ['items'])
+
+        alias = experiment.exp_resources(
+            experiment.AliasNodes(2, 'grenoble', 'm3:at86rf231'))
+        exp_id = experiment.submit_experiment(self.api, 'exp', 20,
+                                              [alias])['id']
+        self.assertEqual(
+            {'0': ['m3-1.grenoble.iot-lab.info',
+                   'm3-2.grenoble.iot-lab.info']},
+            self.api.node_command('reset', exp_id))
+        self.assertEqual([exp_id], [exp['id'] for exp in
+                                    self.api.get_experiments()['items']])
+
+        self.api.stop_experiment(exp_id)
+        state = self.api.get_experiment_info(exp_id, 'state')['state']
+        self.assertEqual('Terminated', state)
+        self.assertEqual([], self.api.get_experiments()['items'])
+
+    def test_experiments_history(self):
+        """ Local experiments history is synchronized incrementally """
+        def _local_ids():
+            return [exp['id'] for exp in experiment.get_experiments_list(
+                self.api, 'Terminated', 0, 0, local=True)['items']]
+
+        nodes = ['m3-1.grenoble.iot-lab.info']
+        for _ in range(2):
+            self.api.stop_experiment(self.testbed.add_experiment(nodes))
+        self.assertEqual([2, 1], _local_ids())
+
+        self.api.stop_experiment(self.testbed.add_experiment(nodes))
+        self.assertEqual([3, 2, 1], _local_ids())
+
+    def test_profiles(self):
+        """ Add, get and delete profiles """
+        self.api.add_profile('prof', {'nodearch': 'm3', 'power': 'dc'})
+        self.assertEqual('dc', self.api.get_profile('prof')['power'])
+        self.assertEqual(['prof'], [prof['profilename'] for prof in
+                                    self.api.get_profiles('m3')])
+        self.assertEqual([], self.api.get_profiles('a8'))
+        self.api.del_profile('prof')
+        self.assertRaises(HTTPError, self.api.get_profile, 'prof')
+
+    def test_errors(self):
+        """ Injected errors and unknown urls """
+        self.testbed.error_rate = 1.0
+        self.assertRaises(HTTPError, self.api.get_profiles)
+        self.testbed.error_rate = 0.0
+        self.assertRaises(HTTPError, self.api.method, 'unknown')
+        self.assertEqual(2, self.testbed.requests)
+
+
+class TestCliBench(CacheDirMock):
+    """ Test iotlabcli.benchmarks.cli_bench """
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_main(self, stdout):
+        """ Run all scenarios once without errors """
+        cli_bench.main(['--nodes', '2', '--repeat', '1'])
+        results = [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+        self.assertEqual([scn[0] for scn in cli_bench.SCENARIOS],
+                         [res['name'] for res in results])
+        self.assertEqual([0], list(set(res['errors'] for res in results)))
+        self.assertEqual('iotlab-experiment info -l', results[0]['command'])
+
+        # only selected scenarios
+        stdout.truncate(0)
+        stdout.seek(0)
+        cli_bench.main(['--nodes', '2', '--repeat', '2', '-s', 'info'])
+        result = json.loads(stdout.getvalue())
+        self.assertEqual((2, 2), (result['runs'], result['requests']))
@@ -22,9 +22,10 @@
 """ common TestCase class  for testing commands """
 
 import sys
+import shutil
+import tempfile
 import unittest
 
-from iotlabcli import experiment
 from iotlabcli.rest import Api
 from iotlabcli.helpers import json_dumps
 
@@ -68,20 +69,32 @@ def api_mock_stop():
 
 
 # pylint: disable=too-many-public-methods
-class CommandMock(unittest.TestCase):
+class CacheDirMock(unittest.TestCase):
+    """ Use a temporary cache directory """
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        patch('iotlabcli.cache.CACHE_DIR', self.cache_dir).start()
+
+    def tearDown(self):
+        patch.stopall()
+        shutil.rmtree(self.cache_dir)
+
+
+class CommandMock(CacheDirMock):
     """ Common mock needed for testing commands """
     def setUp(self):
+        CacheDirMock.setUp(self)
         self.api = api_mock()
-        experiment.AliasNodes._alias = 0  # pylint:disable=protected-access
 
     def tearDown(self):
         api_mock_stop()
-        patch.stopall()
+        CacheDirMock.tearDown(self)
 
 
-class MainMock(unittest.TestCase):
+class MainMock(CacheDirMock):
     """ Common mock needed for testing main function of parsers """
     def setUp(self):
+        CacheDirMock.setUp(self)
         self.api = api_mock()
 
         patch('sys.stderr', sys.stdout).start()
@@ -97,4 +110,4 @@ class MainMock(unittest.TestCase):
 
     def tearDown(self):
         api_mock_stop()
-        patch.stopall()
+        CacheDirMock.tearDown(self)
@@ -24,6 +24,11 @@
 # Mock object not being recognized
 # pylint: disable=no-member,maybe-no-member
 
+import os
+import json
+import shutil
+import tempfile
+
 from iotlabcli.tests.my_mock import MainMock
 import iotlabcli.parser.profile as profile_parser
 import iotlabcli.profile as profile
@@ -138,6 +143,29 @@ class TestMainProfileParser(MainMock):
         self.assertEqual(ret, {'test_profile': 1})
         self.assertFalse(self.api.add_profile.called)
 
+    def test_main_sweep_parser(self):
+        self.api.add_profile.return_value = {'create': 'ok'}
+        profile_parser.main(['sweep', 'm3', '--prefix', 'sw', '-power',
+                             '-period', '140', '1100', '-avg', '4',
+                             '-rssi', '-channels', '11', '26',
+                             '-rperiod', '100', '--workers', '2'])
+        self.assertEqual(4, self.api.add_profile.call_count)
+        prof = profile.ProfileM3('sw_1100_4_rssi26', 'dc')
+        prof.set_consumption(1100, 4, power=True)
+        prof.set_radio('rssi', [26], 100)
+        self.api.add_profile.assert_any_call('sw_1100_4_rssi26', prof)
+
+        # json output, all measures and periods by default
+        self.api.add_profile.reset_mock()
+        profile_parser.main(['sweep', 'a8', '--prefix', 'a', '-avg', '1',
+                             '-j'])
+        self.assertFalse(self.api.add_profile.called)
+
+        # rssi without rperiod, nothing added
+        self.assertRaises(SystemExit, profile_parser.main,
+                          ['sweep', 'custom', '--prefix', 'x', '-rssi'])
+        self.assertFalse(self.api.add_profile.called)
+
     def test_main_get_parser(self):
         profile_parser.main(['get', '--name', 'profile_name'])
         self.api.get_profile.assert_called_with('profile_name')
@@ -164,6 +192,39 @@ class TestMainProfileParser(MainMock):
         self.assertRaises(SystemExit, profile_parser.main,
                           ['load', '--file', 'prof.json'])
 
+    def test_main_sync_parser(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        for name, power in (('same', 'dc'), ('changed', 'battery'),
+                            ('new', 'dc')):
+            with open(os.path.join(tmpdir, name + '.json'), 'w') as prof:
+                json.dump({'profilename': name, 'power': power}, prof)
+        self.api.get_profiles.return_value = [
+            {'power': 'dc', 'profilename': 'same'},
+            {'profilename': 'changed', 'power': 'dc'},
+            {'profilename': 'removed', 'power': 'dc'},
+        ]
+        self.api.add_profile.return_value = {}
+        self.api.del_profile.return_value = {}
+
+        profile_parser.main(['sync', '-d', tmpdir])
+        self.assertEqual(2, self.api.add_profile.call_count)
+        self.api.add_profile.assert_any_call(
+            'new', {'profilename': 'new', 'power': 'dc'})
+        self.api.add_profile.assert_any_call(
+            'changed', {'profilename': 'changed', 'power': 'battery'})
+        self.assertFalse(self.api.del_profile.called)
+
+        profile_parser.main(['sync', '-d', tmpdir, '--delete'])
+        self.api.del_profile.assert_called_once_with('removed')
+
+        # empty directory never deletes all profiles
+        self.api.del_profile.reset_mock()
+        self.assertRaises(SystemExit, profile_parser.main,
+                          ['sync', '-d', os.path.join(tmpdir, 'empty'),
+                           '--delete'])
+        self.assertFalse(self.api.del_profile.called)
+
     def test_parser_error(self):
         """ Test some parser errors directly """
         parser = profile_parser.parse_options()
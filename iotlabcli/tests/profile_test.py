@@ -24,6 +24,8 @@
 
 import unittest
 from iotlabcli import profile
+from iotlabcli import helpers
+from .c23 import Mock
 
 
 class TestM3Profile(unittest.TestCase):
@@ -112,6 +114,119 @@ class TestM3Profile(unittest.TestCase):
             }
         )
 
+    def test_invalid_values(self):
+        m3_prof = profile.ProfileM3('name', 'dc')
+        self.assertRaises(AssertionError, m3_prof.set_consumption,
+                          141, 1, True)
+        self.assertRaises(AssertionError, m3_prof.set_radio,
+                          'rssi', [10], period=1)
+        self.assertRaises(AssertionError, m3_prof.set_radio,
+                          'rssi', [11], period=2**16)
+        self.assertRaises(AssertionError, m3_prof.set_radio,
+                          'rssi', [11, 12], period=1, num_per_channel=256)
+        self.assertRaises(AssertionError, profile.ProfileA8, 'name', 'ac')
+
+    def test_shared_choices(self):
+        self.assertTrue(profile.ProfileM3.choices is
+                        profile.ProfileCustom.choices)
+        self.assertTrue(profile.ProfileA8.choices['power_mode'] is
+                        profile.ProfileWSN430.choices['power_mode'])
+
+
+class TestSweepProfiles(unittest.TestCase):
+
+    def test_sweep_profiles(self):
+        profiles = list(profile.sweep_profiles(
+            profile.ProfileA8, 'sw', periods=[140, 8244], averages=[1],
+            radio=('sniffer', [11, 12], None),
+            measures={'current': True}))
+        self.assertEqual(
+            ['sw_140_1_sniffer11', 'sw_140_1_sniffer12',
+             'sw_8244_1_sniffer11', 'sw_8244_1_sniffer12'],
+            [prof.profilename for prof in profiles])
+        self.assertEqual({'mode': 'sniffer', 'channels': [12], 'period': None,
+                          'num_per_channel': None}, profiles[-1].radio)
+        self.assertFalse(profiles[0].consumption['power'])
+
+        # all periods and averages, all measures
+        profiles = list(profile.sweep_profiles(profile.ProfileM3, 'all'))
+        self.assertEqual(64, len(profiles))
+        self.assertTrue(all(prof.radio is None for prof in profiles))
+        self.assertTrue(profiles[0].consumption['voltage'])
+
+    def test_add_profiles(self):
+        def _add_profile(name, _profile):
+            if name == 'sw_140_4':
+                raise ValueError('Invalid profile')
+            return {'create': name}
+
+        api = Mock()
+        api.add_profile.side_effect = _add_profile
+        profiles = profile.sweep_profiles(profile.ProfileM3, 'sw',
+                                          periods=[140], averages=[4, 1])
+        ret = profile.add_profiles(api, profiles, workers=2)
+        self.assertEqual({'items': [
+            {'profilename': 'sw_140_1', 'result': {'create': 'sw_140_1'}},
+            {'profilename': 'sw_140_4',
+             'error': 'ValueError: Invalid profile'},
+        ]}, ret)
+
+
+class TestSyncProfiles(unittest.TestCase):
+
+    def test_sync_profiles(self):
+        m3_prof = profile.ProfileM3('m3', 'dc')
+        api = Mock()
+        api.get_profiles.return_value = [
+            helpers.to_json_obj(m3_prof), {'profilename': 'old'}]
+        api.add_profile.side_effect = ValueError('Invalid profile')
+        ret = profile.sync_profiles(api, {'m3': m3_prof, 'new': {}},
+                                    delete=True)
+        self.assertEqual({'items': [
+            {'profilename': 'm3', 'action': 'unchanged'},
+            {'profilename': 'new', 'action': 'add',
+             'error': 'ValueError: Invalid profile'},
+            {'profilename': 'old', 'action': 'delete',
+             'result': api.del_profile.return_value},
+        ]}, ret)
+        api.add_profile.assert_called_once_with('new', {})
+
+    def test_sync_profiles_server_fields(self):
+        m3_prof = profile.ProfileM3('m3', 'dc')
+        m3_prof.set_consumption(140, 1, power=True)
+        remote = helpers.to_json_obj(m3_prof)
+        remote.update(id=3, user='user', creation_date='2026-01-01')
+        api = Mock()
+        api.get_profiles.return_value = [remote]
+
+        ret = profile.sync_profiles(api, {'m3': m3_prof})
+        self.assertEqual({'items': [
+            {'profilename': 'm3', 'action': 'unchanged'}]}, ret)
+        self.assertFalse(api.add_profile.called)
+
+        # A local field differing from server one still updates
+        m3_prof.set_consumption(140, 4, power=True)
+        ret = profile.sync_profiles(api, {'m3': m3_prof})
+        self.assertEqual('update', ret['items'][0]['action'])
+
+    def test_sync_profiles_removed_section(self):
+        remote = {'profilename': 'm3', 'nodearch': 'm3', 'power': 'dc',
+                  'radio': {'mode': 'rssi', 'channels': [11], 'num': 1,
+                            'period': 1}}
+        api = Mock()
+        api.get_profiles.return_value = [remote]
+
+        # radio measures removed from the local file
+        local = dict((key, value) for key, value in remote.items()
+                     if key != 'radio')
+        ret = profile.sync_profiles(api, {'m3': local})
+        self.assertEqual('update', ret['items'][0]['action'])
+
+        # A null section is the same as a missing one
+        remote['radio'] = None
+        ret = profile.sync_profiles(api, {'m3': local})
+        self.assertEqual('unchanged', ret['items'][0]['action'])
+
 
 class TestWSN430Profile(unittest.TestCase):
 
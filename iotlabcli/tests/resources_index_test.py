@@ -0,0 +1,104 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Test the iotlabcli.resources_index module """
+
+from iotlabcli import experiment
+from iotlabcli.resources_index import ResourcesIndex
+from iotlabcli.tests.my_mock import CacheDirMock
+
+from .c23 import patch, Mock
+
+
+def _resource(num, site='grenoble', archi='m3:at86rf231', state='Alive'):
+    """ Return a resource description like the REST API one """
+    return {'network_address': '%s-%u.%s.iot-lab.info' % (
+        archi.split(':')[0], num, site), 'site': site, 'archi': archi,
+            'state': state, 'mobile': '0', 'x': str(num), 'y': '1.5',
+            'z': '', 'uid': '%04x' % num}
+
+
+RESOURCES = [_resource(10), _resource(2), _resource(3, state='Busy'),
+             _resource(1, archi='a8:at86rf231'), _resource(1, site='lille')]
+
+
+class TestResourcesIndex(CacheDirMock):
+    """ Test iotlabcli.resources_index.ResourcesIndex """
+
+    def setUp(self):
+        CacheDirMock.setUp(self)
+        self.api = Mock()
+        self.api.get_resources.return_value = {'items': list(RESOURCES)}
+        self.index = ResourcesIndex()
+
+    def _addresses(self, **selections):
+        return [res['network_address'] for res in
+                self.index.resources(self.api, **selections)['items']]
+
+    def test_resources(self):
+        """ Test filtered queries """
+        self.assertEqual(['a8-1.grenoble.iot-lab.info'],
+                         self._addresses(archi='a8:at86rf231'))
+        self.assertEqual(['m3-2.grenoble.iot-lab.info',
+                          'm3-10.grenoble.iot-lab.info'],
+                         self._addresses(archi='m3', state='Alive',
+                                         site='grenoble'))
+        self.assertEqual(RESOURCES[1], self.index.resources(
+            self.api, 'grenoble', archi='m3')['items'][0])
+        self.assertEqual(['m3-1.lille.iot-lab.info'],
+                         self._addresses(site='lille', mobile='0'))
+        self.assertEqual([], self._addresses(mobile=True))
+        self.assertRaises(ValueError, self._addresses, uid='0001')
+
+        # Only one request, with all sites
+        self.api.get_resources.assert_called_once_with(False, None)
+
+    def test_refresh(self):
+        """ Test index incremental refresh """
+        self.assertEqual(5, self.index.refresh(self.api))
+        self.assertEqual(0, self.index.refresh(self.api))
+        self.assertEqual(0, self.index.refresh(self.api, 'lille'))
+        self.assertEqual(1, self.api.get_resources.call_count)
+
+        # Only changed resources of outdated site are written
+        self.api.get_resources.return_value = {'items': [
+            _resource(1, site='lille', state='Suspected'),
+            _resource(2, site='lille')]}
+        with patch.object(self.index, 'ttl', -1):
+            self.assertEqual(2, self.index.refresh(self.api, 'lille'))
+            self.api.get_resources.assert_called_with(False, 'lille')
+            self.assertEqual(0, self.index.refresh(self.api, 'lille'))
+        self.assertEqual(['Suspected', 'Alive'], [
+            res['state'] for res in self.index.query(site='lille')])
+        self.assertEqual(3, len(self.index.query(site='grenoble', archi='m3')))
+
+        # Removed resources
+        self.api.get_resources.return_value = {'items': RESOURCES[:1]}
+        self.assertEqual(0, self.index.refresh(self.api, force=True))
+        self.assertEqual(RESOURCES[:1], self.index.query())
+
+    def test_info_experiment(self):
+        """ Test experiment.info_experiment from index """
+        ret = experiment.info_experiment(self.api, site='lille',
+                                         from_index=True)
+        self.assertEqual({'items': RESOURCES[4:]}, ret)
+        self.assertRaises(ValueError, experiment.info_experiment, self.api,
+                          list_id=True, from_index=True)
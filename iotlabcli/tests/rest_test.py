@@ -24,13 +24,15 @@
 # pylint: disable=too-many-public-methods
 # pylint: disable=protected-access
 
+import time
 import unittest
 
 from iotlabcli import rest
+from iotlabcli import helpers
 from iotlabcli.helpers import json_dumps
 from iotlabcli.tests.my_mock import RequestRet
 
-from .c23 import HTTPError, patch
+from .c23 import HTTPError, patch, Mock
 
 
 class TestRest(unittest.TestCase):
@@ -47,6 +49,35 @@ class TestRest(unittest.TestCase):
         self.api = rest.Api('user', 'password')
         self.api.url = self._url
 
+    def test_method_session(self):
+        """ Test Api.method with a shared session """
+        ret_val = RequestRet(200, content=json_dumps({'test': 'val'}))
+        session = Mock()
+        session.request.return_value = ret_val
+        with patch.object(rest.Api, 'session', session):
+            self.assertEqual({'test': 'val'}, self.api.method('page'))
+        session.request.assert_called_with('get', self._url + 'page',
+                                           files=None, json=None,
+                                           auth=self.api.auth)
+
+    @patch('iotlabcli.helpers.forget_current_experiment')
+    def test_method_forget_current_experiment(self, forget):
+        """ Test cached current experiment invalidation """
+        ret_val = RequestRet(200, content=json_dumps({}))
+        with patch('requests.request', return_value=ret_val):
+            self.api.get_experiment_info(123)
+            self.assertFalse(forget.called)
+            self.api.stop_experiment(123)
+            forget.assert_called_with(self.api)
+        forget.reset_mock()
+
+        with patch('requests.request',
+                   return_value=RequestRet(404, content='Not found')):
+            self.assertRaises(HTTPError, self.api.get_profiles)
+            self.assertFalse(forget.called)
+            self.assertRaises(HTTPError, self.api.node_command, 'reset', 123)
+            forget.assert_called_with(self.api)
+
     def test_method(self):
         """ Test Api.method rest submission """
         ret = {'test': 'val'}
@@ -106,6 +137,45 @@ class TestRest(unittest.TestCase):
         self.assertEqual(ret, rest.Api._get_with_cache('my_url_2'))
         self.assertEqual(2, api_method.call_count)
 
+    @patch('iotlabcli.rest.Api.method')
+    def test__get_with_cache_threads(self, api_method):
+        """ Test Api._get_with_cache from concurrent threads """
+        api_method.side_effect = lambda url: time.sleep(0.01) or {'url': url}
+
+        results, _ = helpers.parallel_map(
+            rest.Api._get_with_cache, dict((i, ('my_url_3',))
+                                           for i in range(10)))
+        self.assertEqual([{'url': 'my_url_3'}] * 10, list(results.values()))
+        self.assertEqual(1, api_method.call_count)
+
+    @patch('iotlabcli.rest.Api.method')
+    def test_profiles_cache(self, api_method):
+        """ Test profiles cache and its invalidation """
+        api_method.side_effect = lambda url, *args, **kwargs: {'url': url}
+
+        for _ in range(3):
+            self.assertEqual({'url': 'profiles'}, self.api.get_profiles())
+            self.assertEqual({'url': 'profiles?archi=m3'},
+                             self.api.get_profiles('m3'))
+            self.assertEqual({'url': 'profiles/prof'},
+                             self.api.get_profile('prof'))
+        self.assertEqual(3, api_method.call_count)
+
+        # other Api objects have their own cache
+        rest.Api('user', 'password').get_profiles()
+        self.assertEqual(4, api_method.call_count)
+
+        self.api.add_profile('prof', {})
+        self.api.get_profile('prof')
+        self.assertEqual(6, api_method.call_count)
+
+        # invalidated even on errors
+        api_method.side_effect = HTTPError(None, 500, 'error', None, None)
+        self.assertRaises(HTTPError, self.api.del_profile, 'prof')
+        self.assertRaises(HTTPError, self.api.get_profile, 'prof')
+        self.assertRaises(HTTPError, self.api.get_profile, 'prof')
+        self.assertEqual(9, api_method.call_count)
+
     def test_check_credentials(self):
         """ Test Api.method rest submission """
         ret_val = RequestRet(200, content='"OK"')
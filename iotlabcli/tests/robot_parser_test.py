@@ -25,7 +25,7 @@
 import iotlabcli.parser.robot as robot_parser
 from iotlabcli.tests.my_mock import MainMock
 
-from .c23 import patch
+from .c23 import HTTPError, patch, StringIO
 
 # pylint: disable=too-many-public-methods
 # pylint: disable=too-few-public-methods
@@ -52,6 +52,62 @@ class TestMainRobotParser(MainMock):
         robot_command.assert_called_with(self.api, 'status', 123,
                                          ['m3-1', 'm3-2', 'm3-3'])
 
+    @patch('time.sleep')
+    @patch('iotlabcli.robot.robot_command')
+    @patch('iotlabcli.parser.common.list_nodes')
+    def test_main_status_watch(self, list_nodes, robot_command, sleep):
+        """Run the parser.robot.main function for status --watch."""
+        list_nodes.return_value = []
+        robot_command.side_effect = [
+            {'items': [{'network_address': 'm3-1', 'battery': 12.1}]},
+            {'items': [{'network_address': 'm3-1', 'battery': 12.0}]},
+        ]
+        with patch('sys.stdout', StringIO()) as stdout:
+            robot_parser.main(['status', '--watch', '0.5', '--count', '2'])
+        self.assertEqual(
+            '{"battery":12.1,"network_address":"m3-1"}\n'
+            '{"battery":12.0,"network_address":"m3-1"}\n',
+            stdout.getvalue())
+        sleep.assert_called_once_with(0.5)
+
+        # User chosen output is kept
+        robot_command.side_effect = [
+            {'items': [{'network_address': 'm3-1', 'battery': 12.1}]}]
+        with patch('sys.stdout', StringIO()) as stdout:
+            robot_parser.main(['--output', 'compact', 'status', '--watch',
+                               '--count', '1'])
+        self.assertEqual('[{"battery":12.1,"network_address":"m3-1"}]\n',
+                         stdout.getvalue())
+
+    @patch('time.sleep')
+    @patch('iotlabcli.robot.robot_command')
+    @patch('iotlabcli.parser.common.list_nodes')
+    def test_main_status_watch_poll_error(self, list_nodes, robot_command,
+                                          _sleep):
+        """Run status --watch with a failing poll, error is printed."""
+        list_nodes.return_value = []
+        robot_command.side_effect = [
+            {'items': [{'network_address': 'm3-1', 'battery': 12.1}]},
+            HTTPError(None, 500, 'poll failed', None, None)]
+        with patch('sys.stdout', StringIO()) as stdout:
+            with patch('sys.stderr', StringIO()) as stderr:
+                self.assertRaises(SystemExit, robot_parser.main,
+                                  ['status', '--watch', '--count', '2'])
+        self.assertEqual('{"battery":12.1,"network_address":"m3-1"}\n',
+                         stdout.getvalue())
+        self.assertIn('HTTP Error 500: poll failed', stderr.getvalue())
+
+    @patch('iotlabcli.robot.robot_command')
+    def test_main_status_watch_errors(self, robot_command):
+        """Run the parser.robot.main function with invalid --watch."""
+        for args in (['status', '--count', '2'],
+                     ['status', '--watch', '0'],
+                     ['status', '--watch', '-1'],
+                     ['status', '--watch', '--count', '0']):
+            with patch('sys.stderr', StringIO()):
+                self.assertRaises(SystemExit, robot_parser.main, args)
+        self.assertFalse(robot_command.called)
+
     @patch('iotlabcli.robot.robot_update_mobility')
     @patch('iotlabcli.parser.common.list_nodes')
     def test_main_update(self, list_nodes, robot_update_mobility):
@@ -73,6 +129,44 @@ class TestMainRobotParser(MainMock):
         self.assertRaises(SystemExit, robot_parser.main, args)
         self.assertFalse(robot_update_mobility.called)
 
+    @patch('iotlabcli.robot.robot_update_mobility')
+    def test_main_update_mobilities(self, robot_update_mobility):
+        """Run the parser.robot.main function for several mobilities."""
+        robot_update_mobility.side_effect = (
+            lambda api, exp_id, name, site, nodes: {'0': nodes})
+        node = 'm3-%u.grenoble.iot-lab.info'
+
+        with patch('sys.stdout', StringIO()) as stdout:
+            robot_parser.main(['--output', 'compact', 'update',
+                               'traj,grenoble=grenoble,m3,3-4',
+                               'square,grenoble=grenoble,m3,1',
+                               'traj,grenoble=grenoble,m3,2'])
+        self.assertEqual(2, robot_update_mobility.call_count)
+        robot_update_mobility.assert_any_call(
+            self.api, 123, 'traj', 'grenoble', [node % 2, node % 3, node % 4])
+        robot_update_mobility.assert_any_call(
+            self.api, 123, 'square', 'grenoble', [node % 1])
+        # merged in 'name,site' order
+        nodes = [node % num for num in (1, 2, 3, 4)]
+        self.assertEqual('{"0":["%s","%s","%s","%s"]}\n' % tuple(nodes),
+                         stdout.getvalue())
+
+        # One mobility with nodes
+        robot_update_mobility.reset_mock()
+        robot_parser.main(['update', 'traj,grenoble=grenoble,m3,1'])
+        robot_update_mobility.assert_called_once_with(
+            self.api, 123, 'traj', 'grenoble', [node % 1])
+
+        # Invalid mobilities nodes
+        robot_update_mobility.reset_mock()
+        for args in (['update', 'traj,grenoble', 'sq,grenoble=grenoble,m3,1'],
+                     ['update', 'traj,grenoble=grenoble,m3,1-2',
+                      'sq,grenoble=grenoble,m3,2'],
+                     ['update', 'traj,grenoble=grenoble,m3,1',
+                      'sq,grenoble=grenoble,m3,2', '-l', 'grenoble,m3,3']):
+            self.assertRaises(SystemExit, robot_parser.main, args)
+        self.assertFalse(robot_update_mobility.called)
+
     @patch('iotlabcli.robot.mobility_command')
     def test_main_mobility(self, mobility_command):
         """Run the parser.robot.main function for mobility commands."""
@@ -24,19 +24,15 @@
 # pylint: disable=too-many-public-methods
 # Issues with 'mock'
 # pylint: disable=no-member,maybe-no-member
-import unittest
 from iotlabcli import robot
 from iotlabcli.tests import my_mock
+from iotlabcli.tests.my_mock import RequestRet
 
+from .c23 import patch
 
-class TestRobot(unittest.TestCase):
-    """ Test the iotlabcli.node module """
-
-    def setUp(self):
-        self.api = my_mock.api_mock()
 
-    def tearDown(self):
-        my_mock.api_mock_stop()
+class TestRobot(my_mock.CommandMock):
+    """ Test the iotlabcli.node module """
 
     def test_robot_command(self):
         """Test 'robot_command'."""
@@ -47,6 +43,42 @@ class TestRobot(unittest.TestCase):
 
         self.api.robot_command.assert_called_with('status', 123, nodes_list)
 
+    @patch('time.sleep')
+    def test_robot_status_watch(self, sleep):
+        """Test robot_status_watch."""
+        self.api.robot_command.side_effect = [
+            {'items': [{'network_address': 'm3-1', 'battery': 12.1,
+                        'position': {'x': 1, 'y': 2}},
+                       {'network_address': 'm3-2', 'battery': 11.0}]},
+            {'items': [{'network_address': 'm3-1', 'battery': 12.1,
+                        'position': {'x': 1, 'y': 2}},
+                       {'network_address': 'm3-2', 'battery': 10.9}]},
+            {'items': [{'network_address': 'm3-1', 'battery': 12.1,
+                        'position': {'x': 1, 'y': 3}}]},
+            KeyboardInterrupt(),
+        ]
+        ret = list(robot.robot_status_watch(self.api, 123, ['m3-1'], 2.0))
+        self.assertEqual([
+            {'network_address': 'm3-1', 'battery': 12.1,
+             'position': {'x': 1, 'y': 2}},
+            {'network_address': 'm3-2', 'battery': 11.0},
+            {'network_address': 'm3-2', 'battery': 10.9},
+            {'network_address': 'm3-1', 'position': {'x': 1, 'y': 3}},
+            {'network_address': 'm3-2', 'battery': None},
+        ], ret)
+        self.api.robot_command.assert_called_with('status', 123, ['m3-1'])
+        self.assertEqual(4, self.api.robot_command.call_count)
+        sleep.assert_called_with(2.0)
+        self.assertEqual(3, sleep.call_count)
+
+        # Limited polls count
+        self.api.robot_command.reset_mock()
+        self.api.robot_command.side_effect = None
+        self.api.robot_command.return_value = {'m3-1': {'state': 'Idle'}}
+        ret = list(robot.robot_status_watch(self.api, 123, count=2))
+        self.assertEqual([{'network_address': 'm3-1', 'state': 'Idle'}], ret)
+        self.assertEqual(2, self.api.robot_command.call_count)
+
     def test_robot_update_mobility(self):
         """Test robot_update_mobility."""
         nodes_list = ["m3-1", "m3-2", "m3-3"]
@@ -58,6 +90,20 @@ class TestRobot(unittest.TestCase):
         self.api.robot_update_mobility.assert_called_with(
             123, 'mob_name', 'grenoble', nodes_list)
 
+    def test_robot_update_mobilities(self):
+        """Test robot_update_mobilities."""
+        def _update_mobility(_exp_id, name, _site, nodes):
+            if name != 'traj':
+                raise ValueError('Unknown mobility')
+            return {'0': nodes[:1], '1': nodes[1:]}
+
+        self.api.robot_update_mobility.side_effect = _update_mobility
+        ret = robot.robot_update_mobilities(
+            self.api, 123, {('traj', 'grenoble'): ['m3-1', 'm3-2'],
+                            ('square', 'lille'): ['m3-3']})
+        self.assertEqual({'0': ['m3-1'], '1': ['m3-2'], 'errors': {
+            'square,lille': 'ValueError: Unknown mobility'}}, ret)
+
     def test_mobility_command(self):
         """Test 'mobility_command'."""
 
@@ -73,8 +119,47 @@ class TestRobot(unittest.TestCase):
         self.api.mobility_user_get.assert_called_with('m_name', 'm_site')
         self.api.reset_mock()
 
-    def test_robot_get_map(self):
+    @patch('requests.Session')
+    def test_robot_get_map(self, session_class):
         """Test robot_get_map."""
+        request = session_class.return_value.request
+        request.side_effect = lambda method, url, **kwargs: RequestRet(
+            200, '{"url": "%s"}' % url.rpartition('?')[2],
+            {'ETag': '"%s"' % url.rpartition('?')[2]})
+
         ret = robot.robot_get_map('grenoble')
         self.assertEqual(sorted(ret.keys()), ['config', 'dock', 'image'])
-        # Lazy to check calls to Api.method should use proxy to call it...
+        self.assertEqual({'url': 'mapconfig'}, ret['config'])
+        self.assertEqual({'url': 'dockconfig'}, ret['dock'])
+        self.assertEqual(b'{"url": "mapimage"}', ret['image'].read())
+        self.assertEqual(3, request.call_count)
+        request.assert_any_call(
+            'get', robot.Api.url + 'robots/mobility/map/grenoble?mapimage',
+            auth=robot.Api(None, None).auth, headers={})
+        self.assertTrue(session_class.return_value.close.called)
+
+        # Not modified, read from cache
+        request.reset_mock()
+        request.side_effect = None
+        request.return_value = RequestRet(304, '')
+        ret = robot.robot_get_map('grenoble')
+        self.assertEqual({'url': 'dockconfig'}, ret['dock'])
+        self.assertEqual(b'{"url": "mapimage"}', ret['image'].read())
+        self.assertEqual(3, request.call_count)
+        request.assert_any_call(
+            'get', robot.Api.url + 'robots/mobility/map/grenoble?mapimage',
+            auth=robot.Api(None, None).auth,
+            headers={'If-None-Match': '"mapimage"'})
+
+        # Lost cache file, downloaded again
+        robot.MAPS_CACHE.delete(ret['image'].key)
+        self.assertRaises(IOError, robot.MapFile(ret['image'].key).read)
+        request.reset_mock()
+        request.side_effect = lambda method, url, **kwargs: (
+            RequestRet(200, 'image') if url.endswith('mapimage') else
+            RequestRet(304, ''))
+        self.assertEqual(b'image', robot.robot_get_map('grenoble')['image']
+                         .read())
+        request.assert_any_call(
+            'get', robot.Api.url + 'robots/mobility/map/grenoble?mapimage',
+            auth=robot.Api(None, None).auth, headers={})
@@ -0,0 +1,117 @@
+# -*- coding:utf-8 -*-
+
+# This file is a part of IoT-LAB cli-tools
+# Copyright (C) 2015 INRIA (Contact: admin@iot-lab.info)
+# Contributor(s) : see AUTHORS file
+#
+# This software is governed by the CeCILL license under French law
+# and abiding by the rules of distribution of free software.  You can  use,
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# http://www.cecill.info.
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability.
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+""" Test the iotlabcli.spatial module """
+
+from iotlabcli import cache
+from iotlabcli import resources_index
+from iotlabcli.parser import common
+from iotlabcli.tests.my_mock import CacheDirMock
+
+from .c23 import Mock
+
+
+def _resource(name, x, y, z='0'):
+    """ Return a grenoble resource description """
+    return {'network_address': '%s.grenoble.iot-lab.info' % name,
+            'site': 'grenoble', 'archi': name.split('-')[0] + ':at86rf231',
+            'state': 'Alive', 'x': x, 'y': y, 'z': z}
+
+
+# m3 nodes every meter on x, a8 node in the middle and one far away
+RESOURCES = ([_resource('m3-%u' % num, str(num), '0')
+              for num in range(1, 21)] +
+             [_resource('a8-1', '10', '3'), _resource('a8-2', '10', '30', '2'),
+              _resource('m3-100', '', '')])
+
+
+class TestSpatialSelection(CacheDirMock):
+    """ Test iotlabcli.spatial.SpatialSelection """
+
+    def setUp(self):
+        CacheDirMock.setUp(self)
+        self.api = Mock()
+        self.api.get_resources.return_value = {'items': RESOURCES}
+
+    def _nodes(self, archi, nodes_str):
+        selection = common.nodes_list_from_info('grenoble', archi, nodes_str)
+        return [n.split('.')[0] for n in selection.nodes(self.api)]
+
+    def test_near(self):
+        """ Test selecting nodes within radius """
+        self.assertEqual(['m3-3', 'm3-4', 'm3-5', 'm3-6', 'm3-7'],
+                         self._nodes('m3', 'near=5:2'))
+        self.assertEqual(['m3-6', 'm3-10', 'm3-14'],
+                         self._nodes('m3', 'near=a8-1:5')[::4])
+        self.assertEqual(['a8-1'], self._nodes('a8', 'near=m3-10:3'))
+
+        self.assertRaises(ValueError, self._nodes, 'm3', 'near=100:5')
+        self.assertEqual(['m3-12'], self._nodes('m3', 'near=m3-12:0.5'))
+        self.assertRaises(ValueError, self._nodes, 'a8', 'near=m3-1:1')
+
+    def test_box(self):
+        """ Test selecting nodes in a box """
+        self.assertEqual(['m3-18', 'm3-19', 'm3-20'],
+                         self._nodes('m3', 'box=18:-1:30:1'))
+        self.assertEqual(['a8-1', 'a8-2'], self._nodes('a8', 'box=0:0:20:40'))
+        self.assertEqual(['a8-2'], self._nodes('a8', 'box=0:0:1:20:40:3'))
+
+    def test_invalid(self):
+        """ Test invalid selections """
+        for nodes_str in ('near=1', 'near=1:a', 'box=1:2:3',
+                          'box=1:2:3:4:5', 'box=a:b:c:d'):
+            self.assertRaises(ValueError, common.nodes_list_from_info,
+                              'grenoble', 'm3', nodes_str)
+
+    def test_list_nodes(self):
+        """ Test list_nodes with geometric selections """
+        nodes_ll = [common.nodes_list_from_info('grenoble', 'm3', '1-2'),
+                    common.nodes_list_from_info('grenoble', 'm3',
+                                                'near=20:1')]
+        self.assertEqual(['m3-1.grenoble.iot-lab.info',
+                          'm3-2.grenoble.iot-lab.info',
+                          'm3-19.grenoble.iot-lab.info',
+                          'm3-20.grenoble.iot-lab.info'],
+                         common.list_nodes(self.api, 123, nodes_ll))
+
+    def test_index_queries(self):
+        """ Test queries only read nodes in the area from the index """
+        index = resources_index.ResourcesIndex()
+        index.refresh(self.api, 'grenoble')
+        self.assertEqual(['m3-1', 'm3-2'], [
+            res['network_address'].split('.')[0]
+            for res in index.area('grenoble', (0, -1), (2, 1))])
+        self.assertEqual([], index.area('lille', (0, -1), (2, 1)))
+        self.assertEqual('m3-1.grenoble.iot-lab.info',
+                         index.node('grenoble', 'm3-1')['network_address'])
+        self.assertIsNone(index.node('grenoble', 'm3-1000'))
+
+        with cache.sqlite_connection(index.path, '') as conn:
+            plan = conn.execute(
+                'EXPLAIN QUERY PLAN SELECT resource FROM resources WHERE '
+                'site = ? AND x BETWEEN ? AND ? AND y BETWEEN ? AND ?',
+                ['grenoble', 0, 2, -1, 1]).fetchall()
+        self.assertIn('resources_site_xy', str(plan))
+
+        # Index is not read again when fresh
+        self.api.get_resources.reset_mock()
+        self._nodes('m3', 'near=5:2')
+        self.assertFalse(self.api.get_resources.called)